@@ -0,0 +1,75 @@
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import messagebox
+import threading
+
+WORKER_THREADS = 2  # Enough for one search and one Treeview refresh per window at the same time
+POLL_INTERVAL_MS = 20  # How often the Tk loop checks whether a result is ready
+SEARCH_DEBOUNCE_MS = 150  # Wait this long after the last key press before searching
+
+_executor = ThreadPoolExecutor(max_workers=WORKER_THREADS, thread_name_prefix="background-worker")
+_CANCELLED = object()
+
+class BackgroundTask:
+    """Run one kind of slow work (a search, a Treeview refresh) off the Tk main loop.
+
+    submit(work, apply) runs work() on a pool thread and then apply(result) on the Tk thread,
+    which polls for the result with root.after. Only the newest submission counts: older ones
+    are skipped if they have not started, and their results are dropped if they have. Work for
+    one task runs one call at a time, so it may safely share state such as a search index.
+    """
+
+    def __init__(self, root, error_title="Database Error"):
+        self.root = root
+        self.error_title = error_title
+        self._generation = 0  # Bumped by submit() and cancel(); older requests are stale
+        self._lock = threading.Lock()
+        self._after_id = None  # Pending debounce timer
+
+    def submit(self, work, apply, delay_ms=0):
+        """Run work() in the background after delay_ms, then apply(result) on the Tk thread."""
+        self.cancel()
+        generation = self._generation
+        if delay_ms:
+            self._after_id = self.root.after(delay_ms, lambda: self._start(work, apply, generation))
+        else:
+            self._start(work, apply, generation)
+
+    def cancel(self):
+        """Drop every request submitted so far."""
+        self._generation += 1
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def run_exclusive(self, operation):
+        """Run operation() on the calling thread while none of this task's work is running.
+
+        For the Tk thread to change state the work reads, such as a search index.
+        """
+        with self._lock:
+            return operation()
+
+    def _start(self, work, apply, generation):
+        self._after_id = None
+        future = _executor.submit(self._run, work, generation)
+        self.root.after(POLL_INTERVAL_MS, lambda: self._poll(future, apply, generation))
+
+    def _run(self, work, generation):
+        with self._lock:
+            if generation != self._generation:
+                return _CANCELLED  # Superseded while queued behind the previous request
+            return work()
+
+    def _poll(self, future, apply, generation):
+        if generation != self._generation:
+            return
+        if not future.done():
+            self.root.after(POLL_INTERVAL_MS, lambda: self._poll(future, apply, generation))
+            return
+        try:
+            result = future.result()
+        except Exception as e:
+            messagebox.showerror(self.error_title, f"Error loading data: {e}")
+            return
+        if result is not _CANCELLED:
+            apply(result)
@@ -0,0 +1,155 @@
+import sys
+import database_pool
+
+# First-in, first-out allocation: a sale draws on the oldest batches of its product and unit first
+# and is split over as many batches as it takes, each with its own sale_batches row at that batch's
+# buying price. What is left of a batch is kept in inventory_batches.remaining_quantity by the
+# triggers below: its purchased quantity less what sale_batches drew from it.
+
+# Batches of a product and unit with stock left, bought on or before a sale's date, oldest first.
+# Reads only the partial index idx_batches_open, so sold-out batches cost nothing however long the
+# purchase history grows.
+OPEN_BATCHES_QUERY = """
+    SELECT batch_id, buying_price, remaining_quantity, purchase_date
+    FROM inventory_batches
+    WHERE product_id = ? AND unit_id = ? AND remaining_quantity > 0 AND purchase_date <= ?
+    ORDER BY purchase_date, batch_id
+"""
+REMAINING_QUERY = """
+    SELECT ib.batch_id, ib.quantity - COALESCE(SUM(sb.quantity_used), 0)
+    FROM inventory_batches ib
+    LEFT JOIN sale_batches sb ON sb.batch_id = ib.batch_id
+    GROUP BY ib.batch_id
+"""
+
+# Triggers keeping inventory_batches.remaining_quantity equal to quantity less what sale_batches drew
+# from the batch. Cascaded sale_batches deletes from a batch delete find no batch and change nothing.
+REMAINING_TRIGGERS = {
+    "trg_batches_insert_remaining": """
+        CREATE TRIGGER IF NOT EXISTS trg_batches_insert_remaining AFTER INSERT ON inventory_batches
+        BEGIN
+            UPDATE inventory_batches SET remaining_quantity = NEW.quantity WHERE batch_id = NEW.batch_id;
+        END
+    """,
+    "trg_batches_update_remaining": """
+        CREATE TRIGGER IF NOT EXISTS trg_batches_update_remaining AFTER UPDATE OF quantity ON inventory_batches
+        WHEN NEW.quantity IS NOT OLD.quantity
+        BEGIN
+            UPDATE inventory_batches SET remaining_quantity = remaining_quantity + NEW.quantity - OLD.quantity
+            WHERE batch_id = NEW.batch_id;
+        END
+    """,
+    "trg_sale_batches_insert_remaining": """
+        CREATE TRIGGER IF NOT EXISTS trg_sale_batches_insert_remaining AFTER INSERT ON sale_batches
+        BEGIN
+            UPDATE inventory_batches SET remaining_quantity = remaining_quantity - NEW.quantity_used
+            WHERE batch_id = NEW.batch_id;
+        END
+    """,
+    "trg_sale_batches_update_remaining": """
+        CREATE TRIGGER IF NOT EXISTS trg_sale_batches_update_remaining
+        AFTER UPDATE OF batch_id, quantity_used ON sale_batches
+        BEGIN
+            UPDATE inventory_batches SET remaining_quantity = remaining_quantity + OLD.quantity_used
+            WHERE batch_id = OLD.batch_id;
+            UPDATE inventory_batches SET remaining_quantity = remaining_quantity - NEW.quantity_used
+            WHERE batch_id = NEW.batch_id;
+        END
+    """,
+    "trg_sale_batches_delete_remaining": """
+        CREATE TRIGGER IF NOT EXISTS trg_sale_batches_delete_remaining AFTER DELETE ON sale_batches
+        BEGIN
+            UPDATE inventory_batches SET remaining_quantity = remaining_quantity + OLD.quantity_used
+            WHERE batch_id = OLD.batch_id;
+        END
+    """,
+}
+
+def allocate_batches(cursor, product_id, unit_id, quantity, sale_date, taken=None):
+    """Return [(batch_id, quantity_used, buying_price)] covering quantity, oldest batch first.
+
+    Only batches bought on or before sale_date are drawn on. taken maps batch_id to units already
+    allocated but not yet recorded, e.g. by earlier lines of the same basket; it is updated with
+    this allocation. Returns None if those batches do not hold enough stock.
+    """
+    allocation = []
+    needed = quantity
+    for batch_id, buying_price, remaining, _ in cursor.execute(OPEN_BATCHES_QUERY, (product_id, unit_id, sale_date)):
+        if taken is not None:
+            remaining -= taken.get(batch_id, 0)
+        if remaining <= 0:
+            continue
+        used = min(remaining, needed)
+        allocation.append((batch_id, used, buying_price))
+        needed -= used
+        if needed <= 0:
+            break
+    else:
+        return None
+    if taken is not None:
+        for batch_id, used, _ in allocation:
+            taken[batch_id] = taken.get(batch_id, 0) + used
+    return allocation
+
+def allocation_rows(sale_id, unit_id, allocation):
+    """Return the sale_batches rows recording allocation for one sale."""
+    return [(sale_id, batch_id, used, buying_price, unit_id) for batch_id, used, buying_price in allocation]
+
+def record_allocation(cursor, sale_id, unit_id, allocation):
+    """Insert one sale_batches row per batch in allocation."""
+    record_sale_batches(cursor, allocation_rows(sale_id, unit_id, allocation))
+
+def record_sale_batches(cursor, rows):
+    """Insert (sale_id, batch_id, quantity_used, buying_price, unit_id) rows into sale_batches."""
+    cursor.executemany("""
+        INSERT INTO sale_batches (sale_id, batch_id, quantity_used, buying_price, unit_id)
+        VALUES (?, ?, ?, ?, ?)
+    """, rows)
+
+def release_sale(cursor, sale_id):
+    """Return everything a sale drew to its batches by deleting its sale_batches rows."""
+    cursor.execute("DELETE FROM sale_batches WHERE sale_id = ?", (sale_id,))
+
+def create_remaining_triggers(cursor):
+    """Create the triggers that maintain inventory_batches.remaining_quantity."""
+    for sql in REMAINING_TRIGGERS.values():
+        cursor.execute(sql)
+
+def drop_remaining_triggers(cursor):
+    """Drop the remaining_quantity triggers, e.g. before a bulk load followed by rebuild_remaining_quantities()."""
+    for name in REMAINING_TRIGGERS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+def rebuild_remaining_quantities(cursor):
+    """Recompute every batch's remaining_quantity from its quantity and sale_batches."""
+    cursor.execute("""
+        UPDATE inventory_batches
+        SET remaining_quantity = quantity - COALESCE((SELECT SUM(quantity_used) FROM sale_batches
+                                                      WHERE sale_batches.batch_id = inventory_batches.batch_id), 0)
+    """)
+
+def find_remaining_mismatches(cursor):
+    """Return (batch_id, stored remaining, recomputed remaining) for every batch that is off."""
+    computed = dict(cursor.execute(REMAINING_QUERY).fetchall())
+    stored = cursor.execute("SELECT batch_id, remaining_quantity FROM inventory_batches").fetchall()
+    return [(batch_id, remaining, computed[batch_id]) for batch_id, remaining in stored if remaining != computed[batch_id]]
+
+if __name__ == "__main__":
+    from database_setup import ensure_schema
+    ensure_schema()
+    if "--rebuild" in sys.argv:
+        conn = database_pool.acquire_writer()
+        try:
+            database_pool.begin_write(conn)
+            rebuild_remaining_quantities(conn.cursor())
+            conn.commit()
+            print("Rebuilt remaining quantities from inventory_batches and sale_batches.")
+        finally:
+            database_pool.release_writer(conn)
+    mismatches = find_remaining_mismatches(database_pool.get_reader().cursor())
+    for batch_id, remaining, computed in mismatches:
+        print(f"Batch {batch_id}: remaining_quantity is {remaining}, sale_batches give {computed}")
+    if mismatches:
+        print(f"{len(mismatches)} mismatches; run with --rebuild to recompute remaining quantities.")
+        sys.exit(1)
+    print("Remaining quantities match inventory_batches and sale_batches.")
@@ -0,0 +1,96 @@
+"""Run N reader processes against one writer process and report lock waits per PRAGMA profile.
+
+Usage: python -m benchmarks.bench_concurrency [--readers 4] [--seconds 5]
+"""
+import argparse
+import multiprocessing
+import time
+
+import database_pool
+from benchmarks.common import temporary_database, build_database
+
+PROFILES = {
+    "rollback-journal": {
+        "foreign_keys": "ON",
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "busy_timeout": 200,
+    },
+    "wal": dict(database_pool.PRAGMA_PROFILE),
+}
+
+READ_QUERY = """
+    SELECT s.sale_id, s.quantity_sold, s.selling_price, p.product_name
+    FROM sales s
+    JOIN products p ON s.product_id = p.product_id
+    WHERE s.sale_date >= '2024-01-01' AND s.sale_date < '2024-01-08'
+"""
+
+def reader(path, profile, seconds, results):
+    database_pool.configure(path, pragmas=profile)
+    deadline = time.perf_counter() + seconds
+    ops = 0
+    while time.perf_counter() < deadline:
+        database_pool.with_busy_backoff(lambda: database_pool.get_reader().execute(READ_QUERY).fetchall())
+        ops += 1
+    results.put(("reader", ops, dict(database_pool.lock_stats)))
+
+def writer(path, profile, seconds, results):
+    database_pool.configure(path, pragmas=profile)
+    deadline = time.perf_counter() + seconds
+    ops = 0
+    while time.perf_counter() < deadline:
+        conn = database_pool.acquire_writer()
+        try:
+            database_pool.begin_write(conn)
+            conn.execute("""
+                INSERT INTO sales (product_id, selling_price, quantity_sold, sale_date, unit_id)
+                VALUES (1, 1000, 1, '2024-01-03', 1)
+            """)
+            conn.execute("UPDATE inventory SET quantity = quantity - 1 WHERE product_id = 1")
+            conn.commit()
+            ops += 1
+        except Exception:
+            results.put(("writer-error", ops, dict(database_pool.lock_stats)))
+            return
+        finally:
+            database_pool.release_writer(conn)
+    results.put(("writer", ops, dict(database_pool.lock_stats)))
+
+def run_profile(name, profile, readers, seconds, sales):
+    with temporary_database() as path:
+        database_pool.configure(path, pragmas=profile)
+        build_database(path, sales=sales)
+        database_pool.close_all_connections()
+        results = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=reader, args=(path, profile, seconds, results))
+                     for _ in range(readers)]
+        processes.append(multiprocessing.Process(target=writer, args=(path, profile, seconds, results)))
+        for process in processes:
+            process.start()
+        reports = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+    read_ops = sum(ops for role, ops, _ in reports if role == "reader")
+    write_ops = sum(ops for role, ops, _ in reports if role.startswith("writer"))
+    waits = sum(stats["waits"] for _, _, stats in reports)
+    wait_seconds = sum(stats["wait_seconds"] for _, _, stats in reports)
+    failed = any(role == "writer-error" for role, _, _ in reports)
+    print(f"{name:<18}{read_ops / seconds:>12.0f}{write_ops / seconds:>12.0f}{waits:>12}{wait_seconds:>14.2f}"
+          f"{'  writer gave up' if failed else ''}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--sales", type=int, default=20_000)
+    args = parser.parse_args()
+
+    print(f"{args.readers} readers + 1 writer for {args.seconds:g}s per profile")
+    print(f"{'profile':<18}{'reads/s':>12}{'writes/s':>12}{'lock waits':>12}{'waited (s)':>14}")
+    for name, profile in PROFILES.items():
+        run_profile(name, profile, args.readers, args.seconds, args.sales)
+
+if __name__ == "__main__":
+    main()
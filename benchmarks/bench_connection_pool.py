@@ -0,0 +1,67 @@
+"""Compare per-call sqlite3.connect against the shared connection pool.
+
+Usage: python -m benchmarks.bench_connection_pool [--sales 100000] [--iterations 2000]
+"""
+import argparse
+import sqlite3
+
+import database_pool
+from benchmarks.common import temporary_database, build_database, ops_per_second
+
+STOCK_QUERY = "SELECT quantity FROM inventory WHERE product_id = ?"
+SALE_INSERT = """
+    INSERT INTO sales (product_id, selling_price, quantity_sold, sale_date, unit_id)
+    VALUES (?, 1000, 1, '2025-01-01', 1)
+"""
+STOCK_UPDATE = "UPDATE inventory SET quantity = quantity - 1 WHERE product_id = ?"
+
+def read_per_call(i):
+    conn = sqlite3.connect(database_pool.DB_NAME, timeout=10)
+    conn.execute("PRAGMA foreign_keys = ON;")
+    conn.execute(STOCK_QUERY, (i % 200 + 1,)).fetchone()
+    conn.close()
+
+def read_pooled(i):
+    database_pool.get_reader().execute(STOCK_QUERY, (i % 200 + 1,)).fetchone()
+
+def write(conn, i):
+    conn.execute("BEGIN TRANSACTION")
+    conn.execute(SALE_INSERT, (i % 200 + 1,))
+    conn.execute(STOCK_UPDATE, (i % 200 + 1,))
+    conn.commit()
+
+def write_per_call(i):
+    conn = sqlite3.connect(database_pool.DB_NAME, timeout=10)
+    conn.execute("PRAGMA foreign_keys = ON;")
+    try:
+        write(conn, i)
+    finally:
+        conn.close()
+
+def write_pooled(i):
+    conn = database_pool.acquire_writer()
+    try:
+        write(conn, i)
+    finally:
+        database_pool.release_writer(conn)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sales", type=int, default=100_000)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    with temporary_database() as path:
+        build_database(path, sales=args.sales)
+        print(f"\nDatabase with {args.sales} sales, {args.iterations} iterations per case")
+        print(f"{'operation':<10}{'per-call ops/s':>18}{'pooled ops/s':>16}{'speedup':>10}")
+        for name, before, after, iterations in (
+            ("read", read_per_call, read_pooled, args.iterations),
+            ("write", write_per_call, write_pooled, max(args.iterations // 10, 1)),
+        ):
+            before_rate = ops_per_second(before, iterations)
+            after_rate = ops_per_second(after, iterations)
+            print(f"{name:<10}{before_rate:>18.0f}{after_rate:>16.0f}{after_rate / before_rate:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Time the cost of goods aggregation behind the profit and loss report.
+
+Runs COST_BY_DAY_QUERY over one and three years of a large ledger, first with the plain
+sale_batches(sale_id) index and then with the covering index from migration 4.
+
+Usage: python -m benchmarks.bench_cost_of_goods [--sales 1000000]
+"""
+import argparse
+import time
+
+import database_pool
+from benchmarks.common import temporary_database, build_database, START_DATE
+from profit_loss_data import COST_BY_DAY_QUERY
+
+INDEXES = {
+    "sale_id only": "CREATE INDEX idx_bench_sale_batches ON sale_batches(sale_id)",
+    "covering": "CREATE INDEX idx_bench_sale_batches ON sale_batches(sale_id, quantity_used, buying_price)",
+}
+
+def use_index(ddl):
+    conn = database_pool.acquire_writer()
+    try:
+        conn.execute("DROP INDEX IF EXISTS idx_sale_batches_sale_cost")
+        conn.execute("DROP INDEX IF EXISTS idx_bench_sale_batches")
+        conn.execute(ddl)
+        conn.commit()
+    finally:
+        database_pool.release_writer(conn)
+    database_pool.close_all_connections()  # Readers re-plan against the new index
+
+def best_of(runs, start, end):
+    timings = []
+    for _ in range(runs):
+        begin = time.perf_counter()
+        database_pool.get_reader().execute(COST_BY_DAY_QUERY, (start, end)).fetchall()
+        timings.append(time.perf_counter() - begin)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sales", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    year = START_DATE.year
+    ranges = [("one year", f"{year}-01-01", f"{year + 1}-01-01"),
+              ("three years", f"{year}-01-01", f"{year + 3}-01-01")]
+    with temporary_database() as path:
+        build_database(path, sales=args.sales)
+        print(f"{args.sales} sales, cost of goods by day, best of {args.runs} (s)")
+        print(f"{'sale_batches index':<20}" + "".join(f"{name:>14}" for name, _, _ in ranges))
+        for name, ddl in INDEXES.items():
+            use_index(ddl)
+            print(f"{name:<20}" + "".join(f"{best_of(args.runs, start, end):>14.3f}" for _, start, end in ranges))
+        plan = database_pool.get_reader().execute(f"EXPLAIN QUERY PLAN {COST_BY_DAY_QUERY}", ranges[0][1:]).fetchall()
+        print("Plan: " + "; ".join(row[-1] for row in plan))
+
+if __name__ == "__main__":
+    main()
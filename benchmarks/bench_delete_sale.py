@@ -0,0 +1,85 @@
+"""Time finding and deleting a selected sale on a large sales table.
+
+Compares the old lookup, which matched the Treeview's display strings over a four-table join,
+with resolving the sale by its primary key (now the row's Treeview iid), then times the whole
+delete through inventory_service.delete_sale. Also counts the sales the old lookup could not
+tell apart, because another sale shows the same product, quantity, price, date and unit.
+
+Usage: python -m benchmarks.bench_delete_sale [--sales 500000]
+"""
+import argparse
+import random
+import statistics
+import time
+
+import database_pool
+import inventory_service
+from benchmarks.common import temporary_database, build_database
+
+DISPLAY_LOOKUP_QUERY = """
+    SELECT s.sale_id, s.product_id, s.quantity_sold
+    FROM sales s
+    JOIN products p ON s.product_id = p.product_id
+    JOIN brands b ON p.brand_id = b.brand_id
+    JOIN descriptions d ON p.description_id = d.description_id
+    JOIN units_of_measurement u ON s.unit_id = u.unit_id
+    WHERE p.product_name || ' - ' || b.brand_name || ' - ' || d.description_text = ?
+    AND s.quantity_sold = ? AND s.selling_price = ? AND s.sale_date = ? AND u.unit_name = ?
+"""
+KEY_LOOKUP_QUERY = "SELECT product_id, quantity_sold FROM sales WHERE sale_id = ?"
+DISPLAY_VALUES_QUERY = """
+    SELECT p.product_name || ' - ' || b.brand_name || ' - ' || d.description_text,
+           s.quantity_sold, s.selling_price, s.sale_date, u.unit_name
+    FROM sales s
+    JOIN products p ON s.product_id = p.product_id
+    JOIN brands b ON p.brand_id = b.brand_id
+    JOIN descriptions d ON p.description_id = d.description_id
+    JOIN units_of_measurement u ON s.unit_id = u.unit_id
+    WHERE s.sale_id = ?
+"""
+AMBIGUOUS_QUERY = """
+    SELECT COALESCE(SUM(copies), 0) FROM (
+        SELECT COUNT(*) AS copies FROM sales
+        GROUP BY product_id, quantity_sold, selling_price, sale_date, unit_id
+        HAVING COUNT(*) > 1
+    )
+"""
+
+def describe(name, timings):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1] if len(timings) >= 20 else timings[-1]
+    print(f"{name:<30}{statistics.median(timings) * 1000:>10.3f}{p95 * 1000:>10.3f}{timings[-1] * 1000:>10.3f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sales", type=int, default=500_000)
+    parser.add_argument("--deletes", type=int, default=50)
+    args = parser.parse_args()
+
+    with temporary_database() as path:
+        build_database(path, products=500, sales=args.sales)
+        cursor = database_pool.get_reader().cursor()
+        sale_ids = random.Random(7).sample(range(1, args.sales + 1), args.deletes)
+        displays = {sale_id: cursor.execute(DISPLAY_VALUES_QUERY, (sale_id,)).fetchone() for sale_id in sale_ids}
+        ambiguous = cursor.execute(AMBIGUOUS_QUERY).fetchone()[0]
+        print(f"{args.sales} sales; {ambiguous} share their displayed values with another sale")
+        print(f"{args.deletes} deletes, latency in ms")
+        print(f"{'step':<30}{'median':>10}{'p95':>10}{'max':>10}")
+
+        display_timings, key_timings, delete_timings = [], [], []
+        for sale_id in sale_ids:
+            start = time.perf_counter()
+            cursor.execute(DISPLAY_LOOKUP_QUERY, displays[sale_id]).fetchone()
+            display_timings.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            cursor.execute(KEY_LOOKUP_QUERY, (sale_id,)).fetchone()
+            key_timings.append(time.perf_counter() - start)
+            inventory_service.delete_sale(sale_id)
+            delete_timings.append(time.perf_counter() - start)
+        describe("lookup by display strings", display_timings)
+        describe("lookup by sale_id", key_timings)
+        describe("lookup by sale_id + delete", delete_timings)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Time FIFO allocation of one sale on a product with thousands of batches.
+
+Gives one product --batches batches of 10 units each, sells out the oldest share of them, and
+times allocate_batches() plus record_allocation() for sales that span 1 to 1000 batches. Each
+allocation is rolled back, so every run starts from the same stock.
+
+Usage: python -m benchmarks.bench_fifo_allocation [--batches 5000]
+"""
+import argparse
+import time
+from datetime import timedelta
+
+import database_pool
+from batch_allocation import allocate_batches, record_allocation
+from benchmarks.common import temporary_database, build_database, START_DATE
+
+BATCH_QUANTITY = 10
+SOLD_OUT_SHARES = (0.0, 0.5, 0.9)
+SPANS = (1, 10, 100, 1000)  # Batches one sale is split over
+
+def add_batches(count):
+    """Give product 1 count more batches, one per day, and return their ids oldest first."""
+    conn = database_pool.acquire_writer()
+    try:
+        cursor = conn.cursor()
+        unit_id = cursor.execute("SELECT unit_id FROM products WHERE product_id = 1").fetchone()[0]
+        cursor.execute("DELETE FROM inventory_batches WHERE product_id = 1")
+        cursor.executemany("""
+            INSERT INTO inventory_batches (product_id, buying_price, quantity, purchase_date, unit_id)
+            VALUES (1, ?, ?, ?, ?)
+        """, [(100 + i % 7, BATCH_QUANTITY, (START_DATE + timedelta(days=i)).isoformat(), unit_id) for i in range(count)])
+        conn.commit()
+        ids = [row[0] for row in cursor.execute(
+            "SELECT batch_id FROM inventory_batches WHERE product_id = 1 ORDER BY purchase_date")]
+        return unit_id, ids
+    finally:
+        database_pool.release_writer(conn)
+
+def sell_out(unit_id, batch_ids):
+    """Record one old sale that used up every batch in batch_ids."""
+    conn = database_pool.acquire_writer()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM sales WHERE product_id = 1")
+        if batch_ids:
+            cursor.execute("""
+                INSERT INTO sales (product_id, selling_price, quantity_sold, sale_date, unit_id)
+                VALUES (1, 150, ?, ?, ?)
+            """, (BATCH_QUANTITY * len(batch_ids), START_DATE.isoformat(), unit_id))
+            record_allocation(cursor, cursor.lastrowid, unit_id, [(batch_id, BATCH_QUANTITY, 100) for batch_id in batch_ids])
+        conn.commit()
+    finally:
+        database_pool.release_writer(conn)
+
+def time_allocation(unit_id, quantity, runs, sale_date):
+    """Return the best time to allocate and record quantity units sold on sale_date, rolling back each run."""
+    conn = database_pool.acquire_writer()
+    timings = []
+    try:
+        cursor = conn.cursor()
+        for _ in range(runs):
+            database_pool.begin_write(conn)
+            cursor.execute("""
+                INSERT INTO sales (product_id, selling_price, quantity_sold, sale_date, unit_id)
+                VALUES (1, 150, ?, ?, ?)
+            """, (quantity, sale_date, unit_id))
+            sale_id = cursor.lastrowid
+            begin = time.perf_counter()
+            allocation = allocate_batches(cursor, 1, unit_id, quantity, sale_date)
+            record_allocation(cursor, sale_id, unit_id, allocation)
+            timings.append(time.perf_counter() - begin)
+            conn.rollback()
+    finally:
+        database_pool.release_writer(conn)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batches", type=int, default=5000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with temporary_database() as path:
+        build_database(path, products=20, sales=10_000)
+        unit_id, batch_ids = add_batches(args.batches)
+        sale_date = (START_DATE + timedelta(days=args.batches)).isoformat()  # After every batch was bought
+        print(f"{args.batches} batches of {BATCH_QUANTITY} units, allocate + record, best of {args.runs} (ms)")
+        print(f"{'sold out':<10}" + "".join(f"{f'{span} batches':>14}" for span in SPANS))
+        for share in SOLD_OUT_SHARES:
+            sold_out = int(len(batch_ids) * share)
+            sell_out(unit_id, batch_ids[:sold_out])
+            open_batches = len(batch_ids) - sold_out
+            cells = [f"{time_allocation(unit_id, span * BATCH_QUANTITY, args.runs, sale_date) * 1000:>14.2f}"
+                     if span <= open_batches else f"{'-':>14}" for span in SPANS]
+            print(f"{share:<10.0%}" + "".join(cells))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Time the historical ledger import.
+
+Writes a CSV ledger of --rows purchases and sales over --products products in date order,
+imports it with ledger_import.import_ledger() into a database that already holds the usual
+synthetic history, and reports rows per minute including the final rebuild of the derived
+tables. --verify then checks those tables against the raw rows.
+
+Usage: python -m benchmarks.bench_ledger_import [--rows 500000] [--verify]
+"""
+import argparse
+import csv
+import os
+import random
+import time
+from datetime import timedelta
+
+import batch_allocation
+import daily_summary
+import database_pool
+import stock_ledger
+import stock_valuation
+from benchmarks.common import temporary_database, build_database, START_DATE
+from ledger_import import PRODUCT_KEYS_QUERY, import_ledger, read_ledger
+
+PURCHASE_SHARE = 0.05  # One ledger row in twenty restocks a product
+
+def write_ledger(path, rows, products, days=3 * 365, seed=7):
+    rng = random.Random(seed)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["type", "date", "product", "brand", "description", "unit", "quantity", "price"])
+        for i in range(rows):
+            product = products[rng.randrange(len(products))]
+            day = (START_DATE + timedelta(days=3 * 365 + i * days // rows)).isoformat()
+            if rng.random() < PURCHASE_SHARE:
+                writer.writerow(["purchase", day, *product, rng.randint(100, 1000), round(rng.uniform(1000, 50000), 2)])
+            else:
+                writer.writerow(["sale", day, *product, rng.randint(1, 5), round(rng.uniform(1500, 60000), 2)])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--verify", action="store_true")
+    args = parser.parse_args()
+
+    with temporary_database() as path:
+        build_database(path, products=args.products, sales=100_000)
+        products = [row[1:5] for row in database_pool.get_reader().execute(PRODUCT_KEYS_QUERY)]
+        ledger_path = os.path.join(os.path.dirname(path), "ledger.csv")
+        write_ledger(ledger_path, args.rows, products)
+
+        begin = time.perf_counter()
+        importer = import_ledger(read_ledger(ledger_path))
+        elapsed = time.perf_counter() - begin
+        print(f"{args.rows} ledger rows: {importer.sales} sales, {importer.purchases} purchases, "
+              f"{len(importer.errors)} rejected")
+        print(f"{elapsed:.1f}s including the rebuild, {args.rows / elapsed * 60:,.0f} rows/min")
+        if args.verify:
+            cursor = database_pool.get_reader().cursor()
+            problems = (len(batch_allocation.find_remaining_mismatches(cursor))
+                        + len(daily_summary.find_summary_mismatches(cursor))
+                        + len(stock_valuation.find_valuation_mismatches(cursor))
+                        + len(stock_ledger.find_ledger_mismatches(cursor)))
+            print(f"Derived tables: {problems} mismatches")
+
+if __name__ == "__main__":
+    main()
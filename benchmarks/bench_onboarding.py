@@ -0,0 +1,88 @@
+"""Time onboarding a product in every brand x description x unit combination.
+
+Compares the old nested loop, which looked up each dimension and checked for an existing
+product once per variant before inserting it, with inventory_service.onboard_products, which
+resolves each dimension once and inserts the whole variant set with one INSERT OR IGNORE
+executemany. Each is timed on new products and again on products that already exist, where
+every variant is skipped.
+
+Usage: python -m benchmarks.bench_onboarding [--brands 5 --descriptions 10 --units 6]
+"""
+import argparse
+import statistics
+import time
+
+import database_pool
+import inventory_service
+from dimension_cache import get_or_create_id
+from benchmarks.common import temporary_database, build_database
+
+def legacy_onboard(product_name, brands, category_name, descriptions, units):
+    """The onboarding loop as it was before onboard_products; returns (inserted, skipped)."""
+    conn = database_pool.acquire_writer()
+    cursor = conn.cursor()
+    try:
+        database_pool.begin_write(conn)
+        category_id = get_or_create_id(cursor, "categories", category_name)
+        inserted_count = skipped_count = 0
+        for brand in brands:
+            brand_id = get_or_create_id(cursor, "brands", brand)
+            for desc in descriptions:
+                description_id = get_or_create_id(cursor, "descriptions", desc)
+                for unit in units:
+                    unit_id = get_or_create_id(cursor, "units_of_measurement", unit)
+                    cursor.execute("""
+                        SELECT product_id FROM products
+                        WHERE product_name = ? AND brand_id = ? AND category_id = ? AND description_id = ? AND unit_id = ?
+                    """, (product_name, brand_id, category_id, description_id, unit_id))
+                    if cursor.fetchone():
+                        skipped_count += 1
+                        continue
+                    cursor.execute("""
+                        INSERT INTO products (product_name, brand_id, category_id, description_id, unit_id)
+                        VALUES (?, ?, ?, ?, ?)
+                    """, (product_name, brand_id, category_id, description_id, unit_id))
+                    inserted_count += 1
+        conn.commit()
+        return inserted_count, skipped_count
+    finally:
+        database_pool.release_writer(conn)
+
+def set_based_onboard(product_name, brands, category_name, descriptions, units):
+    new_products, skipped_count = inventory_service.onboard_products(product_name, brands, category_name,
+                                                                     descriptions, units)
+    return len(new_products), skipped_count
+
+def time_onboarding(onboard, names, brands, descriptions, units):
+    timings = []
+    for name in names:
+        start = time.perf_counter()
+        onboard(name, brands, "Bench Category", descriptions, units)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def describe(name, timings):
+    print(f"{name:<30}{statistics.median(timings) * 1000:>10.2f}{max(timings) * 1000:>10.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--brands", type=int, default=5)
+    parser.add_argument("--descriptions", type=int, default=10)
+    parser.add_argument("--units", type=int, default=6)
+    parser.add_argument("--products", type=int, default=20, help="Products onboarded by each approach")
+    args = parser.parse_args()
+
+    brands = [f"Bench Brand {i}" for i in range(args.brands)]
+    descriptions = [f"Bench Description {i}" for i in range(args.descriptions)]
+    units = [f"bench-unit-{i}" for i in range(args.units)]
+    with temporary_database() as path:
+        build_database(path, products=2000, sales=10_000)
+        print(f"{args.products} products x {len(brands) * len(descriptions) * len(units)} variants, latency in ms")
+        print(f"{'approach':<30}{'median':>10}{'max':>10}")
+        for label, onboard in (("nested loop", legacy_onboard), ("set-based", set_based_onboard)):
+            names = [f"{label} product {i}" for i in range(args.products)]
+            describe(f"{label}, new", time_onboarding(onboard, names, brands, descriptions, units))
+            describe(f"{label}, all existing", time_onboarding(onboard, names, brands, descriptions, units))
+
+if __name__ == "__main__":
+    main()
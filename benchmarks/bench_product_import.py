@@ -0,0 +1,98 @@
+"""Time the streaming product import against the old per-row lookups.
+
+Writes a CSV of --rows products (one brand, description and unit each), then imports it with
+product_import.import_products(). For comparison, the first --legacy-rows rows also go through
+the SELECT-then-INSERT per lookup and per product that inject_data() used to run. Peak memory
+is the process's maximum resident set size.
+
+Usage: python -m benchmarks.bench_product_import [--rows 1000000]
+"""
+import argparse
+import csv
+import os
+import random
+import resource
+import time
+
+import database_pool
+from benchmarks.common import temporary_database, build_database
+from product_import import import_products, read_records
+
+def write_csv(path, rows, seed=42):
+    rng = random.Random(seed)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["product", "brand", "category", "description", "unit"])
+        for i in range(rows):
+            writer.writerow([f"Imported product {i}", f"Brand {rng.randrange(500)}", f"Category {rng.randrange(10)}",
+                             f"Description {rng.randrange(5000)}", f"Unit {rng.randrange(20)}"])
+
+def legacy_import(records):
+    """Per-row lookups as inject_data() ran them: one SELECT (and maybe INSERT) per value, all in one transaction."""
+    conn = database_pool.acquire_writer()
+    try:
+        cursor = conn.cursor()
+        database_pool.begin_write(conn)
+        for record in records:
+            row_ids = []
+            for table, id_column, name_column, value in (
+                    ("brands", "brand_id", "brand_name", record["brand"]),
+                    ("categories", "category_id", "category_name", record["category"]),
+                    ("descriptions", "description_id", "description_text", record["description"]),
+                    ("units_of_measurement", "unit_id", "unit_name", record["unit"])):
+                cursor.execute(f"SELECT {id_column} FROM {table} WHERE {name_column} = ?", (value,))
+                found = cursor.fetchone()
+                if not found:
+                    cursor.execute(f"INSERT INTO {table} ({name_column}) VALUES (?)", (value,))
+                    found = (cursor.lastrowid,)
+                row_ids.append(found[0])
+            brand_id, category_id, description_id, unit_id = row_ids
+            cursor.execute("""
+                SELECT product_id FROM products
+                WHERE product_name = ? AND brand_id = ? AND category_id = ? AND description_id = ? AND unit_id = ?
+            """, (record["product"], brand_id, category_id, description_id, unit_id))
+            if not cursor.fetchone():
+                cursor.execute("""
+                    INSERT INTO products (product_name, brand_id, category_id, description_id, unit_id)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (record["product"], brand_id, category_id, description_id, unit_id))
+        conn.commit()
+    finally:
+        database_pool.release_writer(conn)
+
+def first_records(path, count):
+    records = read_records(path)
+    return [dict(next(records), product=f"Legacy product {i}") for i in range(count)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--legacy-rows", type=int, default=20_000)
+    args = parser.parse_args()
+
+    with temporary_database() as path:
+        build_database(path, products=200, sales=1000)
+        csv_path = os.path.join(os.path.dirname(path), "products.csv")
+        write_csv(csv_path, args.rows)
+        print(f"{'import':<26}{'rows':>10}{'seconds':>10}{'rows/s':>12}")
+
+        legacy_records = first_records(csv_path, min(args.legacy_rows, args.rows))
+        begin = time.perf_counter()
+        legacy_import(legacy_records)
+        elapsed = time.perf_counter() - begin
+        print(f"{'per-row lookups':<26}{len(legacy_records):>10}{elapsed:>10.2f}{len(legacy_records) / elapsed:>12.0f}")
+        del legacy_records
+
+        begin = time.perf_counter()
+        inserted, skipped, invalid = import_products(read_records(csv_path))
+        elapsed = time.perf_counter() - begin
+        print(f"{'streaming, chunked':<26}{args.rows:>10}{elapsed:>10.2f}{args.rows / elapsed:>12.0f}")
+        begin = time.perf_counter()
+        import_products(read_records(csv_path))
+        elapsed = time.perf_counter() - begin
+        print(f"{'same file again (skips)':<26}{args.rows:>10}{elapsed:>10.2f}{args.rows / elapsed:>12.0f}")
+        print(f"{inserted} inserted, {skipped} skipped, {invalid} invalid; "
+              f"peak memory {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Measure per-keystroke search latency on a large product catalog.
+
+Compares the old Combobox filter (lower-case and substring-test every display string on
+every key press) with ProductSearchIndex.
+
+Usage: python -m benchmarks.bench_product_search [--products 100000]
+"""
+import argparse
+import random
+import statistics
+import time
+
+from data_cache import ProductCatalog
+from product_search import ProductSearchIndex, SEARCH_LIMIT
+
+WORDS = ["cement", "rebar", "paint", "pipe", "cable", "roofing", "sheet", "shovel", "trowel", "screw",
+         "padlock", "pump", "grinder", "drill", "nail", "gumboots", "hosepipe", "hammer", "brush", "socket"]
+BRANDS = ["Hima", "Tororo", "Simba", "Steelco", "Plascon", "Crown", "Dulux", "Armco", "Kable", "Roko"]
+
+def make_catalog(count, rng):
+    rows = []
+    for product_id in range(1, count + 1):
+        name = f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {product_id}"
+        description = f"{rng.randint(1, 60)}mm {rng.choice(WORDS)} grade {rng.randint(1, 9)}"
+        rows.append((product_id, f"{name} - {rng.choice(BRANDS)} - {description}"))
+    catalog = ProductCatalog()
+    catalog.load(rows)
+    return catalog
+
+def old_filter(catalog, text):
+    search_text = text.strip().lower()
+    return [display for display in catalog.displays() if search_text in display.lower()]
+
+def keystrokes(phrases):
+    """Yield each prefix of each phrase as the user types it."""
+    for phrase in phrases:
+        for end in range(1, len(phrase) + 1):
+            yield phrase[:end]
+
+def measure(search, queries):
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def describe(name, timings):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{name:<14}{statistics.median(timings):>10.2f}{p95:>10.2f}{timings[-1]:>10.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--phrases", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    catalog = make_catalog(args.products, rng)
+    start = time.perf_counter()
+    index = ProductSearchIndex(catalog)
+    print(f"Indexed {args.products} products in {time.perf_counter() - start:.2f}s (limit {SEARCH_LIMIT})")
+
+    displays = catalog.displays()
+    phrases = []
+    for _ in range(args.phrases):
+        parts = rng.choice(displays).lower().split(" - ")
+        phrases.append(f"{parts[0].split()[0]} {parts[1]}")
+    queries = list(keystrokes(phrases))
+
+    print(f"{len(queries)} keystrokes, latency in ms")
+    print(f"{'search':<14}{'median':>10}{'p95':>10}{'max':>10}")
+    describe("linear scan", measure(lambda q: old_filter(catalog, q), queries))
+    describe("search index", measure(index.search, queries))
+
+if __name__ == "__main__":
+    main()
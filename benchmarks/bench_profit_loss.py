@@ -0,0 +1,79 @@
+"""Time the profit and loss report on a large sales ledger.
+
+Compares the old per-period loop (three strftime-filtered queries per month, quarter or year)
+with get_profit_data, which sums the daily_summary rollup over one date range.
+
+Usage: python -m benchmarks.bench_profit_loss [--sales 1000000]
+"""
+import argparse
+import time
+
+import database_pool
+from benchmarks.common import temporary_database, build_database, START_DATE
+from profit_loss_data import get_profit_data, MONTHS, QUARTERS
+
+def per_period_loop(period_type, year, to_year):
+    """The old report shape: revenue, cost and expense queries for every period, filtered with strftime."""
+    cursor = database_pool.get_reader().cursor()
+    if period_type == "Monthly":
+        periods = [(name, [f"{i + 1:02d}"]) for i, name in enumerate(MONTHS)]
+    elif period_type == "Quarterly":
+        periods = [(name, [f"{i * 3 + month:02d}" for month in (1, 2, 3)]) for i, name in enumerate(QUARTERS)]
+    else:
+        periods = [("Year", [f"{month:02d}" for month in range(1, 13)])]
+    result = []
+    for report_year in range(int(year), int(to_year) + 1):
+        for name, months in periods:
+            placeholders = ", ".join("?" * len(months))
+            params = [str(report_year)] + months
+            revenue = cursor.execute(f"""
+                SELECT SUM(selling_price * quantity_sold) FROM sales
+                WHERE strftime('%Y', sale_date) = ? AND strftime('%m', sale_date) IN ({placeholders})
+            """, params).fetchone()[0] or 0.0
+            cost = cursor.execute(f"""
+                SELECT SUM(sb.quantity_used * sb.buying_price)
+                FROM sales s JOIN sale_batches sb ON sb.sale_id = s.sale_id
+                WHERE strftime('%Y', s.sale_date) = ? AND strftime('%m', s.sale_date) IN ({placeholders})
+            """, params).fetchone()[0] or 0.0
+            expenses = cursor.execute(f"""
+                SELECT SUM(amount) FROM expenses
+                WHERE strftime('%Y', expense_date) = ? AND strftime('%m', expense_date) IN ({placeholders})
+            """, params).fetchone()[0] or 0.0
+            result.append((name, revenue, cost, expenses))
+    return result
+
+def best_of(runs, operation):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        operation()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sales", type=int, default=1_000_000)
+    parser.add_argument("--expenses", type=int, default=20_000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    first_year = str(START_DATE.year)
+    last_year = str(START_DATE.year + 2)
+    reports = [
+        ("Monthly, one year", "Monthly", first_year, first_year),
+        ("Quarterly, one year", "Quarterly", first_year, first_year),
+        ("Monthly, three years", "Monthly", first_year, last_year),
+        ("Annual, three years", "Annual", first_year, last_year),
+    ]
+    with temporary_database() as path:
+        start = time.perf_counter()
+        build_database(path, sales=args.sales, expenses=args.expenses)
+        print(f"Built {args.sales} sales and {args.expenses} expenses in {time.perf_counter() - start:.1f}s")
+        print(f"{'report':<24}{'per-period (s)':>16}{'rollup (s)':>14}{'speedup':>10}")
+        for name, period_type, year, to_year in reports:
+            old = best_of(args.runs, lambda: per_period_loop(period_type, year, to_year))
+            new = best_of(args.runs, lambda: get_profit_data(period_type, year, None, True, to_year))
+            print(f"{name:<24}{old:>16.3f}{new:>14.3f}{old / new:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
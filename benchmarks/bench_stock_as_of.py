@@ -0,0 +1,61 @@
+"""Time "stock on date X" queries against the stock_movements ledger.
+
+Compares replaying every movement up to the date with stock_ledger.stock_as_of, which starts
+from the nearest month-end checkpoint, for all products and for one product.
+
+Usage: python -m benchmarks.bench_stock_as_of [--sales 1000000]
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import timedelta
+
+import database_pool
+import stock_ledger
+from benchmarks.common import temporary_database, build_database, START_DATE
+
+REPLAY_QUERY = """
+    SELECT product_id, SUM(quantity) FROM stock_movements
+    WHERE movement_date <= ? AND {product_filter}
+    GROUP BY product_id
+    HAVING SUM(quantity) <> 0
+"""
+
+def time_queries(query, dates):
+    timings = []
+    for as_of_date in dates:
+        start = time.perf_counter()
+        result = query(as_of_date)
+        timings.append(time.perf_counter() - start)
+    return timings, result
+
+def describe(name, timings):
+    print(f"{name:<40}{statistics.median(timings) * 1000:>10.2f}{max(timings) * 1000:>10.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sales", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+
+    with temporary_database() as path:
+        build_database(path, products=500, sales=args.sales)
+        cursor = database_pool.get_reader().cursor()
+        checkpoints = cursor.execute("SELECT COUNT(*) FROM stock_checkpoints").fetchone()[0]
+        rng = random.Random(7)
+        dates = [(START_DATE + timedelta(days=rng.randrange(3 * 365))).isoformat() for _ in range(args.queries)]
+        print(f"{args.sales} sales, {checkpoints} checkpoints; {args.queries} dates, latency in ms")
+        print(f"{'query':<40}{'median':>10}{'max':>10}")
+        for label, product_id in (("all products", None), ("one product", 1)):
+            product_filter = "product_id IS NOT NULL" if product_id is None else "product_id = ?"
+            replay_parameters = () if product_id is None else (product_id,)
+            replay, replayed = time_queries(lambda day: dict(cursor.execute(
+                REPLAY_QUERY.format(product_filter=product_filter), (day,) + replay_parameters).fetchall()), dates)
+            checkpointed, result = time_queries(lambda day: stock_ledger.stock_as_of(cursor, day, product_id), dates)
+            assert result == replayed, "checkpointed stock differs from the full replay"
+            describe(f"{label}, full replay", replay)
+            describe(f"{label}, from checkpoint", checkpointed)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Helpers shared by the benchmark scripts.
+
+Run benchmarks from the repository root, e.g. ``python -m benchmarks.bench_connection_pool``.
+"""
+import io
+import os
+import random
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager, redirect_stdout
+from datetime import date, timedelta
+
+import database_pool
+import database_setup
+import stock_ledger
+
+START_DATE = date(2023, 1, 1)
+
+@contextmanager
+def temporary_database(name="benchmark.db"):
+    """Yield a database path inside a throwaway directory and point the pool at it."""
+    directory = tempfile.mkdtemp(prefix="inventory-bench-")
+    path = os.path.join(directory, name)
+    database_pool.configure(path)
+    try:
+        yield path
+    finally:
+        database_pool.close_all_connections()
+        shutil.rmtree(directory, ignore_errors=True)
+
+def build_database(path, products=200, batches_per_product=5, sales=100_000, days=3 * 365, seed=42, expenses=0):
+    """Create the real schema at path and fill it with synthetic products, batches, sales and expenses."""
+    rng = random.Random(seed)
+    database_pool.configure(path)
+    with redirect_stdout(io.StringIO()):
+        database_setup.create_tables()
+    conn = database_pool.acquire_writer()
+    try:
+        cursor = conn.cursor()
+        conn.execute("BEGIN TRANSACTION")
+        cursor.executemany("INSERT INTO brands (brand_name) VALUES (?)", [(f"Brand {i}",) for i in range(20)])
+        cursor.executemany("INSERT INTO categories (category_name) VALUES (?)", [(f"Category {i}",) for i in range(5)])
+        cursor.executemany("INSERT INTO descriptions (description_text) VALUES (?)", [(f"Description {i}",) for i in range(50)])
+        cursor.executemany("INSERT INTO units_of_measurement (unit_name) VALUES (?)", [(f"Unit {i}",) for i in range(5)])
+        product_rows = [(f"Product {i}", rng.randint(1, 20), rng.randint(1, 5), rng.randint(1, 50), rng.randint(1, 5))
+                        for i in range(products)]
+        cursor.executemany("""
+            INSERT INTO products (product_name, brand_id, category_id, description_id, unit_id)
+            VALUES (?, ?, ?, ?, ?)
+        """, product_rows)
+
+        # Batches are large enough that synthetic sales never drive stock negative
+        batch_rows = []
+        for product_id, row in enumerate(product_rows, start=1):
+            for _ in range(batches_per_product):
+                purchase_date = START_DATE + timedelta(days=rng.randrange(days))
+                batch_rows.append((product_id, round(rng.uniform(1000, 50000), 2), 100_000, purchase_date.isoformat(), row[4]))
+        cursor.executemany("""
+            INSERT INTO inventory_batches (product_id, buying_price, quantity, purchase_date, unit_id)
+            VALUES (?, ?, ?, ?, ?)
+        """, batch_rows)
+
+        sale_rows = []
+        sale_batch_rows = []
+        for sale_id in range(1, sales + 1):
+            product_id = rng.randint(1, products)
+            batch_index = (product_id - 1) * batches_per_product + rng.randrange(batches_per_product)
+            batch = batch_rows[batch_index]
+            quantity = rng.randint(1, 5)
+            sale_date = START_DATE + timedelta(days=(sale_id - 1) * days // sales)  # Recorded in date order, as at a till
+            sale_rows.append((sale_id, product_id, round(batch[1] * 1.25, 2), quantity, sale_date.isoformat(), batch[4]))
+            sale_batch_rows.append((sale_id, batch_index + 1, quantity, batch[1], batch[4]))
+        cursor.executemany("""
+            INSERT INTO sales (sale_id, product_id, selling_price, quantity_sold, sale_date, unit_id)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, sale_rows)
+        cursor.executemany("""
+            INSERT INTO sale_batches (sale_id, batch_id, quantity_used, buying_price, unit_id)
+            VALUES (?, ?, ?, ?, ?)
+        """, sale_batch_rows)
+        # Ledger rows are loaded without their triggers; inventory and the checkpoints are derived once
+        stock_ledger.drop_ledger_triggers(cursor)
+        cursor.executemany("""
+            INSERT INTO stock_movements (product_id, quantity, movement_date, reason, source_id)
+            VALUES (?, ?, ?, ?, ?)
+        """, [(row[0], row[2], row[3], stock_ledger.PURCHASE, batch_id) for batch_id, row in enumerate(batch_rows, start=1)]
+             + [(row[1], -row[3], row[4], stock_ledger.SALE, row[0]) for row in sale_rows])
+        stock_ledger.rebuild_inventory(cursor)
+        stock_ledger.rebuild_checkpoints(cursor)
+        stock_ledger.create_ledger_triggers(cursor)
+        cursor.executemany("INSERT INTO expense_categories (category_name) VALUES (?)", [(f"Expense {i}",) for i in range(5)])
+        cursor.executemany("""
+            INSERT INTO expenses (expense_category_id, description, amount, expense_date)
+            VALUES (?, ?, ?, ?)
+        """, [(rng.randint(1, 5), "Synthetic expense", round(rng.uniform(5000, 500000), 2),
+               (START_DATE + timedelta(days=rng.randrange(days))).isoformat()) for _ in range(expenses)])
+        conn.commit()
+    finally:
+        database_pool.release_writer(conn)
+
+def ops_per_second(operation, iterations):
+    """Run operation iterations times and return the achieved rate."""
+    start = time.perf_counter()
+    for i in range(iterations):
+        operation(i)
+    elapsed = time.perf_counter() - start
+    return iterations / elapsed if elapsed else float("inf")
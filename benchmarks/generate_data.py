@@ -0,0 +1,45 @@
+"""Build a synthetic database of a chosen size on the real schema.
+
+Products, batches, sales and expenses are spread over --years years from START_DATE and are
+the same for the same --seed, so databases built on different machines or commits match.
+The file can be opened by the app (point database_pool at it) or reused by run_benchmarks.
+
+Usage: python -m benchmarks.generate_data bench.db [--products 2000] [--sales 1000000] [--years 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+from benchmarks.common import build_database
+
+def add_size_arguments(parser):
+    """Add the database size options shared by generate_data and run_benchmarks."""
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--batches-per-product", type=int, default=5)
+    parser.add_argument("--sales", type=int, default=200_000)
+    parser.add_argument("--expenses", type=int, default=5000)
+    parser.add_argument("--years", type=int, default=3, help="Years of history the dates are spread over")
+    parser.add_argument("--seed", type=int, default=42)
+
+def build_from_arguments(path, args):
+    build_database(path, products=args.products, batches_per_product=args.batches_per_product, sales=args.sales,
+                   days=args.years * 365, seed=args.seed, expenses=args.expenses)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="Database file to create; must not exist yet")
+    add_size_arguments(parser)
+    args = parser.parse_args()
+    if os.path.exists(args.path):
+        print(f"{args.path} already exists; choose a new file name.")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    build_from_arguments(args.path, args)
+    print(f"Built {args.path}: {args.products} products, {args.products * args.batches_per_product} batches, "
+          f"{args.sales} sales and {args.expenses} expenses over {args.years} years "
+          f"in {time.perf_counter() - start:.1f}s ({os.path.getsize(args.path) / 1e6:.1f} MB)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Time every hot path on one synthetic database and write the results as JSON.
+
+Covers the product cache load, product search, save_sale, save_restock, the first and a middle
+page of sales and restocking history, the profit and loss report for each period type and
+stock valuation. Each timing is taken --runs times; the JSON records min, median and max in
+milliseconds alongside the commit, the database size and the SQLite version, so results from
+different commits can be compared by a script.
+
+The database is built with the same options as generate_data, or copied from --database so a
+large file only has to be generated once; the copy is written to, the original never is.
+
+Usage: python -m benchmarks.run_benchmarks [--sales 1000000] [--output results.json]
+"""
+import argparse
+import json
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+import database_pool
+import data_cache
+import inventory_service
+import query_stats
+from benchmarks.common import temporary_database, START_DATE
+from benchmarks.generate_data import add_size_arguments, build_from_arguments
+from product_search import ProductSearchIndex
+from stock_valuation import get_stock_value, get_stock_value_as_of
+from stock_ledger import get_stock_as_of
+
+PERIOD_TYPES = ("Monthly", "Quarterly", "Annual")
+
+def timed(operation, runs):
+    """Run operation(i) runs times and return its timings in milliseconds."""
+    timings = []
+    for i in range(runs):
+        start = time.perf_counter()
+        operation(i)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def summarize(timings):
+    return {"runs": len(timings), "min_ms": round(min(timings), 4),
+            "median_ms": round(statistics.median(timings), 4), "max_ms": round(max(timings), 4)}
+
+def current_commit():
+    """Return the checked-out commit, or None outside a git checkout."""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def copy_database(source, target):
+    """Copy source to target with SQLite's backup API, so a WAL file next to source is included."""
+    source_conn = sqlite3.connect(source)
+    target_conn = sqlite3.connect(target)
+    try:
+        source_conn.backup(target_conn)
+    finally:
+        source_conn.close()
+        target_conn.close()
+
+def table_sizes():
+    cursor = database_pool.get_reader().cursor()
+    return {table: cursor.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("products", "inventory_batches", "sales", "sale_batches", "expenses")}
+
+def search_keystrokes(catalog, count, rng):
+    """Return the prefixes typed while searching for count random products by name and brand."""
+    displays = catalog.displays()
+    queries = []
+    for _ in range(count):
+        name, brand = rng.choice(displays).split(" - ")[:2]
+        phrase = f"{name.split()[-1]} {brand.lower()}"
+        queries.extend(phrase[:end] for end in range(1, len(phrase) + 1))
+    return queries
+
+def run(runs, rng):
+    """Return {benchmark name: timing summary} for the database the pool points at."""
+    results = {}
+    cursor = database_pool.get_reader().cursor()
+    last_date = cursor.execute("SELECT MAX(sale_date) FROM sales").fetchone()[0] or START_DATE.isoformat()
+
+    results["product cache load"] = summarize(timed(lambda i: data_cache.load_products_to_cache(), runs))
+    catalog = data_cache.get_products()
+    start = time.perf_counter()
+    index = ProductSearchIndex(catalog)
+    results["product search index build"] = summarize([(time.perf_counter() - start) * 1000])
+    queries = search_keystrokes(catalog, 20, rng)
+    results["product search keystroke"] = summarize(timed(lambda i: index.search(queries[i]), len(queries)))
+
+    # Writes go through the service layer, exactly as the Tk modules make them
+    products = cursor.execute("""
+        SELECT p.product_id, u.unit_name FROM products p
+        JOIN units_of_measurement u ON p.unit_id = u.unit_id
+        JOIN inventory i ON i.product_id = p.product_id
+        WHERE i.quantity > 100
+    """).fetchall()
+    picks = [rng.choice(products) for _ in range(runs)]
+    results["save_sale"] = summarize(timed(
+        lambda i: inventory_service.save_sale(None, picks[i][0], 1, 100.0, last_date, picks[i][1]), runs))
+    results["save_restock"] = summarize(timed(
+        lambda i: inventory_service.save_restock(None, picks[i][0], 10, 50.0, last_date, picks[i][1]), runs))
+
+    middle_sale = cursor.execute("SELECT MAX(sale_id) / 2 FROM sales").fetchone()[0] or 1
+    middle_batch = cursor.execute("SELECT MAX(batch_id) / 2 FROM inventory_batches").fetchone()[0] or 1
+    results["sales history first page"] = summarize(timed(lambda i: inventory_service.get_sales_history(), runs))
+    results["sales history middle page"] = summarize(timed(
+        lambda i: inventory_service.get_sales_history(before_id=middle_sale), runs))
+    results["restocking history first page"] = summarize(timed(lambda i: inventory_service.get_inventory_batches(), runs))
+    results["restocking history middle page"] = summarize(timed(
+        lambda i: inventory_service.get_inventory_batches(before_id=middle_batch), runs))
+
+    first_year, last_year = START_DATE.year, int(last_date[:4])
+    for period_type in PERIOD_TYPES:
+        results[f"profit and loss {period_type.lower()}, one year"] = summarize(timed(
+            lambda i: inventory_service.get_profit_data(period_type, last_year, show_all=True), runs))
+        results[f"profit and loss {period_type.lower()}, all years"] = summarize(timed(
+            lambda i: inventory_service.get_profit_data(period_type, first_year, show_all=True, to_year=last_year), runs))
+
+    as_of = (START_DATE + timedelta(days=(datetime.fromisoformat(last_date).date() - START_DATE).days // 2)).isoformat()
+    results["stock valuation"] = summarize(timed(lambda i: get_stock_value(), runs))
+    results["stock valuation as of date"] = summarize(timed(lambda i: get_stock_value_as_of(as_of), runs))
+    results["stock on hand as of date"] = summarize(timed(lambda i: get_stock_as_of(as_of), runs))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_size_arguments(parser)
+    parser.add_argument("--database", help="Benchmark a copy of this database instead of building one")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--output", help="Write the JSON here instead of to standard output")
+    parser.add_argument("--query-stats", action="store_true",
+                        help="Also record per-statement timings with query_stats (adds a little overhead to every result)")
+    args = parser.parse_args()
+
+    with temporary_database() as path:
+        started = time.perf_counter()
+        if args.database:
+            copy_database(args.database, path)
+            from database_setup import ensure_schema
+            database_pool.configure(path)
+            ensure_schema()
+        else:
+            build_from_arguments(path, args)
+        setup_seconds = time.perf_counter() - started
+        if args.query_stats:
+            query_stats.enable(float("inf"), report_at_exit=False)
+        report = {
+            "commit": current_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "database": args.database or {key: getattr(args, key) for key in
+                                          ("products", "batches_per_product", "sales", "expenses", "years", "seed")},
+            "rows": table_sizes(),
+            "setup_seconds": round(setup_seconds, 2),
+            "results": run(args.runs, random.Random(args.seed)),
+        }
+        if args.query_stats:
+            report["queries"] = query_stats.summary()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    for name, timing in report["results"].items():
+        print(f"{name:<42}{timing['median_ms']:>10.3f} ms", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
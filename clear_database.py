@@ -1,7 +1,7 @@
 import sqlite3
 import os
-
-DB_NAME = "database.db"
+from database_pool import DB_NAME, acquire_writer, release_writer
+import stock_ledger
 
 def clear_all_table_data():
     """
@@ -12,14 +12,17 @@ def clear_all_table_data():
         print(f"Error: Database file '{DB_NAME}' not found.")
         return
 
+    conn = None
     try:
-        # Establish a connection to the database
-        conn = sqlite3.connect(DB_NAME, timeout=10)
-        conn.execute("PRAGMA foreign_keys = ON;")
+        # Borrow the shared write connection
+        conn = acquire_writer()
         cursor = conn.cursor()
 
         # Define table deletion order to respect foreign key constraints
         table_order = [
+            "stock_checkpoint_levels",
+            "stock_checkpoints",
+            "stock_movements",  # Append-only; its guard triggers are lifted below while clearing
             "sale_batches",  # Depends on sales, inventory_batches
             "sales",        # Depends on products, units_of_measurement
             "inventory_batches",  # Depends on products, units_of_measurement
@@ -35,6 +38,8 @@ def clear_all_table_data():
 
         print("Clearing data from the following tables:")
         cleared_tables = []
+        for trigger_name in stock_ledger.APPEND_ONLY_TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {trigger_name}")
         # Loop through tables in order
         for table_name in table_order:
             # Verify table exists
@@ -47,6 +52,9 @@ def clear_all_table_data():
                 except sqlite3.Error as e:
                     print(f"  Error clearing {table_name}: {e}")
 
+        if "stock_movements" in cleared_tables:
+            stock_ledger.create_append_only_triggers(cursor)
+
         # Clear sqlite_sequence to reset AUTOINCREMENT counters
         cursor.execute("DELETE FROM sqlite_sequence;")
         print("- sqlite_sequence (AUTOINCREMENT counters reset)")
@@ -62,7 +70,7 @@ def clear_all_table_data():
         print(f"An error occurred: {e}")
     finally:
         if conn:
-            conn.close()
+            release_writer(conn)
 
 if __name__ == "__main__":
     # Ask for confirmation before proceeding
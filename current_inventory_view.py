@@ -1,17 +1,16 @@
 import tkinter as tk
 from tkinter import ttk, font, messagebox
-import sqlite3
 from data_cache import get_products
+from database_pool import get_reader
+from database_setup import ensure_schema
+from background_worker import BackgroundTask
 
-DB_NAME = "database.db"
 LOW_STOCK_THRESHOLD = 10  # Global limit for low stock warning
 
 # --- Helper Functions ---
 def get_inventory():
     """Fetch current inventory for Treeview."""
-    conn = sqlite3.connect(DB_NAME, timeout=10)
-    conn.execute("PRAGMA foreign_keys = ON;")
-    cursor = conn.cursor()
+    cursor = get_reader().cursor()
     cursor.execute("""
         SELECT i.product_id, p.product_name, b.brand_name, d.description_text,
                i.quantity, u.unit_name
@@ -22,11 +21,12 @@ def get_inventory():
         JOIN units_of_measurement u ON p.unit_id = u.unit_id
     """)
     rows = cursor.fetchall()
-    conn.close()
     return [(f"{row[1]} - {row[2]} - {row[3]}", row[4], row[5]) for row in rows]
 
 # --- UI Setup ---
+ensure_schema()
 root = tk.Tk()
+refresh_task = BackgroundTask(root)  # Treeview reloads
 root.title("Current Inventory View")
 root.geometry("800x600")
 
@@ -71,23 +71,32 @@ refresh_btn_frame.pack(pady=5)
 tk.Button(refresh_btn_frame, text="Refresh", font=custom_font, command=lambda: refresh_tree(), bg="#28a745", fg="white", width=15).pack()
 
 # --- Populate Treeview ---
-def refresh_tree():
-    """Refresh Treeview with current inventory data, highlighting low stock."""
-    for row in tree.get_children():
-        tree.delete(row)
-    inventory = get_inventory()
-    if not inventory:
+def load_tree_rows():
+    """Fetch inventory rows with their low stock tags; runs on a background thread."""
+    rows = []
+    for row in get_inventory():
+        # Ensure quantity is treated as an integer
+        quantity = int(row[1])
+        # Apply low_stock tag if quantity < LOW_STOCK_THRESHOLD
+        tags = ("low_stock",) if quantity < LOW_STOCK_THRESHOLD else ()
+        rows.append((row, tags))
+        # Debug print to verify quantity and tag
+        print(f"Product: {row[0]}, Quantity: {quantity}, Tags: {tags}")
+    return rows
+
+def fill_tree(rows):
+    """Replace the Treeview contents with rows in one batch."""
+    tree.delete(*tree.get_children())
+    if not rows:
         no_records_label.grid()  # Show "No records" message
     else:
         no_records_label.grid_remove()  # Hide message
-        for row in inventory:
-            # Ensure quantity is treated as an integer
-            quantity = int(row[1])
-            # Apply low_stock tag if quantity < LOW_STOCK_THRESHOLD
-            tags = ("low_stock",) if quantity < LOW_STOCK_THRESHOLD else ()
+        for row, tags in rows:
             tree.insert("", "end", values=row, tags=tags)
-            # Debug print to verify quantity and tag
-            print(f"Product: {row[0]}, Quantity: {quantity}, Tags: {tags}")
+
+def refresh_tree():
+    """Refresh Treeview with current inventory data, highlighting low stock; loaded in the background."""
+    refresh_task.submit(load_tree_rows, fill_tree)
 
 refresh_tree()
 
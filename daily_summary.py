@@ -0,0 +1,176 @@
+import sys
+import database_pool
+from profit_loss_data import get_daily_totals, get_raw_daily_totals
+
+TOLERANCE = 0.005  # Largest difference between a rollup and the raw data that counts as a match
+
+# Triggers keeping daily_summary in step with sales, sale_batches and expenses in the same transaction.
+# A cascaded sale_batches delete runs after its sale row is gone, so it finds no date and changes
+# nothing; the sales BEFORE DELETE trigger takes that cost out instead.
+SUMMARY_TRIGGERS = {
+    "trg_sales_insert_summary": """
+        CREATE TRIGGER IF NOT EXISTS trg_sales_insert_summary AFTER INSERT ON sales
+        WHEN NEW.sale_date IS NOT NULL
+        BEGIN
+            INSERT INTO daily_summary (summary_date, revenue)
+            VALUES (NEW.sale_date, NEW.selling_price * NEW.quantity_sold)
+            ON CONFLICT(summary_date) DO UPDATE SET revenue = revenue + excluded.revenue;
+        END
+    """,
+    "trg_sales_update_summary": """
+        CREATE TRIGGER IF NOT EXISTS trg_sales_update_summary
+        AFTER UPDATE OF selling_price, quantity_sold, sale_date ON sales
+        BEGIN
+            UPDATE daily_summary SET revenue = revenue - OLD.selling_price * OLD.quantity_sold
+            WHERE summary_date = OLD.sale_date;
+            INSERT INTO daily_summary (summary_date, revenue)
+            SELECT NEW.sale_date, NEW.selling_price * NEW.quantity_sold
+            WHERE NEW.sale_date IS NOT NULL
+            ON CONFLICT(summary_date) DO UPDATE SET revenue = revenue + excluded.revenue;
+        END
+    """,
+    "trg_sales_move_cost_summary": """
+        CREATE TRIGGER IF NOT EXISTS trg_sales_move_cost_summary AFTER UPDATE OF sale_date ON sales
+        WHEN OLD.sale_date IS NOT NEW.sale_date
+        BEGIN
+            UPDATE daily_summary
+            SET cost_of_goods = cost_of_goods - (SELECT COALESCE(SUM(quantity_used * buying_price), 0)
+                                                 FROM sale_batches WHERE sale_id = OLD.sale_id)
+            WHERE summary_date = OLD.sale_date;
+            INSERT INTO daily_summary (summary_date, cost_of_goods)
+            SELECT NEW.sale_date, SUM(quantity_used * buying_price)
+            FROM sale_batches
+            WHERE sale_id = NEW.sale_id AND NEW.sale_date IS NOT NULL
+            GROUP BY sale_id
+            ON CONFLICT(summary_date) DO UPDATE SET cost_of_goods = cost_of_goods + excluded.cost_of_goods;
+        END
+    """,
+    "trg_sales_delete_summary": """
+        CREATE TRIGGER IF NOT EXISTS trg_sales_delete_summary BEFORE DELETE ON sales
+        BEGIN
+            UPDATE daily_summary
+            SET revenue = revenue - OLD.selling_price * OLD.quantity_sold,
+                cost_of_goods = cost_of_goods - (SELECT COALESCE(SUM(quantity_used * buying_price), 0)
+                                                 FROM sale_batches WHERE sale_id = OLD.sale_id)
+            WHERE summary_date = OLD.sale_date;
+        END
+    """,
+    "trg_sale_batches_insert_summary": """
+        CREATE TRIGGER IF NOT EXISTS trg_sale_batches_insert_summary AFTER INSERT ON sale_batches
+        BEGIN
+            INSERT INTO daily_summary (summary_date, cost_of_goods)
+            SELECT sale_date, NEW.quantity_used * NEW.buying_price
+            FROM sales
+            WHERE sale_id = NEW.sale_id AND sale_date IS NOT NULL
+            ON CONFLICT(summary_date) DO UPDATE SET cost_of_goods = cost_of_goods + excluded.cost_of_goods;
+        END
+    """,
+    "trg_sale_batches_update_summary": """
+        CREATE TRIGGER IF NOT EXISTS trg_sale_batches_update_summary
+        AFTER UPDATE OF sale_id, quantity_used, buying_price ON sale_batches
+        BEGIN
+            UPDATE daily_summary SET cost_of_goods = cost_of_goods - OLD.quantity_used * OLD.buying_price
+            WHERE summary_date = (SELECT sale_date FROM sales WHERE sale_id = OLD.sale_id);
+            INSERT INTO daily_summary (summary_date, cost_of_goods)
+            SELECT sale_date, NEW.quantity_used * NEW.buying_price
+            FROM sales
+            WHERE sale_id = NEW.sale_id AND sale_date IS NOT NULL
+            ON CONFLICT(summary_date) DO UPDATE SET cost_of_goods = cost_of_goods + excluded.cost_of_goods;
+        END
+    """,
+    "trg_sale_batches_delete_summary": """
+        CREATE TRIGGER IF NOT EXISTS trg_sale_batches_delete_summary AFTER DELETE ON sale_batches
+        BEGIN
+            UPDATE daily_summary SET cost_of_goods = cost_of_goods - OLD.quantity_used * OLD.buying_price
+            WHERE summary_date = (SELECT sale_date FROM sales WHERE sale_id = OLD.sale_id);
+        END
+    """,
+    "trg_expenses_insert_summary": """
+        CREATE TRIGGER IF NOT EXISTS trg_expenses_insert_summary AFTER INSERT ON expenses
+        BEGIN
+            INSERT INTO daily_summary (summary_date, expenses)
+            VALUES (NEW.expense_date, NEW.amount)
+            ON CONFLICT(summary_date) DO UPDATE SET expenses = expenses + excluded.expenses;
+        END
+    """,
+    "trg_expenses_update_summary": """
+        CREATE TRIGGER IF NOT EXISTS trg_expenses_update_summary AFTER UPDATE OF amount, expense_date ON expenses
+        BEGIN
+            UPDATE daily_summary SET expenses = expenses - OLD.amount WHERE summary_date = OLD.expense_date;
+            INSERT INTO daily_summary (summary_date, expenses)
+            VALUES (NEW.expense_date, NEW.amount)
+            ON CONFLICT(summary_date) DO UPDATE SET expenses = expenses + excluded.expenses;
+        END
+    """,
+    "trg_expenses_delete_summary": """
+        CREATE TRIGGER IF NOT EXISTS trg_expenses_delete_summary AFTER DELETE ON expenses
+        BEGIN
+            UPDATE daily_summary SET expenses = expenses - OLD.amount WHERE summary_date = OLD.expense_date;
+        END
+    """,
+}
+
+def create_summary_triggers(cursor):
+    """Create the triggers that maintain daily_summary."""
+    for sql in SUMMARY_TRIGGERS.values():
+        cursor.execute(sql)
+
+def drop_summary_triggers(cursor):
+    """Drop the daily_summary triggers, e.g. before a bulk load followed by rebuild_daily_summary()."""
+    for name in SUMMARY_TRIGGERS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+def rebuild_daily_summary(cursor):
+    """Recompute every daily_summary row from sales, sale_batches and expenses."""
+    cursor.execute("DELETE FROM daily_summary")
+    cursor.execute("""
+        INSERT INTO daily_summary (summary_date, revenue, cost_of_goods, expenses)
+        SELECT day, SUM(revenue), SUM(cost_of_goods), SUM(expenses)
+        FROM (
+            SELECT sale_date AS day, selling_price * quantity_sold AS revenue,
+                   0 AS cost_of_goods, 0 AS expenses
+            FROM sales
+            UNION ALL
+            SELECT s.sale_date, 0, sb.quantity_used * sb.buying_price, 0
+            FROM sale_batches sb
+            JOIN sales s ON s.sale_id = sb.sale_id
+            UNION ALL
+            SELECT expense_date, 0, 0, amount
+            FROM expenses
+        )
+        WHERE day IS NOT NULL
+        GROUP BY day
+    """)
+
+def find_summary_mismatches(cursor):
+    """Return (date, measure, rollup value, raw value) for every day where daily_summary is off."""
+    summary = get_daily_totals(cursor, "0000-01-01", "9999-12-31")
+    raw = get_raw_daily_totals(cursor, "0000-01-01", "9999-12-31")
+    mismatches = []
+    for day in sorted(set(summary) | set(raw)):
+        expected = raw.get(day, [0.0, 0.0, 0.0])
+        actual = summary.get(day, [0.0, 0.0, 0.0])
+        for measure, rollup_value, raw_value in zip(("revenue", "cost_of_goods", "expenses"), actual, expected):
+            if abs(rollup_value - raw_value) > TOLERANCE:
+                mismatches.append((day, measure, rollup_value, raw_value))
+    return mismatches
+
+if __name__ == "__main__":
+    from database_setup import ensure_schema
+    ensure_schema()
+    if "--rebuild" in sys.argv:
+        conn = database_pool.acquire_writer()
+        try:
+            database_pool.begin_write(conn)
+            rebuild_daily_summary(conn.cursor())
+            conn.commit()
+            print("Rebuilt daily_summary from sales, sale_batches and expenses.")
+        finally:
+            database_pool.release_writer(conn)
+    mismatches = find_summary_mismatches(database_pool.get_reader().cursor())
+    for day, measure, rollup_value, raw_value in mismatches:
+        print(f"{day} {measure}: daily_summary has {rollup_value:.2f}, raw data gives {raw_value:.2f}")
+    if mismatches:
+        print(f"{len(mismatches)} mismatches; run with --rebuild to recompute daily_summary.")
+        sys.exit(1)
+    print("daily_summary matches the raw data.")
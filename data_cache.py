@@ -1,48 +1,187 @@
-import sqlite3
+from database_pool import get_reader
 
-DB_NAME = "database.db"
+class ProductCatalog:
+    """Cached products indexed by product_id and by "name - brand - description" display string."""
+
+    def __init__(self):
+        self.by_id = {}  # product_id -> display, in load order
+        self.ids_by_display = {}  # display -> {product_id: None}; several units can share a display
+        self.version = 0  # Bumped on every change so views can tell when to redraw
+        self.loaded = False
+        self.last_change_id = 0  # Newest product_changes row already applied
+        self.data_version = None  # (reader connection, PRAGMA data_version) at the last refresh; data_version is per connection
+        self.listeners = []  # Called as listener(product_id, old_display, new_display); all None on load
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __iter__(self):
+        """Yield (display, product_id) pairs."""
+        return ((display, product_id) for product_id, display in self.by_id.items())
+
+    def load(self, rows):
+        """Replace the catalog with (product_id, display) rows."""
+        self.by_id = dict(rows)
+        self.ids_by_display = {}
+        for product_id, display in self.by_id.items():
+            self.ids_by_display.setdefault(display, {})[product_id] = None
+        self.loaded = True
+        self.version += 1
+        self._notify(None, None, None)
+
+    def add(self, product_id, display):
+        if not self.loaded:
+            return  # Picked up by the first load instead
+        old_display = self.by_id.get(product_id)
+        if old_display is not None:
+            self._unindex(product_id, old_display)
+        self._index(product_id, display)
+        self.version += 1
+        self._notify(product_id, old_display, display)
+
+    def add_many(self, rows):
+        """Add (product_id, display) rows, e.g. the variants of one onboarded product."""
+        if not self.loaded:
+            return  # Picked up by the first load instead
+        changes = []
+        for product_id, display in rows:
+            old_display = self.by_id.get(product_id)
+            if old_display is not None:
+                self._unindex(product_id, old_display)
+            self._index(product_id, display)
+            changes.append((product_id, old_display, display))
+        self.version += 1  # Once for the whole batch, before listeners see any of it
+        for change in changes:
+            self._notify(*change)
+
+    def update(self, product_id, display):
+        old_display = self.by_id.get(product_id)
+        if old_display is None or old_display == display:
+            return
+        self._unindex(product_id, old_display)
+        self._index(product_id, display)
+        self.version += 1
+        self._notify(product_id, old_display, display)
+
+    def remove(self, product_id):
+        display = self.by_id.pop(product_id, None)
+        if display is None:
+            return
+        self._unindex(product_id, display)
+        self.version += 1
+        self._notify(product_id, display, None)
+
+    def get_id(self, display):
+        """Return the product_id for a display string, the most recent one if several share it."""
+        ids = self.ids_by_display.get(display)
+        return next(reversed(ids)) if ids else None
+
+    def _index(self, product_id, display):
+        self.by_id[product_id] = display
+        self.ids_by_display.setdefault(display, {})[product_id] = None
+
+    def _unindex(self, product_id, display):
+        ids = self.ids_by_display.get(display)
+        if ids is not None:
+            ids.pop(product_id, None)
+            if not ids:
+                del self.ids_by_display[display]
+
+    def subscribe(self, listener):
+        """Register listener(product_id, old_display, new_display) to be told about every change."""
+        self.listeners.append(listener)
+
+    def _notify(self, product_id, old_display, new_display):
+        for listener in self.listeners:
+            listener(product_id, old_display, new_display)
+
+    def displays(self):
+        """Return display strings in load order, for Combobox values."""
+        return list(self.by_id.values())
 
 # Global cache
-product_cache = []
+catalog = ProductCatalog()
+
+PRODUCT_DISPLAY_QUERY = """
+    SELECT p.product_id, p.product_name, b.brand_name, d.description_text
+    FROM products p
+    JOIN brands b ON p.brand_id = b.brand_id
+    JOIN descriptions d ON p.description_id = d.description_id
+"""
+REFRESH_CHUNK_SIZE = 500  # Product ids per IN (...) query, well below SQLite's parameter limit
 
 def load_products_to_cache():
     """Load products from database into cache, including product_id, product_name, brand_name, and description_text."""
-    global product_cache
-    conn = sqlite3.connect(DB_NAME, timeout=10)
-    conn.execute("PRAGMA foreign_keys = ON;")
+    conn = get_reader()
     cursor = conn.cursor()
-    cursor.execute("""
-        SELECT p.product_id, p.product_name, b.brand_name, d.description_text
-        FROM products p
-        JOIN brands b ON p.brand_id = b.brand_id
-        JOIN descriptions d ON p.description_id = d.description_id
-    """)
+    # Read the change log position first so changes committed during the load are re-applied, not lost
+    catalog.data_version = (conn, cursor.execute("PRAGMA data_version").fetchone()[0])
+    catalog.last_change_id = cursor.execute("SELECT COALESCE(MAX(change_id), 0) FROM product_changes").fetchone()[0]
+    cursor.execute(PRODUCT_DISPLAY_QUERY)
     rows = cursor.fetchall()
-    conn.close()
-    product_cache = [(f"{row[1]} - {row[2]} - {row[3]}", row[0]) for row in rows]
-    return product_cache
+    catalog.load((row[0], f"{row[1]} - {row[2]} - {row[3]}") for row in rows)
+    return catalog
+
+def refresh_products():
+    """Apply product changes committed by other windows since the last load or refresh.
+
+    PRAGMA data_version only changes when another connection commits, so the common case
+    costs one pragma; otherwise only the changed products are re-read. The counter is only
+    comparable on one connection, so a call from another thread's reader always checks the log.
+    Call it from the thread that reads the catalog (the Tk thread in the windows).
+    """
+    conn = get_reader()
+    cursor = conn.cursor()
+    data_version = (conn, cursor.execute("PRAGMA data_version").fetchone()[0])
+    if data_version == catalog.data_version:
+        return
+    catalog.data_version = data_version
+    cursor.execute("""
+        SELECT change_id, product_id FROM product_changes WHERE change_id > ? ORDER BY change_id
+    """, (catalog.last_change_id,))
+    changes = cursor.fetchall()
+    if not changes:
+        return
+    catalog.last_change_id = changes[-1][0]
+    changed_ids = list({product_id for _, product_id in changes})
+    found = set()
+    for start in range(0, len(changed_ids), REFRESH_CHUNK_SIZE):
+        chunk = changed_ids[start:start + REFRESH_CHUNK_SIZE]
+        placeholders = ", ".join("?" * len(chunk))
+        cursor.execute(f"{PRODUCT_DISPLAY_QUERY} WHERE p.product_id IN ({placeholders})", chunk)
+        for row in cursor.fetchall():
+            display = f"{row[1]} - {row[2]} - {row[3]}"
+            found.add(row[0])
+            if row[0] in catalog.by_id:
+                catalog.update(row[0], display)
+            else:
+                catalog.add(row[0], display)
+    for product_id in changed_ids:
+        if product_id not in found:
+            catalog.remove(product_id)
 
 def get_products():
-    """Return cached products, load from database if cache is empty."""
-    global product_cache
-    if not product_cache:
+    """Return the cached product catalog, loading it on first use and refreshing changed rows after."""
+    if not catalog.loaded:
         return load_products_to_cache()
-    return product_cache
+    refresh_products()
+    return catalog
 
 def add_product_to_cache(product_display, product_id):
     """Add a new product to the cache."""
-    global product_cache
-    product_cache.append((product_display, product_id))
+    catalog.add(product_id, product_display)
+
+def add_products_to_cache(rows):
+    """Add (product_id, display) rows for new products to the cache."""
+    catalog.add_many(rows)
 
-def update_product_in_cache(old_display, new_display, product_id):
-    """Update a product in the cache."""
-    global product_cache
-    product_cache = [(new_display if p[0] == old_display else p[0], p[1]) for p in product_cache]
+def update_product_in_cache(product_id, new_display):
+    """Update a product's display string in the cache."""
+    catalog.update(product_id, new_display)
 
-def remove_product_from_cache(product_display):
+def remove_product_from_cache(product_id):
     """Remove a product from the cache."""
-    global product_cache
-    product_cache = [p for p in product_cache if p[0] != product_display]
+    catalog.remove(product_id)
 
 if __name__ == "__main__":
-    load_products_to_cache()
\ No newline at end of file
+    load_products_to_cache()
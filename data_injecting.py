@@ -1,15 +1,7 @@
 import sqlite3
-
-DB_NAME = "database.db"
-
-def create_connection():
-    try:
-        conn = sqlite3.connect(DB_NAME, timeout=10)
-        conn.execute("PRAGMA foreign_keys = ON;")
-        return conn
-    except sqlite3.Error as e:
-        print(f"Error connecting to database: {e}")
-        return None
+from database_pool import get_reader
+from database_setup import ensure_schema
+from product_import import import_products, normalize_record
 
 def display_all_tables(conn):
     cursor = conn.cursor()
@@ -33,11 +25,6 @@ def display_all_tables(conn):
             print(f"Error reading table {table}: {e}")
 
 def inject_data():
-    conn = create_connection()
-    if not conn:
-        return
-    cursor = conn.cursor()
-
     try:
         # Data from test data.xlsx
         data = [
@@ -103,79 +90,18 @@ def inject_data():
              "descriptions": "Copper pipe cutter; PVC pipe cutter", "units": "piece"}
         ]
 
-        inserted_count = 0
-        skipped_count = 0
-
-        conn.execute("BEGIN TRANSACTION")
-
-        for row in data:
-            # Insert or get category
-            category = row["category"].strip()
-            cursor.execute("SELECT category_id FROM categories WHERE category_name=?", (category,))
-            category_id = cursor.fetchone()
-            if not category_id:
-                cursor.execute("INSERT INTO categories (category_name) VALUES (?)", (category,))
-                category_id = (cursor.lastrowid,)
-
-            # Split brands, descriptions, units
-            brands = [b.strip() for b in row["brands"].replace(";", ",").split(",")]
-            descriptions = [d.strip() for d in row["descriptions"].replace(";", ",").split(",")]
-            units = [u.strip() for u in row["units"].replace(";", ",").split(",")]
-
-            for brand in brands:
-                # Insert or get brand
-                cursor.execute("SELECT brand_id FROM brands WHERE brand_name=?", (brand,))
-                brand_id = cursor.fetchone()
-                if not brand_id:
-                    cursor.execute("INSERT INTO brands (brand_name) VALUES (?)", (brand,))
-                    brand_id = (cursor.lastrowid,)
-
-                for desc in descriptions:
-                    # Insert or get description
-                    cursor.execute("SELECT description_id FROM descriptions WHERE description_text=?", (desc,))
-                    description_id = cursor.fetchone()
-                    if not description_id:
-                        cursor.execute("INSERT INTO descriptions (description_text) VALUES (?)", (desc,))
-                        description_id = (cursor.lastrowid,)
-
-                    for unit in units:
-                        # Insert or get unit
-                        cursor.execute("SELECT unit_id FROM units_of_measurement WHERE unit_name=?", (unit,))
-                        unit_id = cursor.fetchone()
-                        if not unit_id:
-                            cursor.execute("INSERT INTO units_of_measurement (unit_name) VALUES (?)", (unit,))
-                            unit_id = (cursor.lastrowid,)
-
-                        # Check for existing product
-                        cursor.execute("""
-                            SELECT product_id FROM products
-                            WHERE product_name=? AND brand_id=? AND category_id=? AND description_id=? AND unit_id=?
-                        """, (row["product"], brand_id[0], category_id[0], description_id[0], unit_id[0]))
-                        existing_product = cursor.fetchone()
-
-                        if not existing_product:
-                            # Insert product
-                            cursor.execute("""
-                                INSERT INTO products (product_name, brand_id, category_id, description_id, unit_id)
-                                VALUES (?, ?, ?, ?, ?)
-                            """, (row["product"], brand_id[0], category_id[0], description_id[0], unit_id[0]))
-                            inserted_count += 1
-                        else:
-                            skipped_count += 1
-
-        conn.commit()
+        # Duplicates are skipped by the products identity index, which a migration adds
+        ensure_schema()
+        inserted_count, skipped_count, _ = import_products(normalize_record(row) for row in data)
         print(f"Data injected successfully: {inserted_count} products inserted, {skipped_count} duplicates skipped.")
 
         # Prompt to view all tables
         response = input("\nWould you like to view all tables in the database? (yes/no): ").strip().lower()
         if response == "yes":
-            display_all_tables(conn)
+            display_all_tables(get_reader())
 
     except sqlite3.Error as e:
-        conn.rollback()
         print(f"Error injecting data: {e}")
-    finally:
-        conn.close()
 
 if __name__ == "__main__":
     inject_data()
\ No newline at end of file
@@ -0,0 +1,132 @@
+import os
+import sqlite3
+import threading
+import time
+import atexit
+
+DB_NAME = "database.db"
+
+# PRAGMAs applied to every pooled connection when it is opened; override with configure(pragmas=...).
+# WAL lets the history views keep reading while a till or restock window writes.
+PRAGMA_PROFILE = {
+    "foreign_keys": "ON",
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",  # Durable across app crashes in WAL mode, fsyncs only on checkpoint
+    "cache_size": -16000,  # Negative means KiB, so about 16 MB of page cache per connection
+    "mmap_size": 134217728,  # 128 MB
+    "temp_store": "MEMORY",
+    # Milliseconds SQLite waits on a lock for every statement, including reads and writes inside a
+    # transaction, which with_busy_backoff() does not wrap
+    "busy_timeout": 5000,
+}
+
+# Busy handling: retries of BEGIN IMMEDIATE and the PRAGMAs after SQLite's own busy_timeout gives
+# up, doubling the sleep each time
+BUSY_RETRIES = 3
+BUSY_BACKOFF = 0.05  # Seconds before the first retry
+lock_stats = {"waits": 0, "wait_seconds": 0.0}  # Retries and time slept in this process
+_lock_stats_lock = threading.Lock()  # lock_stats is updated from every thread that writes
+connection_factory = sqlite3.Connection  # query_stats.enable() swaps in TracedConnection
+
+# Pool state
+_local = threading.local()  # Per-thread reader connection
+_readers = []  # All reader connections opened so far, for close_all_connections()
+_registry_lock = threading.Lock()
+_writer = None
+_writer_lock = threading.RLock()
+_generation = 0  # Bumped on close so stale thread-local readers get reopened
+
+def _open_connection():
+    """Open a configured connection to DB_NAME."""
+    conn = sqlite3.connect(DB_NAME, timeout=PRAGMA_PROFILE.get("busy_timeout", 10000) / 1000,
+                           check_same_thread=False, factory=connection_factory)
+    for name, value in PRAGMA_PROFILE.items():
+        with_busy_backoff(lambda: conn.execute(f"PRAGMA {name} = {value}"))
+    return conn
+
+def configure(db_name=None, pragmas=None):
+    """Point the pool at another database file and/or PRAGMA profile, closing any open connections."""
+    global DB_NAME
+    close_all_connections()
+    if db_name is not None:
+        DB_NAME = db_name
+    if pragmas is not None:
+        PRAGMA_PROFILE.clear()
+        PRAGMA_PROFILE.update(pragmas)
+
+def with_busy_backoff(operation):
+    """Run operation, retrying with exponential backoff while the database is locked."""
+    delay = BUSY_BACKOFF
+    for attempt in range(BUSY_RETRIES + 1):
+        try:
+            return operation()
+        except sqlite3.OperationalError as e:
+            if attempt == BUSY_RETRIES or not ("locked" in str(e) or "busy" in str(e)):
+                raise
+            with _lock_stats_lock:
+                lock_stats["waits"] += 1
+                lock_stats["wait_seconds"] += delay
+            time.sleep(delay)
+            delay *= 2
+
+def begin_write(conn):
+    """Start a write transaction, taking the write lock up front.
+
+    BEGIN IMMEDIATE fails (and is retried) before any work is done, instead of a deferred
+    transaction hitting "database is locked" halfway through a save.
+    """
+    with_busy_backoff(lambda: conn.execute("BEGIN IMMEDIATE"))
+
+def get_reader():
+    """Return the calling thread's long-lived read connection.
+
+    The connection is owned by the calling thread and must not be closed by callers.
+    """
+    conn = getattr(_local, "reader", None)
+    if conn is None or _local.generation != _generation:
+        conn = _open_connection()
+        with _registry_lock:
+            _readers.append(conn)
+        _local.reader = conn
+        _local.generation = _generation
+    return conn
+
+def acquire_writer():
+    """Lock and return the shared write connection. Always pair with release_writer()."""
+    global _writer
+    _writer_lock.acquire()
+    try:
+        if _writer is None:
+            _writer = _open_connection()
+    except sqlite3.Error:
+        _writer_lock.release()
+        raise
+    return _writer
+
+def release_writer(conn):
+    """Release the write connection, rolling back anything left uncommitted."""
+    try:
+        if conn.in_transaction:
+            conn.rollback()
+    finally:
+        _writer_lock.release()
+
+def close_all_connections():
+    """Close every pooled connection. Threads reopen their reader on next use."""
+    global _writer, _generation
+    with _writer_lock:
+        if _writer is not None:
+            _writer.close()
+            _writer = None
+    with _registry_lock:
+        for conn in _readers:
+            conn.close()
+        _readers.clear()
+        _generation += 1
+
+atexit.register(close_all_connections)
+
+# Opt-in query timing for any module: INVENTORY_QUERY_STATS=<slow query threshold in ms>
+if os.environ.get("INVENTORY_QUERY_STATS"):
+    import query_stats
+    query_stats.enable(float(os.environ["INVENTORY_QUERY_STATS"]))
@@ -1,13 +1,19 @@
 import sqlite3
 import os
-
-DB_NAME = "database.db"
+import re
+import sys
+from datetime import date
+import database_pool
+import batch_allocation
+import daily_summary
+import stock_valuation
+import stock_ledger
+import dimension_cache
+from inventory_service import history
 
 def create_connection():
     try:
-        conn = sqlite3.connect(DB_NAME, timeout=10)  # Add timeout
-        conn.execute("PRAGMA foreign_keys = ON;")
-        return conn
+        return database_pool.acquire_writer()
     except sqlite3.Error as e:
         print(f"Error connecting to database: {e}")
         return None
@@ -22,7 +28,7 @@ def table_exists(conn, table_name):
     return cursor.fetchone() is not None
 
 def create_tables():
-    db_exists = os.path.exists(DB_NAME)
+    db_exists = os.path.exists(database_pool.DB_NAME)
     
     conn = create_connection()
     if not conn:
@@ -191,6 +197,7 @@ def create_tables():
             print("Added predefined_expense column to expenses table")
 
         conn.commit()
+        run_migrations(conn)
         if not db_exists:
             print("New database created with all tables.")
         else:
@@ -198,7 +205,566 @@ def create_tables():
     except sqlite3.Error as e:
         print(f"Error creating tables: {e}")
     finally:
-        conn.close()
+        database_pool.release_writer(conn)
+
+# --- Schema Migrations ---
+# Each migration runs once, in order, and records its number in PRAGMA user_version.
+def add_lookup_indexes(cursor):
+    """Add indexes for stock, FIFO batch, sale batch and date-range lookups."""
+    # Merge duplicate inventory rows into the oldest row so product_id can be unique
+    cursor.execute("""
+        UPDATE inventory
+        SET quantity = (SELECT SUM(i2.quantity) FROM inventory i2 WHERE i2.product_id = inventory.product_id)
+        WHERE inventory_id IN (
+            SELECT MIN(inventory_id) FROM inventory GROUP BY product_id HAVING COUNT(*) > 1
+        )
+    """)
+    cursor.execute("""
+        DELETE FROM inventory
+        WHERE inventory_id NOT IN (SELECT MIN(inventory_id) FROM inventory GROUP BY product_id)
+    """)
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_inventory_product ON inventory(product_id)")
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_batches_product_unit_date
+        ON inventory_batches(product_id, unit_id, purchase_date)
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sale_batches_sale ON sale_batches(sale_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sale_batches_batch ON sale_batches(batch_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sales_date ON sales(sale_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_expenses_date ON expenses(expense_date)")
+
+def add_product_change_log(cursor):
+    """Log changed product ids so other windows can refresh their product cache."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS product_changes (
+            change_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_id INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_products_insert_log AFTER INSERT ON products
+        BEGIN
+            INSERT INTO product_changes (product_id) VALUES (NEW.product_id);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_products_update_log
+        AFTER UPDATE OF product_name, brand_id, description_id ON products
+        BEGIN
+            INSERT INTO product_changes (product_id) VALUES (NEW.product_id);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_products_delete_log AFTER DELETE ON products
+        BEGIN
+            INSERT INTO product_changes (product_id) VALUES (OLD.product_id);
+        END
+    """)
+    # Renaming a brand or description changes the display string of every product using it
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_brands_rename_log AFTER UPDATE OF brand_name ON brands
+        BEGIN
+            INSERT INTO product_changes (product_id)
+            SELECT product_id FROM products WHERE brand_id = NEW.brand_id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_descriptions_rename_log AFTER UPDATE OF description_text ON descriptions
+        BEGIN
+            INSERT INTO product_changes (product_id)
+            SELECT product_id FROM products WHERE description_id = NEW.description_id;
+        END
+    """)
+
+def add_report_covering_indexes(cursor):
+    """Cover the profit and loss date-range totals so they never read the sales or expenses tables."""
+    cursor.execute("DROP INDEX IF EXISTS idx_sales_date")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sales_date_amounts ON sales(sale_date, selling_price, quantity_sold)")
+    cursor.execute("DROP INDEX IF EXISTS idx_expenses_date")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_expenses_date_amount ON expenses(expense_date, amount)")
+
+def add_cost_of_goods_index(cursor):
+    """Cover cost of goods lookups so the P&L join reads sale_batches from the index alone."""
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_sale_batches_sale_cost
+        ON sale_batches(sale_id, quantity_used, buying_price)
+    """)
+    cursor.execute("DROP INDEX IF EXISTS idx_sale_batches_sale")  # A prefix of the new index
+
+def add_daily_summary(cursor):
+    """Keep per-day revenue, cost of goods and expense totals in daily_summary for the P&L report."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS daily_summary (
+            summary_date TEXT PRIMARY KEY,
+            revenue REAL NOT NULL DEFAULT 0,
+            cost_of_goods REAL NOT NULL DEFAULT 0,
+            expenses REAL NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    """)
+    daily_summary.create_summary_triggers(cursor)
+    daily_summary.rebuild_daily_summary(cursor)
+
+def add_stock_valuation(cursor):
+    """Keep a running stock value per product and a daily history of stock value changes."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS product_stock_value (
+            product_id INTEGER PRIMARY KEY,
+            stock_value REAL NOT NULL DEFAULT 0
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stock_value_changes (
+            change_date TEXT PRIMARY KEY,
+            value_change REAL NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    """)
+    # The valuation triggers as this migration created them, kept here so it always does the same;
+    # add_stock_value_total replaces them with stock_valuation's current set
+    add_to_product = """
+        INSERT INTO product_stock_value (product_id, stock_value) SELECT {product}, {value} WHERE {product} IS NOT NULL
+        ON CONFLICT(product_id) DO UPDATE SET stock_value = stock_value + excluded.stock_value;
+    """
+    add_to_day = """
+        INSERT INTO stock_value_changes (change_date, value_change) SELECT {day}, {value} WHERE {day} IS NOT NULL
+        ON CONFLICT(change_date) DO UPDATE SET value_change = value_change + excluded.value_change;
+    """
+    sale_outflow = """
+        INSERT INTO stock_value_changes (change_date, value_change)
+        SELECT s.sale_date, {sign} {row}.quantity_used * ib.buying_price
+        FROM sales s, inventory_batches ib
+        WHERE s.sale_id = {row}.sale_id AND ib.batch_id = {row}.batch_id AND s.sale_date IS NOT NULL
+        ON CONFLICT(change_date) DO UPDATE SET value_change = value_change + excluded.value_change;
+    """
+    sale_product = """
+        INSERT INTO product_stock_value (product_id, stock_value)
+        SELECT ib.product_id, {sign} {row}.quantity_used * ib.buying_price
+        FROM inventory_batches ib
+        WHERE ib.batch_id = {row}.batch_id AND ib.product_id IS NOT NULL
+        ON CONFLICT(product_id) DO UPDATE SET stock_value = stock_value + excluded.stock_value;
+    """
+    batch_outflows = """
+        INSERT INTO stock_value_changes (change_date, value_change)
+        SELECT s.sale_date, SUM(sb.quantity_used) * {price}
+        FROM sale_batches sb
+        JOIN sales s ON s.sale_id = sb.sale_id
+        WHERE sb.batch_id = OLD.batch_id AND s.sale_date IS NOT NULL
+        GROUP BY s.sale_date
+        ON CONFLICT(change_date) DO UPDATE SET value_change = value_change + excluded.value_change;
+    """
+    used = "(SELECT COALESCE(SUM(quantity_used), 0) FROM sale_batches WHERE batch_id = OLD.batch_id)"
+    sale_total = """(SELECT COALESCE(SUM(sb.quantity_used * ib.buying_price), 0)
+                     FROM sale_batches sb JOIN inventory_batches ib ON ib.batch_id = sb.batch_id
+                     WHERE sb.sale_id = OLD.sale_id)"""
+    triggers = [
+        f"""CREATE TRIGGER IF NOT EXISTS trg_batches_insert_value AFTER INSERT ON inventory_batches
+        BEGIN
+            {add_to_product.format(product="NEW.product_id", value="NEW.quantity * NEW.buying_price")}
+            {add_to_day.format(day="NEW.purchase_date", value="NEW.quantity * NEW.buying_price")}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_batches_update_value
+        AFTER UPDATE OF product_id, quantity, buying_price, purchase_date ON inventory_batches
+        BEGIN
+            {add_to_product.format(product="OLD.product_id", value=f"-(OLD.quantity - {used}) * OLD.buying_price")}
+            {add_to_product.format(product="NEW.product_id", value=f"(NEW.quantity - {used}) * NEW.buying_price")}
+            {add_to_day.format(day="OLD.purchase_date", value="-OLD.quantity * OLD.buying_price")}
+            {add_to_day.format(day="NEW.purchase_date", value="NEW.quantity * NEW.buying_price")}
+            {batch_outflows.format(price="(OLD.buying_price - NEW.buying_price)")}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_batches_delete_value BEFORE DELETE ON inventory_batches
+        BEGIN
+            {add_to_product.format(product="OLD.product_id", value=f"-(OLD.quantity - {used}) * OLD.buying_price")}
+            {add_to_day.format(day="OLD.purchase_date", value="-OLD.quantity * OLD.buying_price")}
+            {batch_outflows.format(price="OLD.buying_price")}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_sale_batches_insert_value AFTER INSERT ON sale_batches
+        BEGIN
+            {sale_product.format(sign="-", row="NEW")}
+            {sale_outflow.format(sign="-", row="NEW")}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_sale_batches_update_value
+        AFTER UPDATE OF sale_id, batch_id, quantity_used ON sale_batches
+        BEGIN
+            {sale_product.format(sign="", row="OLD")}
+            {sale_outflow.format(sign="", row="OLD")}
+            {sale_product.format(sign="-", row="NEW")}
+            {sale_outflow.format(sign="-", row="NEW")}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_sale_batches_delete_value AFTER DELETE ON sale_batches
+        BEGIN
+            {sale_product.format(sign="", row="OLD")}
+            {sale_outflow.format(sign="", row="OLD")}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_sales_move_value AFTER UPDATE OF sale_date ON sales
+        WHEN OLD.sale_date IS NOT NEW.sale_date
+        BEGIN
+            {add_to_day.format(day="OLD.sale_date", value=sale_total)}
+            {add_to_day.format(day="NEW.sale_date", value=f"-{sale_total}")}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_sales_delete_value BEFORE DELETE ON sales
+        BEGIN
+            {add_to_day.format(day="OLD.sale_date", value=sale_total)}
+        END""",
+    ]
+    for sql in triggers:
+        cursor.execute(sql)
+    cursor.execute("DELETE FROM product_stock_value")
+    cursor.execute("""
+        INSERT INTO product_stock_value (product_id, stock_value)
+        SELECT ib.product_id, SUM((ib.quantity - COALESCE(used.quantity_used, 0)) * ib.buying_price)
+        FROM inventory_batches ib
+        LEFT JOIN (
+            SELECT batch_id, SUM(quantity_used) AS quantity_used FROM sale_batches GROUP BY batch_id
+        ) used ON used.batch_id = ib.batch_id
+        WHERE ib.product_id IS NOT NULL
+        GROUP BY ib.product_id
+    """)
+    cursor.execute("DELETE FROM stock_value_changes")
+    cursor.execute("""
+        INSERT INTO stock_value_changes (change_date, value_change)
+        SELECT day, SUM(value_change)
+        FROM (
+            SELECT purchase_date AS day, quantity * buying_price AS value_change
+            FROM inventory_batches
+            UNION ALL
+            SELECT s.sale_date, -sb.quantity_used * ib.buying_price
+            FROM sale_batches sb
+            JOIN sales s ON s.sale_id = sb.sale_id
+            JOIN inventory_batches ib ON ib.batch_id = sb.batch_id
+        )
+        WHERE day IS NOT NULL
+        GROUP BY day
+    """)
+
+def add_batch_remaining_quantity(cursor):
+    """Track what is left of each batch in inventory_batches.remaining_quantity, indexed while above zero."""
+    cursor.execute("PRAGMA table_info(inventory_batches)")
+    if "remaining_quantity" not in [column[1] for column in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE inventory_batches ADD COLUMN remaining_quantity INTEGER NOT NULL DEFAULT 0")
+    batch_allocation.rebuild_remaining_quantities(cursor)
+    batch_allocation.create_remaining_triggers(cursor)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_batches_open
+        ON inventory_batches(product_id, unit_id, purchase_date) WHERE remaining_quantity > 0
+    """)
+
+def _repoint_duplicate_products(cursor):
+    """List every product repeating an older one's identity in temp.product_merges and move its batches and sales to the oldest copy.
+
+    Missing brand, category, description or unit ids match each other, as they do in the identity index.
+    """
+    cursor.execute("""
+        CREATE TEMP TABLE product_merges AS
+        SELECT p.product_id AS duplicate_id, keep.keep_id
+        FROM products p
+        JOIN (
+            SELECT MIN(product_id) AS keep_id, product_name, brand_id, category_id, description_id, unit_id
+            FROM products
+            GROUP BY product_name, brand_id, category_id, description_id, unit_id
+            HAVING COUNT(*) > 1
+        ) keep ON p.product_name = keep.product_name AND p.brand_id IS keep.brand_id
+              AND p.category_id IS keep.category_id AND p.description_id IS keep.description_id
+              AND p.unit_id IS keep.unit_id AND p.product_id <> keep.keep_id
+    """)
+    for table in ("inventory_batches", "sales"):
+        cursor.execute(f"""
+            UPDATE {table}
+            SET product_id = (SELECT keep_id FROM temp.product_merges WHERE duplicate_id = {table}.product_id)
+            WHERE product_id IN (SELECT duplicate_id FROM temp.product_merges)
+        """)
+
+def add_product_identity_index(cursor):
+    """Make each name, brand, category, description and unit combination a single product, so imports can INSERT OR IGNORE."""
+    # Fold duplicates into the oldest copy: its batches, sales and stock move over before the copy goes
+    _repoint_duplicate_products(cursor)
+    cursor.execute("""
+        INSERT INTO inventory (product_id, quantity)
+        SELECT m.keep_id, SUM(i.quantity)
+        FROM inventory i JOIN temp.product_merges m ON m.duplicate_id = i.product_id
+        WHERE true
+        GROUP BY m.keep_id
+        ON CONFLICT(product_id) DO UPDATE SET quantity = quantity + excluded.quantity
+    """)
+    for table in ("inventory", "product_stock_value", "products"):
+        cursor.execute(f"DELETE FROM {table} WHERE product_id IN (SELECT duplicate_id FROM temp.product_merges)")
+    cursor.execute("DROP TABLE temp.product_merges")
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_products_identity
+        ON products(product_name, brand_id, category_id, description_id, unit_id)
+    """)
+
+def add_dimension_versions(cursor):
+    """Count changes to each lookup table in dimension_versions so dimension_cache knows when to reload it."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS dimension_versions (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    """)
+    for table in dimension_cache.DIMENSION_TABLES:
+        cursor.execute("INSERT OR IGNORE INTO dimension_versions (table_name) VALUES (?)", (table,))
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_version AFTER {event} ON {table}
+                BEGIN
+                    UPDATE dimension_versions SET version = version + 1 WHERE table_name = '{table}';
+                END
+            """)
+
+def add_stock_ledger(cursor):
+    """Record every stock change in an append-only stock_movements ledger, with inventory and month-end checkpoints derived from it."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stock_movements (
+            movement_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_id INTEGER,  -- No foreign key: the ledger outlives deleted products
+            quantity INTEGER NOT NULL,
+            movement_date TEXT,
+            reason TEXT NOT NULL,
+            source_id INTEGER,
+            recorded_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_stock_movements_date
+        ON stock_movements(movement_date, product_id, quantity)
+    """)
+    cursor.execute("CREATE TABLE IF NOT EXISTS stock_checkpoints (checkpoint_date TEXT PRIMARY KEY) WITHOUT ROWID")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stock_checkpoint_levels (
+            checkpoint_date TEXT NOT NULL,
+            product_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL,
+            PRIMARY KEY (checkpoint_date, product_id)
+        ) WITHOUT ROWID
+    """)
+    # Start the ledger from the purchase and sale history, in date order
+    cursor.execute("""
+        INSERT INTO stock_movements (product_id, quantity, movement_date, reason, source_id)
+        SELECT product_id, quantity, movement_date, reason, source_id FROM (
+            SELECT product_id, quantity, purchase_date AS movement_date, ? AS reason, batch_id AS source_id
+            FROM inventory_batches WHERE product_id IS NOT NULL
+            UNION ALL
+            SELECT product_id, -quantity_sold, sale_date, ?, sale_id
+            FROM sales WHERE product_id IS NOT NULL
+        )
+        ORDER BY movement_date, reason, source_id
+    """, (stock_ledger.PURCHASE, stock_ledger.SALE))
+    # Stock the history does not explain (e.g. batches deleted in full after sales drew on them) is
+    # carried over as one adjustment per product, so inventory is unchanged
+    cursor.execute("""
+        INSERT INTO stock_movements (product_id, quantity, movement_date, reason)
+        SELECT product_id, SUM(quantity), ?, ?
+        FROM (
+            SELECT product_id, quantity FROM inventory WHERE product_id IS NOT NULL
+            UNION ALL
+            SELECT product_id, -quantity FROM stock_movements
+        )
+        GROUP BY product_id
+        HAVING SUM(quantity) <> 0
+    """, (date.today().isoformat(), stock_ledger.ADJUSTMENT))
+    stock_ledger.rebuild_inventory(cursor)
+    stock_ledger.create_ledger_triggers(cursor)
+    stock_ledger.create_append_only_triggers(cursor)
+    stock_ledger.add_due_checkpoints(cursor)
+
+def add_stock_value_total(cursor):
+    """Keep the value of all stock on hand in a single stock_value_total row, so reading it does not sum every product."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stock_value_total (
+            total_id INTEGER PRIMARY KEY CHECK (total_id = 1),
+            stock_value REAL NOT NULL DEFAULT 0
+        )
+    """)
+    # Recreate every valuation trigger, so the ones migration 6 created give way to the current set
+    stock_valuation.drop_valuation_triggers(cursor)
+    stock_valuation.create_valuation_triggers(cursor)
+    stock_valuation.rebuild_stock_valuation(cursor)
+
+def index_missing_product_ids(cursor):
+    """Treat a missing brand, category, description or unit id as one value in the products identity index, merging products that repeat."""
+    # Fold duplicates into the oldest copy. stock_movements is append-only, so a duplicate's stock
+    # moves over as a pair of adjustments dated today, like the ledger's opening adjustments
+    _repoint_duplicate_products(cursor)
+    cursor.execute("""
+        SELECT m.duplicate_id, m.keep_id, i.quantity
+        FROM temp.product_merges m JOIN inventory i ON i.product_id = m.duplicate_id
+    """)
+    today = date.today().isoformat()
+    movements = []
+    for duplicate_id, keep_id, quantity in cursor.fetchall():
+        movements.append((duplicate_id, -quantity, today, stock_ledger.ADJUSTMENT, None))
+        movements.append((keep_id, quantity, today, stock_ledger.ADJUSTMENT, None))
+    stock_ledger.record_movements(cursor, movements)
+    for table in ("product_stock_value", "products"):
+        cursor.execute(f"DELETE FROM {table} WHERE product_id IN (SELECT duplicate_id FROM temp.product_merges)")
+    cursor.execute("DROP TABLE temp.product_merges")
+    # A plain UNIQUE index treats NULLs as distinct, so INSERT OR IGNORE never skipped a product missing an id
+    cursor.execute("DROP INDEX IF EXISTS idx_products_identity")
+    cursor.execute("""
+        CREATE UNIQUE INDEX idx_products_identity
+        ON products(product_name, COALESCE(brand_id, -1), COALESCE(category_id, -1),
+                    COALESCE(description_id, -1), COALESCE(unit_id, -1))
+    """)
+
+MIGRATIONS = [
+    (1, add_lookup_indexes),
+    (2, add_product_change_log),
+    (3, add_report_covering_indexes),
+    (4, add_cost_of_goods_index),
+    (5, add_daily_summary),
+    (6, add_stock_valuation),
+    (7, add_batch_remaining_quantity),
+    (8, add_product_identity_index),
+    (9, add_dimension_versions),
+    (10, add_stock_ledger),
+    (11, add_stock_value_total),
+    (12, index_missing_product_ids),
+]
+
+def get_schema_version(conn):
+    """Return the number of the last migration applied to the database."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def run_migrations(conn):
+    """Apply pending migrations, each in its own transaction."""
+    cursor = conn.cursor()
+    version = get_schema_version(conn)
+    for number, migration in MIGRATIONS:
+        if number <= version:
+            continue
+        database_pool.begin_write(conn)
+        migration(cursor)
+        cursor.execute(f"PRAGMA user_version = {number}")
+        conn.commit()
+        print(f"Applied migration {number}: {migration.__doc__}")
+
+def ensure_schema():
+    """Create missing tables and apply pending migrations if the database is behind this code, and restore missing derived-table triggers."""
+    if not os.path.exists(database_pool.DB_NAME) or get_schema_version(database_pool.get_reader()) < MIGRATIONS[-1][0]:
+        create_tables()
+    restore_derived_triggers()
+
+# --- Derived Table Triggers ---
+# Remaining quantities, daily_summary, stock valuation, inventory and the stock checkpoints are kept
+# by triggers. A bulk load may drop them and rebuild the tables once instead.
+def derived_trigger_names():
+    """Return the names of every trigger maintaining a derived table, including the ledger's append-only guards."""
+    return (list(batch_allocation.REMAINING_TRIGGERS) + list(daily_summary.SUMMARY_TRIGGERS)
+            + list(stock_valuation.VALUATION_TRIGGERS) + list(stock_ledger.LEDGER_TRIGGERS)
+            + list(stock_ledger.APPEND_ONLY_TRIGGERS))
+
+def drop_derived_triggers(cursor):
+    """Drop the triggers behind remaining quantities, daily_summary, stock valuation, inventory and stock checkpoints."""
+    batch_allocation.drop_remaining_triggers(cursor)
+    daily_summary.drop_summary_triggers(cursor)
+    stock_valuation.drop_valuation_triggers(cursor)
+    stock_ledger.drop_ledger_triggers(cursor)
+
+def rebuild_derived_tables(cursor):
+    """Recompute remaining quantities, daily_summary, stock valuation, inventory and stock checkpoints, then restore their triggers."""
+    batch_allocation.rebuild_remaining_quantities(cursor)
+    daily_summary.rebuild_daily_summary(cursor)
+    stock_valuation.rebuild_stock_valuation(cursor)
+    stock_ledger.rebuild_inventory(cursor)
+    stock_ledger.rebuild_checkpoints(cursor)
+    batch_allocation.create_remaining_triggers(cursor)
+    daily_summary.create_summary_triggers(cursor)
+    stock_valuation.create_valuation_triggers(cursor)
+    stock_ledger.create_ledger_triggers(cursor)
+    stock_ledger.create_append_only_triggers(cursor)
+
+def restore_derived_triggers():
+    """Rebuild the derived tables and recreate their triggers if any trigger is missing, e.g. after a bulk load was killed."""
+    cursor = database_pool.get_reader().cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+    missing = set(derived_trigger_names()) - {row[0] for row in cursor.fetchall()}
+    if not missing:
+        return
+    conn = database_pool.acquire_writer()
+    try:
+        database_pool.begin_write(conn)
+        rebuild_derived_tables(conn.cursor())
+        conn.commit()
+        print(f"Restored {len(missing)} missing triggers and rebuilt the tables they maintain.")
+    except sqlite3.Error as e:
+        conn.rollback()
+        print(f"Error restoring triggers: {e}")
+    finally:
+        database_pool.release_writer(conn)
+
+# --- Query Plan Self-Check ---
+# Keyed lookups run by the modules on every save, edit and report; none may fall back to a table scan.
+KNOWN_QUERIES = {
+    "stock by product": (
+        "SELECT quantity FROM inventory WHERE product_id = ?", (1,)),
+    "open batches for product and unit": (batch_allocation.OPEN_BATCHES_QUERY, (1, 1, "2025-01-01")),
+    "sale batches by sale": (
+        "SELECT batch_id, unit_id FROM sale_batches WHERE sale_id = ?", (1,)),
+    "sale batches by batch": (
+        "SELECT sale_batch_id FROM sale_batches WHERE batch_id = ?", (1,)),
+    "revenue by day": ("""
+        SELECT sale_date, SUM(selling_price * quantity_sold) FROM sales
+        WHERE sale_date >= ? AND sale_date < ? GROUP BY sale_date
+    """, ("2025-01-01", "2026-01-01")),
+    "cost of goods by day": ("""
+        SELECT s.sale_date, SUM(sb.quantity_used * sb.buying_price)
+        FROM sales s JOIN sale_batches sb ON sb.sale_id = s.sale_id
+        WHERE s.sale_date >= ? AND s.sale_date < ? GROUP BY s.sale_date
+    """, ("2025-01-01", "2026-01-01")),
+    "daily summary by date range": (
+        "SELECT summary_date, revenue, cost_of_goods, expenses FROM daily_summary WHERE summary_date >= ? AND summary_date < ?",
+        ("2025-01-01", "2026-01-01")),
+    "stock value": (
+        "SELECT stock_value FROM stock_value_total WHERE total_id = 1", ()),
+    "stock value as of date": (
+        "SELECT SUM(value_change) FROM stock_value_changes WHERE change_date <= ?", ("2025-01-01",)),
+    "stock as of date": (
+        stock_ledger.AS_OF_QUERY.format(product_filter="product_id IS NOT NULL"),
+        {"checkpoint": "2024-12-31", "as_of": "2025-01-15"}),
+    "stock of one product as of date": (
+        stock_ledger.AS_OF_QUERY.format(product_filter="product_id = :product_id"),
+        {"checkpoint": "2024-12-31", "as_of": "2025-01-15", "product_id": 1}),
+    "expenses by day": ("""
+        SELECT expense_date, SUM(amount) FROM expenses
+        WHERE expense_date >= ? AND expense_date < ? GROUP BY expense_date
+    """, ("2025-01-01", "2026-01-01")),
+    "unit by name": (
+        "SELECT unit_id FROM units_of_measurement WHERE unit_name = ?", ("piece",)),
+    "brand by name": (
+        "SELECT brand_id FROM brands WHERE brand_name = ?", ("Hima",)),
+    "category by name": (
+        "SELECT category_id FROM categories WHERE category_name = ?", ("Plumbing",)),
+    "description by text": (
+        "SELECT description_id FROM descriptions WHERE description_text = ?", ("Claw hammer",)),
+    "expense category by name": (
+        "SELECT expense_category_id FROM expense_categories WHERE category_name = ?", ("Utilities",)),
+    "sales history page": (
+        history.page_query(history.SALES_PAGE_QUERY, "sale_id", before_id=1000)[0], {"key": 1000, "limit": 200}),
+    "restocking history page": (
+        history.page_query(history.BATCHES_PAGE_QUERY, "batch_id", before_id=1000)[0], {"key": 1000, "limit": 200}),
+}
+
+def check_query_plans(conn):
+    """Return (query name, plan detail) for every known query whose plan scans a table."""
+    failures = []
+    cursor = conn.cursor()
+    # EXPLAIN never checks the schema cookie, so read once to pick up indexes added by other connections
+    cursor.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+    for name, (sql, params) in KNOWN_QUERIES.items():
+        # Scanning the rows of a subquery or a WITH clause is fine; only table scans count
+        own_rows = {f"SCAN {cte}" for cte in re.findall(r"(?:WITH|,)\s*(\w+)\s+AS\s*\(", sql, re.IGNORECASE)}
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        for row in cursor.fetchall():
+            detail = row[-1]
+            if detail.startswith("SCAN") and not detail.startswith("SCAN (subquery") and detail not in own_rows:
+                failures.append((name, detail))
+    return failures
 
 if __name__ == "__main__":
-    create_tables()
\ No newline at end of file
+    create_tables()
+    if "--check-plans" in sys.argv:
+        failures = check_query_plans(database_pool.get_reader())
+        for name, detail in failures:
+            print(f"Query '{name}' falls back to a scan: {detail}")
+        if failures:
+            sys.exit(1)
+        print(f"All {len(KNOWN_QUERIES)} known queries are index-backed.")
\ No newline at end of file
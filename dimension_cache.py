@@ -0,0 +1,98 @@
+import database_pool
+from database_pool import get_reader
+
+# Name <-> id maps for the lookup tables every save resolves names against. A table is loaded on
+# first use and reloaded only after its row in dimension_versions moves, which triggers do on
+# every insert, rename or delete (see database_setup.add_dimension_versions). PRAGMA
+# data_version gates that check, so a lookup costs one pragma unless another connection has
+# committed since the last one.
+
+# Lookup table -> (id column, name column)
+DIMENSION_TABLES = {
+    "units_of_measurement": ("unit_id", "unit_name"),
+    "brands": ("brand_id", "brand_name"),
+    "categories": ("category_id", "category_name"),
+    "descriptions": ("description_id", "description_text"),
+    "expense_categories": ("expense_category_id", "category_name"),
+}
+
+class DimensionCache:
+    """Cached name -> id and id -> name maps for one lookup table."""
+
+    def __init__(self, table):
+        self.table = table
+        self.ids = {}  # name -> id
+        self.names = {}  # id -> name, in id order
+        self.version = None  # dimension_versions.version this load reflects; None until loaded
+
+    def load(self, cursor, version):
+        id_column, name_column = DIMENSION_TABLES[self.table]
+        cursor.execute(f"SELECT {id_column}, {name_column} FROM {self.table} ORDER BY {id_column}")
+        self.names = dict(cursor.fetchall())
+        self.ids = {name: dimension_id for dimension_id, name in self.names.items()}
+        self.version = version
+
+caches = {table: DimensionCache(table) for table in DIMENSION_TABLES}
+_database = None  # database_pool.DB_NAME the caches were loaded from; versions only compare within one file
+_last_check = None  # (reader connection, PRAGMA data_version) at the last check; data_version is per connection
+_versions = {}  # table -> dimension_versions.version at the last check
+
+def refresh():
+    """Reload the tables whose dimension_versions row moved since the last check."""
+    global _database, _last_check, _versions
+    if database_pool.DB_NAME != _database:
+        invalidate()
+        _database = database_pool.DB_NAME
+    conn = get_reader()
+    cursor = conn.cursor()
+    check = (conn, cursor.execute("PRAGMA data_version").fetchone()[0])
+    if check == _last_check:
+        return
+    _last_check = check
+    _versions = dict(cursor.execute("SELECT table_name, version FROM dimension_versions").fetchall())
+
+def get_cache(table):
+    """Return the up-to-date DimensionCache for table."""
+    refresh()
+    cache = caches[table]
+    version = _versions.get(table, 0)
+    if cache.version != version:
+        cache.load(get_reader().cursor(), version)
+    return cache
+
+def get_id(table, name):
+    """Return the id of name in table, or None if there is no such row."""
+    return get_cache(table).ids.get(name)
+
+def get_ids(table):
+    """Return table's {name: id} map; treat it as read-only."""
+    return get_cache(table).ids
+
+def get_names(table):
+    """Return table's names in id order, e.g. for Combobox values."""
+    return list(get_cache(table).names.values())
+
+def get_or_create_id(cursor, table, name):
+    """Return the id of name in table, inserting it with cursor (inside the caller's write transaction) if it is new.
+
+    Rows inserted here reach the cache through the version bump once the transaction commits,
+    so a rolled-back insert never leaves a stale id behind.
+    """
+    dimension_id = get_id(table, name)
+    if dimension_id is not None:
+        return dimension_id
+    id_column, name_column = DIMENSION_TABLES[table]
+    # Not committed yet as far as the cache knows; an earlier insert in this transaction may have added it
+    cursor.execute(f"SELECT {id_column} FROM {table} WHERE {name_column} = ?", (name,))
+    found = cursor.fetchone()
+    if found:
+        return found[0]
+    cursor.execute(f"INSERT INTO {table} ({name_column}) VALUES (?)", (name,))
+    return cursor.lastrowid
+
+def invalidate(table=None):
+    """Forget the cached rows of table, or of every table, so the next lookup reloads them."""
+    global _last_check
+    _last_check = None
+    for cache in caches.values() if table is None else [caches[table]]:
+        cache.version = None
@@ -1,14 +1,13 @@
 import tkinter as tk
 from tkinter import ttk, font, messagebox
-import sqlite3
 from datetime import datetime
+from inventory_service import ServiceError, save_expense, delete_expense
+from database_setup import ensure_schema
 import locale
 
 # Set locale for currency formatting
 locale.setlocale(locale.LC_ALL, '')
 
-DB_NAME = "database.db"
-
 # --- Static Category-to-Expense Mapping ---
 CATEGORY_EXPENSE_MAP = {
     "Staff & Employee Costs": [
@@ -76,74 +75,6 @@ CATEGORY_EXPENSE_MAP = {
 # --- Session Data ---
 session_expenses = []  # List to store (expense_id, category_name, predefined_expense, description, amount, expense_date) for current session
 
-# --- Helper Functions ---
-def save_expense(expense_id, category_name, predefined_expense, description, amount, expense_date):
-    """Save or update expense data in expenses table."""
-    conn = sqlite3.connect(DB_NAME, timeout=10)
-    conn.execute("PRAGMA foreign_keys = ON;")
-    cursor = conn.cursor()
-    try:
-        conn.execute("BEGIN TRANSACTION")
-        # Get or insert category_id
-        cursor.execute("SELECT expense_category_id FROM expense_categories WHERE category_name = ?", (category_name,))
-        category_id = cursor.fetchone()
-        if not category_id:
-            cursor.execute("INSERT INTO expense_categories (category_name) VALUES (?)", (category_name,))
-            category_id = cursor.lastrowid
-        else:
-            category_id = category_id[0]
-        
-        if expense_id:  # Update existing expense
-            cursor.execute("""
-                UPDATE expenses
-                SET expense_category_id = ?, predefined_expense = ?, description = ?, amount = ?, expense_date = ?
-                WHERE expense_id = ?
-            """, (category_id, predefined_expense or None, description or None, amount, expense_date, expense_id))
-        else:  # Insert new expense
-            cursor.execute("""
-                INSERT INTO expenses (expense_category_id, predefined_expense, description, amount, expense_date)
-                VALUES (?, ?, ?, ?, ?)
-            """, (category_id, predefined_expense or None, description or None, amount, expense_date))
-            expense_id = cursor.lastrowid
-        
-        conn.commit()
-        return expense_id
-    except sqlite3.OperationalError as e:
-        conn.rollback()
-        print(f"Database Error (save_expense): {e}")  # Debug log
-        messagebox.showerror("Database Error", f"Error saving expense: {e}")
-        return None
-    except sqlite3.Error as e:
-        conn.rollback()
-        print(f"Database Error (save_expense): {e}")  # Debug log
-        messagebox.showerror("Database Error", f"Error saving expense: {e}")
-        return None
-    finally:
-        conn.close()
-
-def delete_expense(expense_id):
-    """Delete an expense from the database."""
-    conn = sqlite3.connect(DB_NAME, timeout=10)
-    conn.execute("PRAGMA foreign_keys = ON;")
-    cursor = conn.cursor()
-    try:
-        conn.execute("BEGIN TRANSACTION")
-        cursor.execute("DELETE FROM expenses WHERE expense_id = ?", (expense_id,))
-        conn.commit()
-        return True
-    except sqlite3.OperationalError as e:
-        conn.rollback()
-        print(f"Database Error (delete_expense): {e}")  # Debug log
-        messagebox.showerror("Database Error", f"Error deleting expense: {e}")
-        return False
-    except sqlite3.Error as e:
-        conn.rollback()
-        print(f"Database Error (delete_expense): {e}")  # Debug log
-        messagebox.showerror("Database Error", f"Error deleting expense: {e}")
-        return False
-    finally:
-        conn.close()
-
 def edit_selected():
     global has_unsaved_changes
     selected = tree.selection()
@@ -166,12 +97,17 @@ def delete_selected():
         return
     values = tree.item(selected[0])['values']
     expense_id = values[0]  # expense_id
-    if delete_expense(expense_id):
-        global session_expenses
-        session_expenses = [exp for exp in session_expenses if exp[0] != expense_id]
-        refresh_tree()
-        clear_form()
-        has_unsaved_changes = False
+    try:
+        delete_expense(expense_id)
+    except ServiceError as e:
+        print(f"{e.title} (delete_expense): {e}")  # Debug log
+        messagebox.showerror(e.title, str(e))
+        return
+    global session_expenses
+    session_expenses = [exp for exp in session_expenses if exp[0] != expense_id]
+    refresh_tree()
+    clear_form()
+    has_unsaved_changes = False
 
 def save_data():
     global has_unsaved_changes
@@ -208,15 +144,19 @@ def save_data():
     
     # Save or update expense in database
     expense_id = expense_id_var.get()
-    new_expense_id = save_expense(expense_id, category_name, predefined_expense, description, amount, expense_date)
-    if new_expense_id:
-        if expense_id:  # Update existing in session_expenses
-            session_expenses = [exp for exp in session_expenses if exp[0] != int(expense_id)]
-        # Append to session_expenses
-        session_expenses.append((new_expense_id, category_name, predefined_expense, description, amount, expense_date))
-        refresh_tree()
-        clear_form()
-        has_unsaved_changes = False
+    try:
+        new_expense_id = save_expense(expense_id, category_name, predefined_expense, description, amount, expense_date)
+    except ServiceError as e:
+        print(f"{e.title} (save_expense): {e}")  # Debug log
+        messagebox.showerror(e.title, str(e))
+        return
+    if expense_id:  # Update existing in session_expenses
+        session_expenses = [exp for exp in session_expenses if exp[0] != int(expense_id)]
+    # Append to session_expenses
+    session_expenses.append((new_expense_id, category_name, predefined_expense, description, amount, expense_date))
+    refresh_tree()
+    clear_form()
+    has_unsaved_changes = False
 
 def clear_form():
     expense_id_var.set("")
@@ -231,6 +171,7 @@ def clear_form():
     has_unsaved_changes = False
 
 # --- UI Setup ---
+ensure_schema()
 root = tk.Tk()
 root.title("Expenses Recording Module")
 root.geometry("800x600")
@@ -1,8 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, font
-import sqlite3
-
-DB_NAME = "database.db"
+from database_pool import get_reader
+from database_setup import ensure_schema
 
 # --- Static Category-to-Expense Mapping ---
 CATEGORY_EXPENSE_MAP = {
@@ -71,19 +70,17 @@ CATEGORY_EXPENSE_MAP = {
 # --- Helper Function ---
 def fetch_expenses():
     """Fetch all expenses from database for Treeview display."""
-    conn = sqlite3.connect(DB_NAME, timeout=10)
-    conn.execute("PRAGMA foreign_keys = ON;")
-    cursor = conn.cursor()
+    cursor = get_reader().cursor()
     cursor.execute("""
         SELECT e.expense_id, ec.category_name, e.predefined_expense, e.description, e.amount, e.expense_date
         FROM expenses e
         JOIN expense_categories ec ON e.expense_category_id = ec.expense_category_id
     """)
     rows = cursor.fetchall()
-    conn.close()
     return rows
 
 # --- UI Setup ---
+ensure_schema()
 root = tk.Tk()
 root.title("Expenses History")
 root.geometry("800x600")
@@ -0,0 +1,11 @@
+# Business operations without any Tkinter: each raises a ServiceError subclass instead of showing
+# a dialog, and commits or rolls back its own transaction. The Tk modules are thin clients that
+# show e.title and str(e); scripts, benchmarks and worker processes import from here directly.
+from inventory_service.errors import ServiceError, ValidationError, NotFoundError, InsufficientStockError, DatabaseError
+from inventory_service.transactions import write_transaction
+from inventory_service.sales import save_sale, save_basket, delete_sale
+from inventory_service.restocking import save_restock, delete_batch
+from inventory_service.expenses import save_expense, delete_expense
+from inventory_service.products import onboard_products, update_product, count_product_references, delete_product
+from inventory_service.history import get_sales_history, get_inventory_batches
+from profit_loss_data import get_profit_data, get_report_years
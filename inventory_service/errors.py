@@ -0,0 +1,24 @@
+class ServiceError(Exception):
+    """An operation was refused or failed; title is a short heading for an error dialog."""
+    title = "Error"
+
+    def __init__(self, message, title=None):
+        super().__init__(message)
+        if title is not None:
+            self.title = title
+
+class ValidationError(ServiceError):
+    """An argument is not valid, e.g. an unknown unit or a malformed id."""
+    title = "Invalid Data"
+
+class NotFoundError(ServiceError):
+    """A sale, batch or other record the operation needs does not exist."""
+    title = "Not Found"
+
+class InsufficientStockError(ServiceError):
+    """There is not enough stock to cover a sale."""
+    title = "Insufficient Stock"
+
+class DatabaseError(ServiceError):
+    """SQLite reported an error; the transaction was rolled back."""
+    title = "Database Error"
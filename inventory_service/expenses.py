@@ -0,0 +1,27 @@
+from dimension_cache import get_or_create_id
+from inventory_service.transactions import write_transaction
+
+def save_expense(expense_id, category_name, predefined_expense, description, amount, expense_date):
+    """Save or update an expense, adding its category if it is new. Returns the expense's id."""
+    with write_transaction("saving expense") as cursor:
+        # Get or insert category_id
+        category_id = get_or_create_id(cursor, "expense_categories", category_name)
+        
+        if expense_id:  # Update existing expense
+            cursor.execute("""
+                UPDATE expenses
+                SET expense_category_id = ?, predefined_expense = ?, description = ?, amount = ?, expense_date = ?
+                WHERE expense_id = ?
+            """, (category_id, predefined_expense or None, description or None, amount, expense_date, expense_id))
+        else:  # Insert new expense
+            cursor.execute("""
+                INSERT INTO expenses (expense_category_id, predefined_expense, description, amount, expense_date)
+                VALUES (?, ?, ?, ?, ?)
+            """, (category_id, predefined_expense or None, description or None, amount, expense_date))
+            expense_id = cursor.lastrowid
+    return expense_id
+
+def delete_expense(expense_id):
+    """Delete an expense."""
+    with write_transaction("deleting expense") as cursor:
+        cursor.execute("DELETE FROM expenses WHERE expense_id = ?", (expense_id,))
@@ -0,0 +1,70 @@
+from database_pool import get_reader
+from paged_treeview import PAGE_SIZE
+
+# Pages are picked from the base table by key alone in the page CTE, so a page always reads
+# limit rows of it; the lookups are LEFT JOINs so no row is lost before the last key is known.
+# Rows whose product or unit no longer resolves are then left out of what is shown.
+SALES_PAGE_QUERY = """
+    WITH page AS (
+        SELECT sale_id FROM sales {where} ORDER BY sale_id {order} LIMIT :limit
+    )
+    SELECT s.sale_id, p.product_name, b.brand_name, d.description_text,
+           s.quantity_sold, s.selling_price, s.sale_date, u.unit_name
+    FROM page
+    JOIN sales s ON s.sale_id = page.sale_id
+    LEFT JOIN products p ON s.product_id = p.product_id
+    LEFT JOIN brands b ON p.brand_id = b.brand_id
+    LEFT JOIN descriptions d ON p.description_id = d.description_id
+    LEFT JOIN units_of_measurement u ON s.unit_id = u.unit_id
+    ORDER BY s.sale_id {order}
+"""
+BATCHES_PAGE_QUERY = """
+    WITH page AS (
+        SELECT batch_id FROM inventory_batches {where} ORDER BY batch_id {order} LIMIT :limit
+    )
+    SELECT ib.batch_id, p.product_name, b.brand_name, d.description_text,
+           ib.quantity, ib.buying_price, ib.purchase_date, u.unit_name
+    FROM page
+    JOIN inventory_batches ib ON ib.batch_id = page.batch_id
+    LEFT JOIN products p ON ib.product_id = p.product_id
+    LEFT JOIN brands b ON p.brand_id = b.brand_id
+    LEFT JOIN descriptions d ON p.description_id = d.description_id
+    LEFT JOIN units_of_measurement u ON ib.unit_id = u.unit_id
+    ORDER BY ib.batch_id {order}
+"""
+
+def page_query(template, key_column, before_id=None, after_id=None):
+    """Return (sql, params) for the page of template below before_id, above after_id, or the newest page."""
+    if after_id is not None:
+        return template.format(where=f"WHERE {key_column} > :key", order="ASC"), {"key": after_id}
+    if before_id is not None:
+        return template.format(where=f"WHERE {key_column} < :key", order="DESC"), {"key": before_id}
+    return template.format(where="", order="DESC"), {}
+
+def _fetch_page(template, key_column, before_id, after_id, limit):
+    sql, params = page_query(template, key_column, before_id, after_id)
+    cursor = get_reader().cursor()
+    cursor.execute(sql, dict(params, limit=limit))
+    rows = cursor.fetchall()
+    last_key = rows[-1][0] if rows else None
+    shown = [(row[0], f"{row[1]} - {row[2]} - {row[3]}", row[4], row[5], row[6], row[7])
+             for row in rows if None not in (row[1], row[2], row[3], row[7])]
+    return shown, last_key, len(rows) == limit
+
+def get_sales_history(before_id=None, after_id=None, limit=PAGE_SIZE):
+    """Fetch sales history for Treeview, one page at a time.
+
+    Pages are keyed on sale_id: the rows below before_id newest first, the rows above after_id
+    oldest first, or the newest rows when neither is given. Returns (rows, last sale_id read,
+    whether the page was full), the last two for PagedTreeview to carry on from.
+    """
+    return _fetch_page(SALES_PAGE_QUERY, "sale_id", before_id, after_id, limit)
+
+def get_inventory_batches(before_id=None, after_id=None, limit=PAGE_SIZE):
+    """Fetch inventory batches for Treeview, one page at a time.
+
+    Pages are keyed on batch_id: the rows below before_id newest first, the rows above after_id
+    oldest first, or the newest rows when neither is given. Returns (rows, last batch_id read,
+    whether the page was full), the last two for PagedTreeview to carry on from.
+    """
+    return _fetch_page(BATCHES_PAGE_QUERY, "batch_id", before_id, after_id, limit)
@@ -0,0 +1,68 @@
+from data_cache import add_products_to_cache, update_product_in_cache, remove_product_from_cache
+from database_pool import get_reader
+from dimension_cache import get_or_create_id
+from inventory_service.transactions import write_transaction
+
+def onboard_products(product_name, brands, category_name, descriptions, units):
+    """Add a product in every brand x description x unit combination, skipping combinations that already exist.
+
+    Each brand, description and unit is looked up (or added) once, and the variants go in with
+    one INSERT OR IGNORE against the products identity index. The new products are added to the
+    product cache. Returns ([(product_id, display)] for the new products, number skipped).
+    """
+    brands, descriptions, units = (list(dict.fromkeys(values)) for values in (brands, descriptions, units))
+    with write_transaction("saving products") as cursor:
+        category_id = get_or_create_id(cursor, "categories", category_name)
+        brand_ids = {brand: get_or_create_id(cursor, "brands", brand) for brand in brands}
+        description_ids = {description: get_or_create_id(cursor, "descriptions", description) for description in descriptions}
+        unit_ids = [get_or_create_id(cursor, "units_of_measurement", unit) for unit in units]
+        variants = [(product_name, brand_ids[brand], category_id, description_ids[description], unit_id)
+                    for brand in brands for description in descriptions for unit_id in unit_ids]
+        # The write lock is held, so every product above the current maximum id is one of ours
+        last_id = cursor.execute("SELECT COALESCE(MAX(product_id), 0) FROM products").fetchone()[0]
+        cursor.executemany("""
+            INSERT OR IGNORE INTO products (product_name, brand_id, category_id, description_id, unit_id)
+            VALUES (?, ?, ?, ?, ?)
+        """, variants)
+        cursor.execute("""
+            SELECT p.product_id, b.brand_name, d.description_text
+            FROM products p
+            JOIN brands b ON p.brand_id = b.brand_id
+            JOIN descriptions d ON p.description_id = d.description_id
+            WHERE p.product_id > ?
+            ORDER BY p.product_id
+        """, (last_id,))
+        new_products = [(product_id, f"{product_name} - {brand} - {description}")
+                        for product_id, brand, description in cursor.fetchall()]
+    add_products_to_cache(new_products)
+    return new_products, len(variants) - len(new_products)
+
+def update_product(product_id, product_name, brand_name, category_name, description_text):
+    """Rename a product and change its brand, category and description, keeping its unit; updates the product cache."""
+    with write_transaction("updating product") as cursor:
+        brand_id = get_or_create_id(cursor, "brands", brand_name)
+        category_id = get_or_create_id(cursor, "categories", category_name)
+        description_id = get_or_create_id(cursor, "descriptions", description_text)
+        # Update product (preserve existing unit_id)
+        cursor.execute("""
+            UPDATE products
+            SET product_name = ?, brand_id = ?, category_id = ?, description_id = ?
+            WHERE product_id = ?
+        """, (product_name, brand_id, category_id, description_id, product_id))
+    update_product_in_cache(int(product_id), f"{product_name} - {brand_name} - {description_text}")
+
+def count_product_references(product_id):
+    """Return (inventory, batch, sale) row counts for a product, to confirm before deleting it."""
+    cursor = get_reader().cursor()
+    counts = []
+    for table in ("inventory", "inventory_batches", "sales"):
+        cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE product_id = ?", (product_id,))
+        counts.append(cursor.fetchone()[0])
+    return tuple(counts)
+
+def delete_product(product_id):
+    """Delete a product and drop it from the product cache; its inventory, batches and sales are kept."""
+    with write_transaction("deleting product") as cursor:
+        # Related records remain due to no ON DELETE CASCADE
+        cursor.execute("DELETE FROM products WHERE product_id = ?", (product_id,))
+    remove_product_from_cache(product_id)
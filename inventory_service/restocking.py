@@ -0,0 +1,73 @@
+from dimension_cache import get_or_create_id
+from stock_ledger import record_movements, PURCHASE, PURCHASE_REVERSAL
+from inventory_service.errors import ValidationError, NotFoundError
+from inventory_service.transactions import write_transaction
+
+def save_restock(batch_id, product_id, quantity, buying_price, purchase_date, unit_name):
+    """Save or update a batch in inventory_batches and update inventory.
+
+    batch_id is None or empty for a new batch; a unit not seen before is added. Returns the batch's id.
+    """
+    with write_transaction("saving restock") as cursor:
+        # Get unit_id, adding the unit if it is new
+        unit_id = get_or_create_id(cursor, "units_of_measurement", unit_name)
+        
+        if batch_id:  # Update existing batch
+            # Get old quantity for inventory adjustment
+            cursor.execute("""
+                SELECT product_id, quantity, remaining_quantity, purchase_date FROM inventory_batches WHERE batch_id = ?
+            """, (batch_id,))
+            batch = cursor.fetchone()
+            if not batch:
+                raise NotFoundError("Batch record not found.", "Invalid Batch")
+            old_product_id, old_quantity, remaining_quantity, old_purchase_date = batch
+            sold_quantity = old_quantity - remaining_quantity
+            if quantity < sold_quantity:
+                raise ValidationError(f"{sold_quantity} units of this batch are already sold; quantity cannot be lower.",
+                                      "Invalid Quantity")
+            if sold_quantity and product_id != old_product_id:
+                raise ValidationError(f"{sold_quantity} units of this batch are already sold; it cannot move to another product.",
+                                      "Invalid Product")
+            cursor.execute("""
+                SELECT MIN(s.sale_date) FROM sale_batches sb JOIN sales s ON s.sale_id = sb.sale_id WHERE sb.batch_id = ?
+            """, (batch_id,))
+            first_sale_date = cursor.fetchone()[0]
+            if first_sale_date is not None and purchase_date > first_sale_date:
+                raise ValidationError(f"This batch was already sold from on {first_sale_date}; it cannot be bought later than that.",
+                                      "Invalid Date")
+            cursor.execute("""
+                UPDATE inventory_batches
+                SET product_id = ?, buying_price = ?, quantity = ?, purchase_date = ?, unit_id = ?
+                WHERE batch_id = ?
+            """, (product_id, buying_price, quantity, purchase_date, unit_id, batch_id))
+            # Reverse the purchase as it was and record it as it is now
+            record_movements(cursor, [(old_product_id, -old_quantity, old_purchase_date, PURCHASE_REVERSAL, batch_id),
+                                      (product_id, quantity, purchase_date, PURCHASE, batch_id)])
+        else:  # Insert new batch
+            cursor.execute("""
+                INSERT INTO inventory_batches (product_id, buying_price, quantity, purchase_date, unit_id)
+                VALUES (?, ?, ?, ?, ?)
+            """, (product_id, buying_price, quantity, purchase_date, unit_id))
+            batch_id = cursor.lastrowid
+            record_movements(cursor, [(product_id, quantity, purchase_date, PURCHASE, batch_id)])
+    return batch_id
+
+def delete_batch(batch_id):
+    """Delete a batch none of whose units are sold yet, taking it out of inventory.
+
+    A batch that sales were drawn from is refused: its sale_batches rows carry those sales' cost.
+    """
+    with write_transaction("deleting batch") as cursor:
+        cursor.execute("SELECT product_id, remaining_quantity, purchase_date FROM inventory_batches WHERE batch_id = ?",
+                       (batch_id,))
+        batch = cursor.fetchone()
+        if not batch:
+            raise NotFoundError("Batch record not found.", "Invalid Batch")
+        product_id, remaining_quantity, purchase_date = batch
+        cursor.execute("SELECT COUNT(*) FROM sale_batches WHERE batch_id = ?", (batch_id,))
+        sales_count = cursor.fetchone()[0]
+        if sales_count:
+            raise ValidationError(f"{sales_count} sales were drawn from this batch; delete or edit them first.",
+                                  "Batch In Use")
+        cursor.execute("DELETE FROM inventory_batches WHERE batch_id = ?", (batch_id,))
+        record_movements(cursor, [(product_id, -remaining_quantity, purchase_date, PURCHASE_REVERSAL, batch_id)])
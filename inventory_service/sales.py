@@ -0,0 +1,133 @@
+from dimension_cache import get_id, get_ids
+from batch_allocation import allocate_batches, allocation_rows, record_allocation, record_sale_batches, release_sale
+from stock_ledger import record_movements, SALE, SALE_REVERSAL
+from inventory_service.errors import ValidationError, NotFoundError, InsufficientStockError
+from inventory_service.transactions import write_transaction
+
+def save_sale(sale_id, product_id, quantity_sold, selling_price, sale_date, unit_name):
+    """Save or update a sale, drawing it from the oldest batches with stock (FIFO), and update inventory.
+
+    sale_id is None or empty for a new sale. Returns the sale's id.
+    """
+    with write_transaction("saving sale") as cursor:
+        # Get unit_id
+        unit_id = get_id("units_of_measurement", unit_name)
+        if unit_id is None:
+            raise ValidationError("Selected unit is not valid.", "Invalid Unit")
+        
+        # Validate sale_id for edits
+        is_edit = False
+        if sale_id:
+            try:
+                sale_id = int(sale_id)  # Ensure sale_id is an integer
+                is_edit = True
+            except ValueError:
+                raise ValidationError("Sale ID is invalid.", "Invalid Sale ID")
+        
+        if is_edit:  # Release the old sale's stock so it can be allocated again as edited
+            cursor.execute("SELECT product_id, quantity_sold, sale_date FROM sales WHERE sale_id = ?", (sale_id,))
+            old_sale = cursor.fetchone()
+            if not old_sale:
+                raise NotFoundError("Sale record not found.", "Invalid Sale")
+            old_product_id, old_quantity_sold, old_sale_date = old_sale
+            release_sale(cursor, sale_id)
+            record_movements(cursor, [(old_product_id, old_quantity_sold, old_sale_date, SALE_REVERSAL, sale_id)])
+        
+        # Check inventory stock
+        cursor.execute("SELECT quantity FROM inventory WHERE product_id = ?", (product_id,))
+        inventory = cursor.fetchone()
+        inventory_quantity = inventory[0] if inventory else 0
+        if inventory_quantity < quantity_sold:
+            raise InsufficientStockError("Not enough inventory to fulfill this sale.")
+        
+        # Split the sale over the oldest batches with stock left (FIFO)
+        allocation = allocate_batches(cursor, product_id, unit_id, quantity_sold, sale_date)
+        if allocation is None:
+            raise InsufficientStockError("Not enough stock bought by the sale date in this product's batches for the selected unit.",
+                                         "Insufficient Batch Stock")
+        
+        if is_edit:
+            cursor.execute("""
+                UPDATE sales
+                SET product_id = ?, selling_price = ?, quantity_sold = ?, sale_date = ?, unit_id = ?
+                WHERE sale_id = ?
+            """, (product_id, selling_price, quantity_sold, sale_date, unit_id, sale_id))
+        else:
+            cursor.execute("""
+                INSERT INTO sales (product_id, selling_price, quantity_sold, sale_date, unit_id)
+                VALUES (?, ?, ?, ?, ?)
+            """, (product_id, selling_price, quantity_sold, sale_date, unit_id))
+            sale_id = cursor.lastrowid
+        record_allocation(cursor, sale_id, unit_id, allocation)
+        
+        # Update inventory
+        record_movements(cursor, [(product_id, -quantity_sold, sale_date, SALE, sale_id)])
+    return sale_id
+
+def save_basket(lines):
+    """Save a basket of (product_id, quantity_sold, selling_price, sale_date, unit_name) lines in one transaction.
+
+    Stock is checked for the whole basket before anything is written, and any failing line rolls
+    back every line. Returns the new sale ids in line order.
+    """
+    if not lines:
+        return []
+    with write_transaction("saving basket") as cursor:
+        # Get unit_ids
+        unit_ids = get_ids("units_of_measurement")
+        for line_number, (_, _, _, _, unit_name) in enumerate(lines, start=1):
+            if unit_name not in unit_ids:
+                raise ValidationError(f"Line {line_number}: selected unit is not valid.", "Invalid Unit")
+        
+        # Check inventory stock for the basket as a whole
+        wanted = {}
+        for product_id, quantity_sold, _, _, _ in lines:
+            wanted[product_id] = wanted.get(product_id, 0) + quantity_sold
+        placeholders = ", ".join("?" * len(wanted))
+        cursor.execute(f"SELECT product_id, quantity FROM inventory WHERE product_id IN ({placeholders})", list(wanted))
+        in_stock = dict(cursor.fetchall())
+        short = [product_id for product_id, quantity in wanted.items() if in_stock.get(product_id, 0) < quantity]
+        if short:
+            raise InsufficientStockError(f"Not enough inventory to fulfill this basket ({len(short)} products short).")
+        
+        # Split every line over the oldest batches with stock left (FIFO), under sale_ids assigned here
+        cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'sales'")
+        sequence = cursor.fetchone()
+        next_sale_id = (sequence[0] if sequence else 0) + 1
+        taken = {}  # Units drawn from each batch by earlier lines of this basket
+        sale_rows = []
+        sale_batch_rows = []
+        for line_number, (product_id, quantity_sold, selling_price, sale_date, unit_name) in enumerate(lines, start=1):
+            unit_id = unit_ids[unit_name]
+            allocation = allocate_batches(cursor, product_id, unit_id, quantity_sold, sale_date, taken)
+            if allocation is None:
+                raise InsufficientStockError(
+                    f"Line {line_number}: not enough stock bought by the sale date in this product's batches for the selected unit.",
+                    "Insufficient Batch Stock")
+            sale_id = next_sale_id + line_number - 1
+            sale_rows.append((sale_id, product_id, selling_price, quantity_sold, sale_date, unit_id))
+            sale_batch_rows.extend(allocation_rows(sale_id, unit_id, allocation))
+        
+        cursor.executemany("""
+            INSERT INTO sales (sale_id, product_id, selling_price, quantity_sold, sale_date, unit_id)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, sale_rows)
+        record_sale_batches(cursor, sale_batch_rows)
+        
+        # Update inventory
+        record_movements(cursor, [(product_id, -quantity_sold, sale_date, SALE, sale_id)
+                                  for sale_id, product_id, _, quantity_sold, sale_date, _ in sale_rows])
+    return [row[0] for row in sale_rows]
+
+def delete_sale(sale_id):
+    """Delete a sale, returning its stock to its batches and to inventory."""
+    with write_transaction("deleting sale") as cursor:
+        cursor.execute("SELECT product_id, quantity_sold, sale_date FROM sales WHERE sale_id = ?", (sale_id,))
+        sale = cursor.fetchone()
+        if not sale:
+            raise NotFoundError("Sale record not found.", "Invalid Sale")
+        product_id, quantity_sold, sale_date = sale
+        # Return the sale's stock to its batches first
+        release_sale(cursor, sale_id)
+        cursor.execute("DELETE FROM sales WHERE sale_id = ?", (sale_id,))
+        record_movements(cursor, [(product_id, quantity_sold, sale_date, SALE_REVERSAL, sale_id)])
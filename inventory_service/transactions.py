@@ -0,0 +1,24 @@
+import sqlite3
+from contextlib import contextmanager
+from database_pool import acquire_writer, release_writer, begin_write
+from inventory_service.errors import DatabaseError
+
+@contextmanager
+def write_transaction(action):
+    """Yield a cursor inside a write transaction, committing on success and rolling back on any error.
+
+    SQLite errors are re-raised as DatabaseError("Error <action>: ..."), e.g. action="saving sale".
+    """
+    conn = acquire_writer()
+    try:
+        begin_write(conn)
+        yield conn.cursor()
+        conn.commit()
+    except sqlite3.Error as e:
+        conn.rollback()
+        raise DatabaseError(f"Error {action}: {e}") from e
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        release_writer(conn)
@@ -0,0 +1,256 @@
+import argparse
+import bisect
+import csv
+import sys
+import time
+import sqlite3
+from collections import deque
+from datetime import date
+import database_pool
+import batch_allocation
+import stock_ledger
+from database_setup import ensure_schema, drop_derived_triggers, rebuild_derived_tables
+from product_import import normalize_column
+
+CHUNK_SIZE = 50_000  # Ledger rows buffered before each batch of inserts
+SALE_TYPES = {"sale", "sold"}
+PURCHASE_TYPES = {"purchase", "restock", "bought"}
+MAX_REPORTED_ERRORS = 20  # Rejected rows listed by the command line; the rest are only counted
+
+PRODUCT_KEYS_QUERY = """
+    SELECT p.product_id, p.product_name, b.brand_name, d.description_text, u.unit_name, u.unit_id
+    FROM products p
+    JOIN brands b ON p.brand_id = b.brand_id
+    JOIN descriptions d ON p.description_id = d.description_id
+    JOIN units_of_measurement u ON p.unit_id = u.unit_id
+"""
+
+def next_id(cursor, table):
+    """Return the id AUTOINCREMENT would give the next row of table."""
+    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,))
+    sequence = cursor.fetchone()
+    return (sequence[0] if sequence else 0) + 1
+
+class LedgerImporter:
+    """Turn ledger rows into inventory_batches, sales, sale_batches and stock_movements rows.
+
+    Rows are applied in file order: a purchase opens a batch, and a sale draws on the open
+    batches of its product and unit bought by its date, oldest first, starting with the batches
+    already in the database. Batch stock is tracked in memory, since the remaining_quantity triggers are off
+    while importing. Rows are buffered until flush() writes them with executemany.
+    """
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.products = {}  # (name, brand, description, unit) -> (product_id, unit_id)
+        for product_id, name, brand, description, unit, unit_id in cursor.execute(PRODUCT_KEYS_QUERY):
+            self.products[(name, brand, description, unit)] = (product_id, unit_id)
+        self.open_batches = {}  # (product_id, unit_id) -> deque of [batch_id, remaining, buying_price, purchase_date], oldest first
+        self.stock = {}  # (product_id, unit_id) -> units left across its open batches
+        self.errors = []  # (line number, reason) for every rejected row
+        self.sales = self.purchases = 0
+        self._clear()
+
+    def _clear(self):
+        self.batch_rows = []
+        self.sale_rows = []
+        self.sale_batch_rows = []
+        self.movement_rows = []
+        self.next_batch_id = None  # Assigned from sqlite_sequence when a chunk needs the first one
+        self.next_sale_id = None
+
+    def pending(self):
+        return len(self.batch_rows) + len(self.sale_rows)
+
+    def add(self, line_number, record):
+        """Buffer one ledger row, or record why it was rejected."""
+        kind = str(record.get("type") or "").strip().lower()
+        key = tuple(str(record.get(column) or "").strip() for column in ("product", "brand", "description", "unit"))
+        product = self.products.get(key)
+        try:
+            sale_date = date.fromisoformat(str(record.get("date") or "").strip()[:10]).isoformat()
+            quantity = int(record.get("quantity") or 0)
+            price = float(str(record.get("price") or "").replace(",", ""))
+        except ValueError:
+            self.errors.append((line_number, "date, quantity or price is not valid"))
+            return
+        if product is None:
+            self.errors.append((line_number, f"unknown product {' - '.join(key)}"))
+        elif quantity <= 0 or price < 0:
+            self.errors.append((line_number, "quantity must be positive and price non-negative"))
+        elif kind in PURCHASE_TYPES:
+            self._add_purchase(product, quantity, price, sale_date)
+        elif kind in SALE_TYPES:
+            if not self._add_sale(product, quantity, price, sale_date):
+                self.errors.append((line_number, "not enough stock bought by this date in this product's batches"))
+        else:
+            self.errors.append((line_number, f"unknown type {kind!r}"))
+
+    def _batches(self, product_id, unit_id):
+        """Return the open batches of a product and unit, loading them from the database on first use."""
+        batches = self.open_batches.get((product_id, unit_id))
+        if batches is None:
+            # Every open batch; each sale skips those bought after its date
+            self.cursor.execute(batch_allocation.OPEN_BATCHES_QUERY, (product_id, unit_id, date.max.isoformat()))
+            batches = deque([batch_id, remaining, buying_price, purchase_date]
+                            for batch_id, buying_price, remaining, purchase_date in self.cursor.fetchall())
+            self.open_batches[(product_id, unit_id)] = batches
+            self.stock[(product_id, unit_id)] = sum(batch[1] for batch in batches)
+        return batches
+
+    def _add_purchase(self, product, quantity, buying_price, purchase_date):
+        product_id, unit_id = product
+        if self.next_batch_id is None:
+            self.next_batch_id = next_id(self.cursor, "inventory_batches")
+        batch_id = self.next_batch_id
+        self.next_batch_id += 1
+        self.batch_rows.append((batch_id, product_id, buying_price, quantity, purchase_date, unit_id))
+        batches = self._batches(product_id, unit_id)
+        batch = [batch_id, quantity, buying_price, purchase_date]
+        if batches and batches[-1][3] > purchase_date:  # Out of date order: keep the batches oldest first
+            batches.insert(bisect.bisect_right(batches, purchase_date, key=lambda open_batch: open_batch[3]), batch)
+        else:
+            batches.append(batch)
+        self.stock[(product_id, unit_id)] += quantity
+        self.movement_rows.append((product_id, quantity, purchase_date, stock_ledger.PURCHASE, batch_id))
+        self.purchases += 1
+
+    def _add_sale(self, product, quantity, selling_price, sale_date):
+        product_id, unit_id = product
+        batches = self._batches(product_id, unit_id)
+        if self.stock[(product_id, unit_id)] < quantity:
+            return False
+        allocation = []
+        needed = quantity
+        for batch in batches:
+            if not batch[1] or batch[3] > sale_date:
+                continue
+            used = min(batch[1], needed)
+            allocation.append((batch, used))
+            needed -= used
+            if not needed:
+                break
+        else:
+            return False
+        self.stock[(product_id, unit_id)] -= quantity
+        if self.next_sale_id is None:
+            self.next_sale_id = next_id(self.cursor, "sales")
+        sale_id = self.next_sale_id
+        self.next_sale_id += 1
+        self.sale_rows.append((sale_id, product_id, selling_price, quantity, sale_date, unit_id))
+        for batch, used in allocation:
+            self.sale_batch_rows.append((sale_id, batch[0], used, batch[2], unit_id))
+            batch[1] -= used
+        while batches and not batches[0][1]:  # Batches used up further in wait until they reach the front
+            batches.popleft()
+        self.movement_rows.append((product_id, -quantity, sale_date, stock_ledger.SALE, sale_id))
+        self.sales += 1
+        return True
+
+    def flush(self):
+        """Write the buffered rows; the caller commits."""
+        self.cursor.executemany("""
+            INSERT INTO inventory_batches (batch_id, product_id, buying_price, quantity, purchase_date, unit_id)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, self.batch_rows)
+        self.cursor.executemany("""
+            INSERT INTO sales (sale_id, product_id, selling_price, quantity_sold, sale_date, unit_id)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, self.sale_rows)
+        batch_allocation.record_sale_batches(self.cursor, self.sale_batch_rows)
+        self.cursor.executemany("""
+            INSERT INTO stock_movements (product_id, quantity, movement_date, reason, source_id)
+            VALUES (?, ?, ?, ?, ?)
+        """, self.movement_rows)
+        self._clear()
+
+def import_ledger(records, chunk_size=CHUNK_SIZE, progress=None):
+    """Import ledger records (dicts with type, date, product, brand, description, unit, quantity and price).
+
+    type is "sale" or "purchase"; price is the selling or buying price per unit. Records are
+    written chunk_size at a time with the derived-table triggers off, and remaining quantities,
+    daily_summary, stock valuation, inventory and the stock checkpoints are rebuilt once at the
+    end. It all runs in one write transaction: other windows never see the triggers missing and
+    wait (or give up with "database is locked") until the import commits, and an import that fails
+    or is killed leaves the database as it was. progress, if given, is called with (rows read,
+    importer) after each chunk. Returns the LedgerImporter, whose sales, purchases and errors say
+    what happened.
+    """
+    conn = database_pool.acquire_writer()
+    cursor = conn.cursor()
+    try:
+        database_pool.begin_write(conn)
+        try:
+            drop_derived_triggers(cursor)
+            importer = LedgerImporter(cursor)
+            rows_read = 0
+            for line_number, record in enumerate(records, start=2):  # Line 1 is the header
+                importer.add(line_number, record)
+                rows_read += 1
+                if importer.pending() >= chunk_size:
+                    importer.flush()
+                    if progress is not None:
+                        progress(rows_read, importer)
+            importer.flush()
+            rebuild_derived_tables(cursor)
+            conn.commit()
+        except Exception:
+            conn.rollback()  # Also brings back the dropped triggers
+            raise
+        if progress is not None:
+            progress(rows_read, importer)
+        return importer
+    finally:
+        database_pool.release_writer(conn)
+
+def read_ledger(path):
+    """Yield one dict per CSV row, keyed by the normalized header row."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        reader.fieldnames = [normalize_column(name) for name in reader.fieldnames or []]
+        yield from reader
+
+def main():
+    parser = argparse.ArgumentParser(description="Import historical sales and purchases from a CSV ledger.")
+    parser.add_argument("path", nargs="?", help="CSV with type, date, product, brand, description, unit, quantity and price")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Ledger rows buffered before each batch of inserts")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Only rebuild derived tables and restore their triggers")
+    args = parser.parse_args()
+    if not args.path and not args.rebuild:
+        parser.error("a ledger file is required unless --rebuild is given")
+
+    ensure_schema()
+    if args.rebuild:
+        conn = database_pool.acquire_writer()
+        try:
+            database_pool.begin_write(conn)
+            rebuild_derived_tables(conn.cursor())
+            conn.commit()
+            print("Rebuilt remaining quantities, daily_summary, stock valuation, inventory and stock checkpoints.")
+        finally:
+            database_pool.release_writer(conn)
+        if not args.path:
+            return
+
+    start = time.perf_counter()
+
+    def report(rows_read, importer):
+        elapsed = time.perf_counter() - start
+        print(f"{rows_read} rows read: {importer.sales} sales, {importer.purchases} purchases, "
+              f"{len(importer.errors)} rejected ({rows_read / elapsed * 60 if elapsed else 0:.0f} rows/min)")
+
+    try:
+        importer = import_ledger(read_ledger(args.path), args.chunk_size, report)
+    except (sqlite3.Error, OSError) as e:
+        print(f"Error importing ledger: {e}")
+        sys.exit(1)
+    for line_number, reason in importer.errors[:MAX_REPORTED_ERRORS]:
+        print(f"Line {line_number}: {reason}")
+    if len(importer.errors) > MAX_REPORTED_ERRORS:
+        print(f"... and {len(importer.errors) - MAX_REPORTED_ERRORS} more rejected rows")
+    print(f"Imported {importer.sales} sales and {importer.purchases} purchases in {time.perf_counter() - start:.1f}s, "
+          f"including rebuilding the derived tables.")
+
+if __name__ == "__main__":
+    main()
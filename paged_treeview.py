@@ -0,0 +1,130 @@
+PAGE_SIZE = 200  # Rows fetched per query
+MAX_LOADED_PAGES = 5  # Pages kept in the Treeview; further pages replace the ones at the far end
+LOAD_MARGIN = 0.1  # Fetch the next page once the view is this close (as a fraction) to either end
+
+class PagedTreeview:
+    """Keyset-paginated Treeview of newest-first rows, loaded in pages as the user scrolls.
+
+    fetch_older(key) reads up to PAGE_SIZE keys below key, newest first, or the newest keys when
+    key is None; fetch_newer(key) reads up to PAGE_SIZE keys above key, oldest first. Both return
+    (rows of (key, values), last key read, whether PAGE_SIZE keys were read) and run on task, a
+    BackgroundTask. Keys are used as Treeview iids. Paging carries on from the last key read, not
+    the last row shown, so rows a fetch leaves out never end the history early.
+
+    At most MAX_LOADED_PAGES pages are kept, so memory and redraw time stay the same however
+    long the history is: scrolling past them drops the pages at the other end, and scrolling
+    back fetches them again.
+    """
+
+    def __init__(self, tree, scrollbar, task, fetch_older, fetch_newer, on_reload=None):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.task = task
+        self.fetch_older = fetch_older
+        self.fetch_newer = fetch_newer
+        self.on_reload = on_reload  # Called with the row count once reload() shows rows or finds none, e.g. to show "No records"
+        self.reloading = False  # reload() has not yet called on_reload
+        self.max_rows = PAGE_SIZE * MAX_LOADED_PAGES
+        self.has_older = False
+        self.has_newer = False
+        self.oldest_key = None  # Key the next fetch_older() starts below
+        self.newest_key = None  # Key the next fetch_newer() starts above
+        self.loading = False
+        tree.configure(yscrollcommand=self._on_scroll)
+
+    def reload(self):
+        """Drop every loaded row and fetch the newest page."""
+        self.loading = True
+        self.task.submit(lambda: self.fetch_older(None), self._apply_first_page)
+
+    def _apply_first_page(self, page):
+        rows, last_key, full = page
+        self.tree.delete(*self.tree.get_children())
+        self._insert(rows)
+        self.has_older = full
+        self.oldest_key = last_key
+        self.has_newer = False
+        self.loading = False
+        self.tree.yview_moveto(0)
+        self.reloading = True
+        self._finish_reload()
+        if not rows:
+            self._load_older()
+
+    def _finish_reload(self):
+        """Call on_reload once the reload has shown rows, or has no older pages left to try."""
+        if self.reloading and (self.tree.get_children() or not self.has_older):
+            self.reloading = False
+            if self.on_reload is not None:
+                self.on_reload(len(self.tree.get_children()))
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if self.loading:
+            return
+        if self.has_older and float(last) >= 1 - LOAD_MARGIN:
+            self._load_older()
+        elif self.has_newer and float(first) <= LOAD_MARGIN:
+            self._load_newer()
+
+    # Also called right after a page that showed no rows, since no scrolling will ask for the next one
+    def _load_older(self):
+        if self.has_older:
+            key = self.oldest_key
+            self.loading = True
+            self.task.submit(lambda: self.fetch_older(key), self._apply_older_page)
+
+    def _load_newer(self):
+        if self.has_newer:
+            key = self.newest_key
+            self.loading = True
+            self.task.submit(lambda: self.fetch_newer(key), self._apply_newer_page)
+
+    def _apply_older_page(self, page):
+        rows, last_key, full = page
+        top = self._top_row()
+        self._insert(rows)
+        self.has_older = full
+        if last_key is not None:
+            self.oldest_key = last_key
+        children = self.tree.get_children()
+        excess = len(children) - self.max_rows
+        if excess > 0:
+            self.tree.delete(*children[:excess])
+            self.has_newer = True
+            self.newest_key = int(children[excess])
+            self._scroll_to_row(top - excess)
+        self.loading = False
+        self._finish_reload()
+        if not rows:
+            self._load_older()
+
+    def _apply_newer_page(self, page):
+        rows, last_key, full = page
+        top = self._top_row()
+        for key, values in rows:  # Oldest first, so each row goes above the previous one
+            self.tree.insert("", 0, iid=str(key), values=values)
+        self.has_newer = full
+        if last_key is not None:
+            self.newest_key = last_key
+        children = self.tree.get_children()
+        if len(children) > self.max_rows:
+            self.tree.delete(*children[self.max_rows:])
+            self.has_older = True
+            self.oldest_key = int(children[self.max_rows - 1])
+        self._scroll_to_row(top + len(rows))
+        self.loading = False
+        if not rows:
+            self._load_newer()
+
+    def _insert(self, rows):
+        for key, values in rows:
+            self.tree.insert("", "end", iid=str(key), values=values)
+
+    def _top_row(self):
+        """Return the index of the first visible row."""
+        return round(self.tree.yview()[0] * len(self.tree.get_children()))
+
+    def _scroll_to_row(self, index):
+        """Keep the same rows on screen after pages were added or dropped above them."""
+        self.tree.yview_moveto(max(index, 0) / max(len(self.tree.get_children()), 1))
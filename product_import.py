@@ -0,0 +1,175 @@
+import argparse
+import csv
+import sys
+import time
+import sqlite3
+from database_pool import acquire_writer, release_writer, begin_write
+
+try:
+    import openpyxl  # Optional: only needed to read .xlsx files
+except ImportError:
+    openpyxl = None
+
+CHUNK_SIZE = 10_000  # Product rows inserted per transaction
+HEADER_ALIASES = {
+    "product_name": "product", "brands": "brand", "category_name": "category",
+    "descriptions": "description", "description_text": "description", "units": "unit", "unit_name": "unit",
+}
+# Lookup table, id column and name column behind each product column
+LOOKUP_TABLES = {
+    "brand": ("brands", "brand_id", "brand_name"),
+    "category": ("categories", "category_id", "category_name"),
+    "description": ("descriptions", "description_id", "description_text"),
+    "unit": ("units_of_measurement", "unit_id", "unit_name"),
+}
+
+def split_values(text):
+    """Split a comma- or semicolon-separated cell into its non-empty values."""
+    text = str(text or "")
+    if "," not in text and ";" not in text:  # The usual single value
+        text = text.strip()
+        return [text] if text else []
+    return [value.strip() for value in text.replace(";", ",").split(",") if value.strip()]
+
+def normalize_column(name):
+    """Return the lower-case, singular column name for a header cell."""
+    name = str(name or "").strip().lower()
+    return HEADER_ALIASES.get(name, name)
+
+def normalize_record(record):
+    """Return record with lower-case, singular column names."""
+    return {normalize_column(key): value for key, value in record.items()}
+
+def read_csv_records(path):
+    """Yield one dict per CSV row, keyed by the normalized header row."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        reader.fieldnames = [normalize_column(name) for name in reader.fieldnames or []]
+        yield from reader
+
+def read_xlsx_records(path):
+    """Yield one dict per row of the first worksheet, keyed by its normalized header row, without loading the whole file."""
+    if openpyxl is None:
+        raise RuntimeError("Reading .xlsx files needs openpyxl (pip install openpyxl); save the sheet as CSV instead.")
+    workbook = openpyxl.load_workbook(path, read_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [normalize_column(name) for name in next(rows, ())]
+        for row in rows:
+            yield dict(zip(header, row))
+    finally:
+        workbook.close()
+
+def read_records(path):
+    """Yield product records from a .csv or .xlsx file."""
+    if path.lower().endswith(".xlsx"):
+        return read_xlsx_records(path)
+    return read_csv_records(path)
+
+def load_lookup(cursor, table, id_column, name_column):
+    """Return {name: id} for every row of a lookup table."""
+    cursor.execute(f"SELECT {name_column}, {id_column} FROM {table}")
+    return dict(cursor.fetchall())
+
+def lookup_id(cursor, ids, column, name):
+    """Return the id for name in column's lookup table, inserting it the first time it is seen."""
+    lookup = ids[column]
+    if name not in lookup:
+        table, _, name_column = LOOKUP_TABLES[column]
+        cursor.execute(f"INSERT INTO {table} ({name_column}) VALUES (?)", (name,))
+        lookup[name] = cursor.lastrowid
+    return lookup[name]
+
+def insert_products(cursor, rows):
+    """Insert (name, brand_id, category_id, description_id, unit_id) rows, skipping existing products; return the number added."""
+    if not rows:
+        return 0
+    cursor.executemany("""
+        INSERT OR IGNORE INTO products (product_name, brand_id, category_id, description_id, unit_id)
+        VALUES (?, ?, ?, ?, ?)
+    """, rows)
+    return cursor.rowcount
+
+def import_products(records, chunk_size=CHUNK_SIZE, progress=None):
+    """Insert a product for every brand x description x unit listed in each record.
+
+    Records are dicts with product, brand, category, description and unit values (see
+    normalize_record for other spellings of those column names); brand,
+    description and unit may list several values separated by commas or semicolons. Records
+    are streamed and inserted chunk_size products per transaction, so memory stays bounded by
+    the chunk and the lookup tables. Products that already exist are skipped. progress, if
+    given, is called with (rows read, products inserted, duplicates skipped) after each chunk.
+    Returns (inserted, skipped, invalid), where invalid counts records missing a value.
+    """
+    conn = acquire_writer()
+    cursor = conn.cursor()
+    inserted = skipped = invalid = rows_read = 0
+    try:
+        # Preload every lookup table once; new names are added as they come
+        ids = {column: load_lookup(cursor, *table) for column, table in LOOKUP_TABLES.items()}
+        chunk = []
+        begin_write(conn)
+        for record in records:
+            rows_read += 1
+            product_name = str(record.get("product") or "").strip()
+            category = str(record.get("category") or "").strip()
+            brands = split_values(record.get("brand"))
+            descriptions = split_values(record.get("description"))
+            units = split_values(record.get("unit"))
+            if not (product_name and category and brands and descriptions and units):
+                invalid += 1
+                continue
+            category_id = lookup_id(cursor, ids, "category", category)
+            for brand in brands:
+                brand_id = lookup_id(cursor, ids, "brand", brand)
+                for description in descriptions:
+                    description_id = lookup_id(cursor, ids, "description", description)
+                    for unit in units:
+                        chunk.append((product_name, brand_id, category_id, description_id, lookup_id(cursor, ids, "unit", unit)))
+            if len(chunk) >= chunk_size:
+                added = insert_products(cursor, chunk)
+                inserted += added
+                skipped += len(chunk) - added
+                chunk = []
+                conn.commit()
+                if progress is not None:
+                    progress(rows_read, inserted, skipped)
+                begin_write(conn)
+        added = insert_products(cursor, chunk)
+        inserted += added
+        skipped += len(chunk) - added
+        conn.commit()
+        if progress is not None:
+            progress(rows_read, inserted, skipped)
+        return inserted, skipped, invalid
+    except (sqlite3.Error, OSError, RuntimeError):
+        conn.rollback()  # Chunks already committed stay; rerunning the import skips them as duplicates
+        raise
+    finally:
+        release_writer(conn)
+
+def main():
+    parser = argparse.ArgumentParser(description="Import products from a CSV or XLSX file.")
+    parser.add_argument("path", help="File with product, brand, category, description and unit columns")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Products inserted per transaction")
+    args = parser.parse_args()
+
+    from database_setup import ensure_schema
+    ensure_schema()
+    start = time.perf_counter()
+
+    def report(rows_read, inserted, skipped):
+        elapsed = time.perf_counter() - start
+        print(f"{rows_read} rows read, {inserted} products inserted, {skipped} duplicates skipped "
+              f"({rows_read / elapsed if elapsed else 0:.0f} rows/s)")
+
+    try:
+        inserted, skipped, invalid = import_products(read_records(args.path), args.chunk_size, report)
+    except (sqlite3.Error, OSError, RuntimeError) as e:
+        print(f"Error importing products: {e}")
+        sys.exit(1)
+    print(f"Imported {inserted} products, skipped {skipped} duplicates and {invalid} incomplete rows "
+          f"in {time.perf_counter() - start:.1f}s.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+SEARCH_LIMIT = 300  # Most Combobox entries shown for one search
+
+def trigrams(text):
+    """Return the set of 3-character substrings of text."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class ProductSearchIndex:
+    """Substring search over a ProductCatalog, fast enough to run on every keystroke.
+
+    A query is split into lower-cased tokens and a product matches when every token is a
+    substring of its display string. Tokens of three or more characters are resolved through
+    trigram postings, and the surviving candidates are checked in catalog order only until the
+    result limit is reached. While the user keeps typing, a query narrows the previous query's
+    matches instead when those were found in full and are fewer than the postings.
+
+    Products are stored by slot, an integer that follows catalog order, so results can be
+    ordered by sorting plain integers.
+    """
+
+    def __init__(self, catalog, limit=SEARCH_LIMIT):
+        self.catalog = catalog
+        self.limit = limit
+        self.rebuild()
+        catalog.subscribe(self._on_catalog_change)
+
+    def rebuild(self):
+        """Index every product in the catalog from scratch."""
+        self.lowered = []  # slot -> lower-cased display, None once removed
+        self.product_ids = []  # slot -> product_id
+        self.slots = {}  # product_id -> slot
+        self.postings = {}  # trigram -> set of slots
+        for product_id, display in self.catalog.by_id.items():
+            self._add(product_id, display)
+        self._forget_last_query()
+
+    def _add(self, product_id, display, slot=None):
+        lowered = display.lower()
+        if slot is None:
+            slot = len(self.lowered)
+            self.lowered.append(lowered)
+            self.product_ids.append(product_id)
+        else:
+            self.lowered[slot] = lowered  # An edit keeps the product's place in the list
+        self.slots[product_id] = slot
+        for gram in trigrams(lowered):
+            self.postings.setdefault(gram, set()).add(slot)
+
+    def _remove(self, product_id):
+        slot = self.slots.pop(product_id, None)
+        if slot is None:
+            return None
+        for gram in trigrams(self.lowered[slot]):
+            slots = self.postings.get(gram)
+            if slots is not None:
+                slots.discard(slot)
+                if not slots:
+                    del self.postings[gram]
+        self.lowered[slot] = None
+        return slot
+
+    def _on_catalog_change(self, product_id, old_display, new_display):
+        if product_id is None:
+            self.rebuild()
+            return
+        slot = self._remove(product_id)
+        if new_display is not None:
+            self._add(product_id, new_display, slot)
+        self._forget_last_query()
+
+    def _forget_last_query(self):
+        self._last_query = None
+        self._last_matches = None  # Every slot matching _last_query, or None if the search stopped at the limit
+
+    def _verify(self, tokens, candidates):
+        """Return (first limit slots among candidates containing all tokens, whether all were checked).
+
+        Candidates are checked in slot order so the scan can stop once the limit is reached.
+        """
+        lowered = self.lowered
+        matches = []
+        for slot in candidates:
+            text = lowered[slot]
+            if text is not None and all(token in text for token in tokens):
+                matches.append(slot)
+                if len(matches) == self.limit:
+                    return matches, False
+        return matches, True
+
+    def _match(self, query):
+        """Return (slots matching query in catalog order, whether they are all of them rather than the first limit)."""
+        tokens = query.split()
+        posting_sets = [self.postings.get(gram, ()) for token in tokens if len(token) >= 3
+                        for gram in trigrams(token)]
+        narrowable = self._last_matches is not None and query.startswith(self._last_query)
+        if narrowable and (not posting_sets or len(self._last_matches) <= min(map(len, posting_sets))):
+            return self._verify(tokens, self._last_matches)
+        if not posting_sets:
+            return self._verify(tokens, range(len(self.lowered)))
+        posting_sets.sort(key=len)
+        candidates = posting_sets[0].intersection(*posting_sets[1:])
+        return self._verify(tokens, sorted(candidates))
+
+    def search(self, text):
+        """Return up to limit (display, product_id) pairs matching text, in catalog order."""
+        query = " ".join(text.lower().split())
+        slots, complete = self._match(query)
+        self._last_query = query
+        self._last_matches = slots if complete else None
+        by_id = self.catalog.by_id
+        return [(by_id[self.product_ids[slot]], self.product_ids[slot]) for slot in slots]
@@ -1,82 +1,20 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
-import sqlite3
-from data_cache import add_product_to_cache
-
-DB_NAME = "database.db"
+from inventory_service import ServiceError, onboard_products
+from database_setup import ensure_schema
 
 # --- Database Functions ---
 def save_to_database(product_name, brands, category_name, descriptions, units):
-    conn = sqlite3.connect(DB_NAME)
-    conn.execute("PRAGMA foreign_keys = ON;")
-    cursor = conn.cursor()
+    """Save every brand x description x unit variant of a product; return (inserted, skipped)."""
     try:
-        conn.execute("BEGIN TRANSACTION")
-        # Insert or get category
-        cursor.execute("SELECT category_id FROM categories WHERE category_name = ?", (category_name,))
-        category_id = cursor.fetchone()
-        if not category_id:
-            cursor.execute("INSERT INTO categories (category_name) VALUES (?)", (category_name,))
-            category_id = (cursor.lastrowid,)
-        
-        inserted_count = 0
-        skipped_count = 0
-        # Insert products for each brand-description-unit combination
-        for brand in brands:
-            # Insert or get brand
-            cursor.execute("SELECT brand_id FROM brands WHERE brand_name = ?", (brand,))
-            brand_id = cursor.fetchone()
-            if not brand_id:
-                cursor.execute("INSERT INTO brands (brand_name) VALUES (?)", (brand,))
-                brand_id = (cursor.lastrowid,)
-            
-            for desc in descriptions:
-                # Insert or get description
-                cursor.execute("SELECT description_id FROM descriptions WHERE description_text = ?", (desc,))
-                description_id = cursor.fetchone()
-                if not description_id:
-                    cursor.execute("INSERT INTO descriptions (description_text) VALUES (?)", (desc,))
-                    description_id = (cursor.lastrowid,)
-                
-                for unit in units:
-                    # Insert or get unit
-                    cursor.execute("SELECT unit_id FROM units_of_measurement WHERE unit_name = ?", (unit,))
-                    unit_id = cursor.fetchone()
-                    if not unit_id:
-                        cursor.execute("INSERT INTO units_of_measurement (unit_name) VALUES (?)", (unit,))
-                        unit_id = (cursor.lastrowid,)
-                    
-                    # Check for existing product
-                    cursor.execute("""
-                        SELECT product_id FROM products
-                        WHERE product_name = ? AND brand_id = ? AND category_id = ? AND description_id = ? AND unit_id = ?
-                    """, (product_name, brand_id[0], category_id[0], description_id[0], unit_id[0]))
-                    existing_product = cursor.fetchone()
-                    
-                    if not existing_product:
-                        # Insert product if it doesn't exist
-                        cursor.execute("""
-                            INSERT INTO products (product_name, brand_id, category_id, description_id, unit_id)
-                            VALUES (?, ?, ?, ?, ?)
-                        """, (product_name, brand_id[0], category_id[0], description_id[0], unit_id[0]))
-                        product_id = cursor.lastrowid
-                        # Add to cache
-                        product_display = f"{product_name} - {brand} - {desc}"
-                        add_product_to_cache(product_display, product_id)
-                        inserted_count += 1
-                    else:
-                        skipped_count += 1
-        
-        conn.commit()
-        return inserted_count, skipped_count
-    except sqlite3.Error as e:
-        conn.rollback()
+        new_products, skipped_count = onboard_products(product_name, brands, category_name, descriptions, units)
+    except ServiceError as e:
         print(f"Error saving to database: {e}")
         return 0, 0
-    finally:
-        conn.close()
+    return len(new_products), skipped_count
 
 # --- Main Window ---
+ensure_schema()
 root = tk.Tk()
 root.title("Product Onboarding Form")
 root.geometry("950x650")
@@ -0,0 +1,131 @@
+import sqlite3
+from datetime import datetime
+from database_pool import get_reader
+from stock_valuation import get_stock_value
+
+MONTHS = ["January", "February", "March", "April", "May", "June",
+          "July", "August", "September", "October", "November", "December"]
+QUARTERS = ["Q1", "Q2", "Q3", "Q4"]
+
+# Daily totals over a [start, end) date range, read from the trigger-maintained daily_summary rollup
+SUMMARY_BY_DAY_QUERY = """
+    SELECT summary_date, revenue, cost_of_goods, expenses
+    FROM daily_summary
+    WHERE summary_date >= ? AND summary_date < ?
+"""
+
+# The same totals aggregated from the raw tables, for checking the rollup; plain date comparisons
+# let SQLite walk the date indexes
+REVENUE_BY_DAY_QUERY = """
+    SELECT sale_date, SUM(selling_price * quantity_sold)
+    FROM sales
+    WHERE sale_date >= ? AND sale_date < ?
+    GROUP BY sale_date
+"""
+# Cost of goods is what the batches each sale drew from were bought for; sale_batches holds one
+# row per batch used, so joining it to sales counts every unit once
+COST_BY_DAY_QUERY = """
+    SELECT s.sale_date, SUM(sb.quantity_used * sb.buying_price)
+    FROM sales s
+    JOIN sale_batches sb ON sb.sale_id = s.sale_id
+    WHERE s.sale_date >= ? AND s.sale_date < ?
+    GROUP BY s.sale_date
+"""
+EXPENSES_BY_DAY_QUERY = """
+    SELECT expense_date, SUM(amount)
+    FROM expenses
+    WHERE expense_date >= ? AND expense_date < ?
+    GROUP BY expense_date
+"""
+
+def get_daily_totals(cursor, start, end):
+    """Return {date: [revenue, cost, expenses]} for dates in [start, end) from daily_summary."""
+    cursor.execute(SUMMARY_BY_DAY_QUERY, (start, end))
+    return {day: [revenue, cost, expenses] for day, revenue, cost, expenses in cursor.fetchall()}
+
+def get_raw_daily_totals(cursor, start, end):
+    """Return {date: [revenue, cost, expenses]} for dates in [start, end) from sales, sale_batches and expenses."""
+    totals = {}
+    for measure, query in enumerate((REVENUE_BY_DAY_QUERY, COST_BY_DAY_QUERY, EXPENSES_BY_DAY_QUERY)):
+        cursor.execute(query, (start, end))
+        for day, amount in cursor.fetchall():
+            totals.setdefault(day, [0.0, 0.0, 0.0])[measure] += amount or 0.0
+    return totals
+
+def get_report_years():
+    """Return the years that have sales or expenses, as strings, always including the current year."""
+    cursor = get_reader().cursor()
+    years = {datetime.today().year}
+    cursor.execute("SELECT MIN(summary_date), MAX(summary_date) FROM daily_summary")
+    first, last = cursor.fetchone()
+    if first and last:
+        years.update(range(int(first[:4]), int(last[:4]) + 1))
+    return [str(year) for year in sorted(years)]
+
+def get_date_range(period_type, from_year, to_year, selected_period=None, show_all=False):
+    """Return the [start, end) dates covering the selected periods from from_year through to_year."""
+    first_month, last_month = 1, 12
+    if not show_all and period_type == "Monthly":
+        first_month = last_month = MONTHS.index(selected_period) + 1
+    elif not show_all and period_type == "Quarterly":
+        first_month = QUARTERS.index(selected_period) * 3 + 1
+        last_month = first_month + 2
+    end_year, end_month = (to_year + 1, 1) if last_month == 12 else (to_year, last_month + 1)
+    return f"{from_year}-{first_month:02d}-01", f"{end_year}-{end_month:02d}-01"
+
+def get_period(period_type, day):
+    """Return the (year, period name) a YYYY-MM-DD date falls in."""
+    year, month = day[:4], int(day[5:7])
+    if period_type == "Monthly":
+        return year, MONTHS[month - 1]
+    if period_type == "Quarterly":
+        return year, QUARTERS[(month - 1) // 3]
+    return year, year
+
+def get_profit_data(period_type, selected_year, selected_period=None, show_all=False, to_year=None):
+    """Fetch profit/loss data from database for the selected period type.
+
+    Covers selected_year through to_year (default: the same year). Daily revenue, cost and
+    expense totals come from the daily_summary rollup in one range query and are folded into
+    periods here, so a report reads at most a few hundred rows per year.
+    """
+    cursor = get_reader().cursor()
+    result = []
+    stock_valuation = 0.0
+    from_year = int(selected_year)
+    to_year = int(to_year) if to_year else from_year
+
+    try:
+        # Stock Valuation: remaining batch quantities at their buying prices, kept up to date by triggers
+        stock_valuation = get_stock_value()
+
+        start, end = get_date_range(period_type, from_year, to_year, selected_period, show_all)
+        totals = {}  # (year, period name) -> [revenue, cost, expenses]
+        for day, amounts in get_daily_totals(cursor, start, end).items():
+            period = get_period(period_type, day)
+            if not show_all and period_type != "Annual" and period[1] != selected_period:
+                continue  # A later year's range also covers the periods in between
+            period_totals = totals.setdefault(period, [0.0, 0.0, 0.0])
+            for measure, amount in enumerate(amounts):
+                period_totals[measure] += amount
+
+        order = MONTHS if period_type == "Monthly" else QUARTERS
+        for year, period_name in sorted(totals, key=lambda period: (period[0], order.index(period[1]) if period_type != "Annual" else 0)):
+            revenue, cost, expenses = totals[(year, period_name)]
+
+            # Calculate Gross and Net Profit
+            gross_profit = revenue - cost
+            net_profit = gross_profit - expenses
+
+            # Only append if there's valid data
+            if revenue or cost or expenses:
+                period_label = f"{period_name} {year}" if period_type in ["Monthly", "Quarterly"] else period_name
+                result.append((period_label, revenue, cost, gross_profit, expenses, net_profit))
+
+        if not result:
+            return ("No records or Insufficient data", stock_valuation)
+        return (result, stock_valuation)
+    
+    except sqlite3.Error as e:
+        print(f"Database Error: {e}")
+        return ("No records or Insufficient data", stock_valuation)
@@ -1,114 +1,11 @@
 import tkinter as tk
 from tkinter import ttk, font, messagebox
-import sqlite3
 from datetime import datetime
-
-DB_NAME = "database.db"
-
-# --- Database Queries ---
-def get_profit_data(period_type, selected_year, selected_period=None, show_all=False):
-    """Fetch profit/loss data from database for the selected period type."""
-    conn = sqlite3.connect(DB_NAME, timeout=10)
-    conn.execute("PRAGMA foreign_keys = ON;")
-    cursor = conn.cursor()
-    result = []
-    stock_valuation = 0.0
-    
-    try:
-        # Stock Valuation: SUM(inventory.quantity * AVG(inventory_batches.buying_price))
-        cursor.execute("""
-            SELECT SUM(i.quantity * AVG(ib.buying_price))
-            FROM inventory i
-            LEFT JOIN inventory_batches ib ON i.item_id = ib.item_id
-            GROUP BY i.item_id
-        """)
-        stock_rows = cursor.fetchall()
-        stock_valuation = sum(row[0] for row in stock_rows if row[0] is not None) or 0.0
-
-        # Define period filters
-        month_map = {
-            "January": "01", "February": "02", "March": "03", "April": "04",
-            "May": "05", "June": "06", "July": "07", "August": "08",
-            "September": "09", "October": "10", "November": "11", "December": "12"
-        }
-        if period_type == "Monthly":
-            if show_all:
-                periods = [(month, month_map[month]) for month in month_map]
-            else:
-                periods = [(selected_period, month_map.get(selected_period, "01"))]
-        elif period_type == "Quarterly":
-            if show_all:
-                periods = [("Q1", ["01", "02", "03"]), ("Q2", ["04", "05", "06"]), 
-                           ("Q3", ["07", "08", "09"]), ("Q4", ["10", "11", "12"])]
-            else:
-                periods = [(selected_period, [f"{i:02d}" for i in range((int(selected_period[1])-1)*3+1, int(selected_period[1])*3+1)])]
-        else:  # Annual
-            periods = [(selected_year, None)]
-
-        for period_name, period_filter in periods:
-            # Revenue: SUM(sales.total_price)
-            revenue_query = "SELECT SUM(total_price) FROM sales WHERE strftime('%Y', sale_date) = ?"
-            revenue_params = [selected_year]
-            if period_type == "Monthly" and period_filter:
-                revenue_query += " AND strftime('%m', sale_date) = ?"
-                revenue_params.append(period_filter)
-            elif period_type == "Quarterly" and period_filter:
-                revenue_query += " AND strftime('%m', sale_date) IN (?, ?, ?)"
-                revenue_params.extend(period_filter)
-            cursor.execute(revenue_query, revenue_params)
-            revenue = cursor.fetchone()[0] or 0.0
-
-            # Cost: SUM(sales.quantity * inventory_batches.buying_price)
-            cost_query = """
-                SELECT SUM(s.quantity * ib.buying_price)
-                FROM sales s
-                JOIN inventory_batches ib ON s.item_id = ib.item_id
-                WHERE strftime('%Y', s.sale_date) = ?
-            """
-            cost_params = [selected_year]
-            if period_type == "Monthly" and period_filter:
-                cost_query += " AND strftime('%m', s.sale_date) = ?"
-                cost_params.append(period_filter)
-            elif period_type == "Quarterly" and period_filter:
-                cost_query += " AND strftime('%m', s.sale_date) IN (?, ?, ?)"
-                cost_params.extend(period_filter)
-            cursor.execute(cost_query, cost_params)
-            cost = cursor.fetchone()[0] or 0.0
-
-            # Expenses: SUM(expenses.amount)
-            expense_query = "SELECT SUM(amount) FROM expenses WHERE strftime('%Y', expense_date) = ?"
-            expense_params = [selected_year]
-            if period_type == "Monthly" and period_filter:
-                expense_query += " AND strftime('%m', expense_date) = ?"
-                expense_params.append(period_filter)
-            elif period_type == "Quarterly" and period_filter:
-                expense_query += " AND strftime('%m', expense_date) IN (?, ?, ?)"
-                expense_params.extend(period_filter)
-            cursor.execute(expense_query, expense_params)
-            expenses = cursor.fetchone()[0] or 0.0
-
-            # Calculate Gross and Net Profit
-            gross_profit = revenue - cost
-            net_profit = gross_profit - expenses
-
-            # Only append if there's valid data
-            if revenue or cost or expenses:
-                period_label = f"{period_name} {selected_year}" if period_type in ["Monthly", "Quarterly"] else period_name
-                result.append((period_label, revenue, cost, gross_profit, expenses, net_profit))
-            elif period_type == "Annual" and (revenue or cost or expenses):
-                result.append((selected_year, revenue, cost, gross_profit, expenses, net_profit))
-
-        if not result:
-            return ("No records or Insufficient data", stock_valuation)
-        return (result, stock_valuation)
-    
-    except sqlite3.Error as e:
-        print(f"Database Error: {e}")
-        return ("No records or Insufficient data", stock_valuation)
-    finally:
-        conn.close()
+from database_setup import ensure_schema
+from profit_loss_data import get_profit_data, get_report_years
 
 # --- UI Setup ---
+ensure_schema()
 root = tk.Tk()
 root.title("Profit & Loss Report")
 root.geometry("800x600")
@@ -130,11 +27,25 @@ period_combo.pack(side="left", padx=5)
 
 # Year
 tk.Label(selector_frame, text="Year:", font=custom_font).pack(side="left", padx=5)
-year_var = tk.StringVar(value="2025")
+report_years = get_report_years()
+year_var = tk.StringVar(value=report_years[-1])
 year_combo = ttk.Combobox(selector_frame, textvariable=year_var, font=custom_font, width=10, state="readonly")
-year_combo['values'] = ("2024", "2025")
+year_combo['values'] = report_years
 year_combo.pack(side="left", padx=5)
 
+# To Year (same as Year for a single-year report)
+tk.Label(selector_frame, text="To:", font=custom_font).pack(side="left", padx=5)
+to_year_var = tk.StringVar(value=report_years[-1])
+to_year_combo = ttk.Combobox(selector_frame, textvariable=to_year_var, font=custom_font, width=10, state="readonly")
+to_year_combo['values'] = report_years
+to_year_combo.pack(side="left", padx=5)
+
+def keep_year_order(*args):
+    """Move To up to Year when Year is set past it."""
+    if to_year_var.get() < year_var.get():
+        to_year_var.set(year_var.get())
+year_var.trace_add("write", keep_year_order)
+
 # Month or Quarter
 period_detail_var = tk.StringVar(value="January")
 period_detail_label = tk.Label(selector_frame, text="Month:", font=custom_font)
@@ -259,9 +170,10 @@ def generate_report():
         tree.delete(row)
     period_type = period_var.get()
     year = year_var.get()
+    to_year = max(to_year_var.get(), year)
     period_detail = period_detail_var.get() if period_type != "Annual" else None
     show_all = all_periods_var.get()
-    data, stock_valuation = get_profit_data(period_type, year, period_detail, show_all)
+    data, stock_valuation = get_profit_data(period_type, year, period_detail, show_all, to_year)
     
     # Update stock valuation
     stock_valuation_var.set(f"Current Stock Valuation: UGX {stock_valuation:.2f}")
@@ -283,7 +195,7 @@ def generate_report():
     
     no_data_label.pack_forget()
     no_records_label.grid_remove()
-    if show_all:  # Show Treeview for all periods
+    if show_all or len(data) > 1:  # Show Treeview for all periods, or one period across several years
         results_frame.pack_forget()
         tree_frame.pack(fill="both", expand=True, padx=10, pady=10)
         for row in data:
@@ -292,7 +204,8 @@ def generate_report():
                                           f"UGX {row[3]:.2f}", f"UGX {row[4]:.2f}", f"UGX {row[5]:.2f}"), tags=(tag,))
         total_gross = sum(row[3] for row in data)
         total_net = sum(row[5] for row in data)
-        period_text = f"{year}" if period_type == "Annual" else f"{period_type} Periods in {year}"
+        years_text = year if to_year == year else f"{year}-{to_year}"
+        period_text = years_text if period_type == "Annual" else f"{period_type} Periods in {years_text}"
         gross_summary_var.set(f"Gross {'Profit' if total_gross >= 0 else 'Loss'} for {period_text}: UGX {abs(total_gross):.2f}")
         net_summary_var.set(f"Net {'Profit' if total_net >= 0 else 'Loss'} for {period_text}: UGX {abs(total_net):.2f}")
     else:  # Show labels for single period
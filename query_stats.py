@@ -0,0 +1,216 @@
+import atexit
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+
+# Opt-in query timing for every pooled connection. enable() makes database_pool open its
+# connections as TracedConnection, whose cursors time each statement from execute until its
+# rows are fetched, count the rows, and note the module, line and function that ran it.
+# Statements slower than the threshold are printed as they finish; report() prints a summary,
+# and enable() also has one printed when the process exits, e.g. when a window is closed.
+#
+# Set INVENTORY_QUERY_STATS=<threshold in ms> to turn it on for any module without editing it:
+#     INVENTORY_QUERY_STATS=20 python sales_recording_module.py
+
+SLOW_QUERY_MS = 50.0  # Default threshold for printing a slow statement
+HISTOGRAM_BOUNDS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000)  # Upper bounds; the last bucket is open-ended
+SQL_DISPLAY_LENGTH = 100  # Characters of each statement shown in slow-query lines and the report
+REPORT_LIMIT = 20  # Statements listed by report(), slowest total first
+_SKIPPED_FILES = (os.path.abspath(__file__), os.path.abspath(os.path.join(os.path.dirname(__file__), "database_pool.py")))
+
+slow_query_ms = SLOW_QUERY_MS
+_stats = {}  # Normalized SQL -> StatementStats
+_stats_lock = threading.Lock()  # Readers on worker threads record too
+_report_registered = False
+
+class StatementStats:
+    """Totals for one statement text across every call."""
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.histogram = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+        self.call_sites = Counter()
+
+    def add(self, elapsed_ms, rows, call_site):
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.rows += rows
+        bucket = 0
+        while bucket < len(HISTOGRAM_BOUNDS_MS) and elapsed_ms > HISTOGRAM_BOUNDS_MS[bucket]:
+            bucket += 1
+        self.histogram[bucket] += 1
+        self.call_sites[call_site] += 1
+
+    def as_dict(self):
+        labels = [f"<={bound}ms" for bound in HISTOGRAM_BOUNDS_MS] + [f">{HISTOGRAM_BOUNDS_MS[-1]}ms"]
+        return {"sql": self.sql, "calls": self.calls, "total_ms": round(self.total_ms, 3),
+                "mean_ms": round(self.total_ms / self.calls, 3), "max_ms": round(self.max_ms, 3), "rows": self.rows,
+                "histogram": {label: count for label, count in zip(labels, self.histogram) if count},
+                "call_sites": dict(self.call_sites.most_common())}
+
+def normalize_sql(sql):
+    return " ".join(sql.split())
+
+def call_site():
+    """Return "file:line function" for the nearest caller outside this module and database_pool."""
+    frame = sys._getframe(2)
+    while frame is not None and os.path.abspath(frame.f_code.co_filename) in _SKIPPED_FILES:
+        frame = frame.f_back
+    if frame is None:
+        return "unknown"
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno} {frame.f_code.co_name}"
+
+def record(sql, elapsed_ms, rows, site):
+    """Add one finished statement to the totals, printing it if it was slow."""
+    sql = normalize_sql(sql)
+    with _stats_lock:
+        stats = _stats.get(sql)
+        if stats is None:
+            stats = _stats[sql] = StatementStats(sql)
+        stats.add(elapsed_ms, rows, site)
+    if elapsed_ms >= slow_query_ms:
+        print(f"Slow query ({elapsed_ms:.1f} ms, {rows} rows) at {site}: {sql[:SQL_DISPLAY_LENGTH]}", file=sys.stderr)
+
+class TracedCursor(sqlite3.Cursor):
+    """Cursor that times each statement from execute until its last row is fetched.
+
+    A statement is recorded when its rows run out, when the cursor runs another statement or is
+    closed, or when the cursor is garbage collected, so a fetchone() lookup counts too.
+    """
+    _pending = None  # [sql, elapsed seconds, rows fetched, call site] of the statement in progress
+
+    def _start(self, sql, started, site):
+        self._finish()
+        self._pending = [sql, time.perf_counter() - started, 0, site]
+        if self.description is None:  # No result rows: count the rows changed and finish now
+            self._pending[2] = max(self.rowcount, 0)
+            self._finish()
+
+    def _finish(self):
+        pending = self._pending
+        if pending is not None:
+            self._pending = None
+            record(pending[0], pending[1] * 1000, pending[2], pending[3])
+
+    def _fetched(self, started, rows, exhausted):
+        pending = self._pending
+        if pending is not None:
+            pending[1] += time.perf_counter() - started
+            pending[2] += rows
+            if exhausted:
+                self._finish()
+
+    def execute(self, sql, parameters=()):
+        site = call_site()
+        started = time.perf_counter()
+        super().execute(sql, parameters)
+        self._start(sql, started, site)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        site = call_site()
+        started = time.perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        self._start(sql, started, site)
+        return self
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(started, row is not None, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(started, len(rows), len(rows) < (self.arraysize if size is None else size))
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(started, len(rows), True)
+        return rows
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(started, 0, True)
+            raise
+        self._fetched(started, 1, False)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass  # Interpreter shutdown may already have torn down what record() needs
+
+class TracedConnection(sqlite3.Connection):
+    """Connection whose cursors, including those behind conn.execute(), are TracedCursors."""
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+def enable(threshold_ms=SLOW_QUERY_MS, report_at_exit=True):
+    """Trace every pooled connection from now on, printing statements slower than threshold_ms."""
+    global slow_query_ms, _report_registered
+    import database_pool
+    slow_query_ms = threshold_ms
+    if database_pool.connection_factory is not TracedConnection:
+        database_pool.connection_factory = TracedConnection
+        database_pool.close_all_connections()  # Reopened traced on next use
+    if report_at_exit and not _report_registered:
+        atexit.register(report)
+        _report_registered = True
+
+def disable():
+    """Open plain connections again; the totals so far are kept."""
+    import database_pool
+    if database_pool.connection_factory is TracedConnection:
+        database_pool.connection_factory = sqlite3.Connection
+        database_pool.close_all_connections()
+
+def reset():
+    with _stats_lock:
+        _stats.clear()
+
+def summary():
+    """Return the totals for every statement as dicts, slowest total first."""
+    with _stats_lock:
+        statements = sorted(_stats.values(), key=lambda stats: stats.total_ms, reverse=True)
+        return [stats.as_dict() for stats in statements]
+
+def report(limit=REPORT_LIMIT, file=None):
+    """Print the statements with the most total time, with their latency spread and busiest call site."""
+    file = file or sys.stderr
+    statements = summary()
+    if not statements:
+        return
+    print(f"Query timings: {sum(s['calls'] for s in statements)} statements, "
+          f"{sum(s['total_ms'] for s in statements):.1f} ms in total", file=file)
+    print(f"{'calls':>8}{'total ms':>11}{'mean ms':>10}{'max ms':>10}{'rows':>10}  statement / busiest call site", file=file)
+    for s in statements[:limit]:
+        print(f"{s['calls']:>8}{s['total_ms']:>11.1f}{s['mean_ms']:>10.3f}{s['max_ms']:>10.1f}{s['rows']:>10}  "
+              f"{s['sql'][:SQL_DISPLAY_LENGTH]}", file=file)
+        print(f"{'':>51}{next(iter(s['call_sites']))}  {s['histogram']}", file=file)
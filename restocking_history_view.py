@@ -1,35 +1,19 @@
 import tkinter as tk
 from tkinter import ttk, font, messagebox
-import sqlite3
 from data_cache import get_products
+from database_setup import ensure_schema
+from background_worker import BackgroundTask
+from paged_treeview import PagedTreeview
+from inventory_service import get_inventory_batches
 import locale
 
 # Set locale for currency formatting
 locale.setlocale(locale.LC_ALL, '')
 
-DB_NAME = "database.db"
-
-# --- Helper Functions ---
-def get_inventory_batches():
-    """Fetch inventory batches for Treeview."""
-    conn = sqlite3.connect(DB_NAME, timeout=10)
-    conn.execute("PRAGMA foreign_keys = ON;")
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT ib.batch_id, p.product_name, b.brand_name, d.description_text,
-               ib.quantity, ib.buying_price, ib.purchase_date, u.unit_name
-        FROM inventory_batches ib
-        JOIN products p ON ib.product_id = p.product_id
-        JOIN brands b ON p.brand_id = b.brand_id
-        JOIN descriptions d ON p.description_id = d.description_id
-        JOIN units_of_measurement u ON ib.unit_id = u.unit_id
-    """)
-    rows = cursor.fetchall()
-    conn.close()
-    return [(f"{row[1]} - {row[2]} - {row[3]}", row[4], row[5], row[6], row[7]) for row in rows]
-
 # --- UI Setup ---
+ensure_schema()
 root = tk.Tk()
+refresh_task = BackgroundTask(root)  # Treeview reloads
 root.title("Restocking History View")
 root.geometry("800x600")
 
@@ -77,19 +61,34 @@ refresh_btn_frame.pack(pady=5)
 tk.Button(refresh_btn_frame, text="Refresh", font=custom_font, command=lambda: refresh_tree(), bg="#28a745", fg="white", width=15).pack()
 
 # --- Populate Treeview ---
-def refresh_tree():
-    """Refresh Treeview with restocking batch data."""
-    for row in tree.get_children():
-        tree.delete(row)
-    batches = get_inventory_batches()
-    if not batches:
-        no_records_label.grid()  # Show "No records" message
-    else:
+def load_page(before_id=None, after_id=None):
+    """Fetch and format one page as (rows of (batch_id, values), last batch_id read, whether the page was full).
+
+    Runs on a background thread.
+    """
+    page_rows, last_key, full = get_inventory_batches(before_id, after_id)
+    rows = []
+    for row in page_rows:
+        # Format buying_price with commas for display
+        formatted_price = locale.format_string("%.2f", row[3], grouping=True)
+        rows.append((row[0], (row[1], row[2], formatted_price, row[4], row[5])))
+    return rows, last_key, full
+
+def show_no_records(row_count):
+    """Show the "No records" message when the first page is empty."""
+    if row_count:
         no_records_label.grid_remove()  # Hide message
-        for row in batches:
-            # Format buying_price with commas for display
-            formatted_price = locale.format_string("%.2f", row[2], grouping=True)
-            tree.insert("", "end", values=(row[0], row[1], formatted_price, row[3], row[4]))
+    else:
+        no_records_label.grid()  # Show "No records" message
+
+paged_tree = PagedTreeview(tree, scrollbar, refresh_task,
+                           fetch_older=lambda batch_id: load_page(before_id=batch_id),
+                           fetch_newer=lambda batch_id: load_page(after_id=batch_id),
+                           on_reload=show_no_records)
+
+def refresh_tree():
+    """Refresh Treeview with the newest restocking batch data; older pages load as the user scrolls."""
+    paged_tree.reload()
 
 refresh_tree()
 
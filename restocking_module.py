@@ -1,30 +1,26 @@
 import tkinter as tk
 from tkinter import ttk, font, messagebox
-import sqlite3
 from datetime import datetime
 from data_cache import get_products
+from product_search import ProductSearchIndex
+from background_worker import BackgroundTask, SEARCH_DEBOUNCE_MS
+from database_pool import get_reader
+from dimension_cache import get_names
+from inventory_service import ServiceError, save_restock, delete_batch
+from database_setup import ensure_schema
 import locale
 
 # Set locale for currency formatting
 locale.setlocale(locale.LC_ALL, '')
 
-DB_NAME = "database.db"
-
 # --- Helper Functions ---
 def get_units():
     """Fetch all units for Combobox."""
-    conn = sqlite3.connect(DB_NAME, timeout=10)
-    cursor = conn.cursor()
-    cursor.execute("SELECT unit_name FROM units_of_measurement")
-    rows = cursor.fetchall()
-    conn.close()
-    return [row[0] for row in rows]
+    return get_names("units_of_measurement")
 
 def get_batches():
     """Fetch inventory_batches for Treeview."""
-    conn = sqlite3.connect(DB_NAME, timeout=10)
-    conn.execute("PRAGMA foreign_keys = ON;")
-    cursor = conn.cursor()
+    cursor = get_reader().cursor()
     cursor.execute("""
         SELECT ib.batch_id, p.product_name, b.brand_name, d.description_text,
                ib.quantity, ib.buying_price, ib.purchase_date, u.unit_name
@@ -35,126 +31,23 @@ def get_batches():
         JOIN units_of_measurement u ON ib.unit_id = u.unit_id
     """)
     rows = cursor.fetchall()
-    conn.close()
     return [(row[0], f"{row[1]} - {row[2]} - {row[3]}", row[4], row[5], row[6], row[7]) for row in rows]
 
-def save_restock(batch_id, product_id, quantity, buying_price, purchase_date, unit_name):
-    """Save or update restocking data in inventory_batches and update inventory."""
-    conn = sqlite3.connect(DB_NAME, timeout=10)
-    conn.execute("PRAGMA foreign_keys = ON;")
-    cursor = conn.cursor()
-    try:
-        conn.execute("BEGIN TRANSACTION")
-        # Get unit_id
-        cursor.execute("SELECT unit_id FROM units_of_measurement WHERE unit_name = ?", (unit_name,))
-        unit_id = cursor.fetchone()
-        if not unit_id:
-            cursor.execute("INSERT INTO units_of_measurement (unit_name) VALUES (?)", (unit_name,))
-            unit_id = (cursor.lastrowid,)
-        
-        if batch_id:  # Update existing batch
-            # Get old quantity for inventory adjustment
-            cursor.execute("SELECT quantity FROM inventory_batches WHERE batch_id = ?", (batch_id,))
-            old_quantity = cursor.fetchone()[0]
-            cursor.execute("""
-                UPDATE inventory_batches
-                SET product_id = ?, buying_price = ?, quantity = ?, purchase_date = ?, unit_id = ?
-                WHERE batch_id = ?
-            """, (product_id, buying_price, quantity, purchase_date, unit_id[0], batch_id))
-            # Adjust inventory
-            cursor.execute("SELECT quantity FROM inventory WHERE product_id = ?", (product_id,))
-            existing = cursor.fetchone()
-            if existing:
-                new_quantity = existing[0] - old_quantity + quantity
-                cursor.execute("UPDATE inventory SET quantity = ? WHERE product_id = ?", (new_quantity, product_id))
-        else:  # Insert new batch
-            cursor.execute("""
-                INSERT INTO inventory_batches (product_id, buying_price, quantity, purchase_date, unit_id)
-                VALUES (?, ?, ?, ?, ?)
-            """, (product_id, buying_price, quantity, purchase_date, unit_id[0]))
-            # Update or insert into inventory
-            cursor.execute("SELECT quantity FROM inventory WHERE product_id = ?", (product_id,))
-            existing = cursor.fetchone()
-            if existing:
-                new_quantity = existing[0] + quantity
-                cursor.execute("UPDATE inventory SET quantity = ? WHERE product_id = ?", (new_quantity, product_id))
-            else:
-                cursor.execute("INSERT INTO inventory (product_id, quantity) VALUES (?, ?)", (product_id, quantity))
-        
-        conn.commit()
-        return True
-    except sqlite3.OperationalError as e:
-        conn.rollback()
-        messagebox.showerror("Database Error", f"Error saving restock: {e}")
-        return False
-    except sqlite3.Error as e:
-        conn.rollback()
-        messagebox.showerror("Database Error", f"Error saving restock: {e}")
-        return False
-    finally:
-        conn.close()
-
-def delete_batch(batch_id, product_id, quantity):
-    """Delete a batch and update inventory quantity."""
-    conn = sqlite3.connect(DB_NAME, timeout=10)
-    conn.execute("PRAGMA foreign_keys = ON;")
-    cursor = conn.cursor()
-    try:
-        conn.execute("BEGIN TRANSACTION")
-        # Delete from inventory_batches
-        cursor.execute("DELETE FROM inventory_batches WHERE batch_id = ?", (batch_id,))
-        # Update inventory
-        cursor.execute("SELECT quantity FROM inventory WHERE product_id = ?", (product_id,))
-        existing = cursor.fetchone()
-        if existing:
-            new_quantity = existing[0] - quantity
-            if new_quantity > 0:
-                cursor.execute("UPDATE inventory SET quantity = ? WHERE product_id = ?", (new_quantity, product_id))
-            else:
-                cursor.execute("DELETE FROM inventory WHERE product_id = ?", (product_id,))
-        conn.commit()
-        return True
-    except sqlite3.OperationalError as e:
-        conn.rollback()
-        messagebox.showerror("Database Error", f"Error deleting batch: {e}")
-        return False
-    except sqlite3.Error as e:
-        conn.rollback()
-        messagebox.showerror("Database Error", f"Error deleting batch: {e}")
-        return False
-    finally:
-        conn.close()
-
 def edit_selected():
     global has_unsaved_changes
     selected = tree.selection()
     if not selected:
         messagebox.showwarning("No Selection", "Please select a batch to edit.")
         return
+    # Treeview iids are batch_ids, so the form needs no lookup
     values = tree.item(selected[0])['values']
-    # Fetch batch_id
-    conn = sqlite3.connect(DB_NAME, timeout=10)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT ib.batch_id
-        FROM inventory_batches ib
-        JOIN products p ON ib.product_id = p.product_id
-        JOIN brands b ON p.brand_id = b.brand_id
-        JOIN descriptions d ON p.description_id = d.description_id
-        JOIN units_of_measurement u ON ib.unit_id = u.unit_id
-        WHERE p.product_name || ' - ' || b.brand_name || ' - ' || d.description_text = ?
-        AND ib.quantity = ? AND ib.buying_price = ? AND ib.purchase_date = ? AND u.unit_name = ?
-    """, (values[0], values[1], float(values[2].replace(',', '')), values[3], values[4]))
-    batch_id = cursor.fetchone()
-    conn.close()
-    if batch_id:
-        batch_id_var.set(batch_id[0])
-        product_var.set(values[0])
-        quantity_var.set(str(values[1]))
-        buying_price_var.set(locale.format_string("%.2f", values[2].replace(',', ''), grouping=True))
-        purchase_date_var.set(values[3])
-        unit_var.set(values[4])
-        has_unsaved_changes = False
+    batch_id_var.set(selected[0])
+    product_var.set(values[0])
+    quantity_var.set(str(values[1]))
+    buying_price_var.set(locale.format_string("%.2f", float(values[2].replace(',', '')), grouping=True))
+    purchase_date_var.set(values[3])
+    unit_var.set(values[4])
+    has_unsaved_changes = False
 
 def delete_selected():
     global has_unsaved_changes
@@ -163,28 +56,16 @@ def delete_selected():
     if not selected:
         messagebox.showwarning("No Selection", "Please select a batch to delete.")
         return
-    values = tree.item(selected[0])['values']
-    conn = sqlite3.connect(DB_NAME, timeout=10)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT ib.batch_id, ib.product_id, ib.quantity
-        FROM inventory_batches ib
-        JOIN products p ON ib.product_id = p.product_id
-        JOIN brands b ON p.brand_id = b.brand_id
-        JOIN descriptions d ON p.description_id = d.description_id
-        JOIN units_of_measurement u ON ib.unit_id = u.unit_id
-        WHERE p.product_name || ' - ' || b.brand_name || ' - ' || d.description_text = ?
-        AND ib.quantity = ? AND ib.buying_price = ? AND ib.purchase_date = ? AND u.unit_name = ?
-    """, (values[0], values[1], float(values[2].replace(',', '')), values[3], values[4]))
-    result = cursor.fetchone()
-    conn.close()
-    if result:
-        batch_id, product_id, quantity = result
-        if messagebox.askyesno("Confirm Deletion", "Are you sure you want to delete this batch?"):
-            if delete_batch(batch_id, product_id, quantity):
-                refresh_tree(fetch_data=not is_treeview_cleared)
-                clear_form()
-                has_unsaved_changes = False
+    batch_id = int(selected[0])  # Treeview iids are batch_ids
+    if messagebox.askyesno("Confirm Deletion", "Are you sure you want to delete this batch?"):
+        try:
+            delete_batch(batch_id)
+        except ServiceError as e:
+            messagebox.showerror(e.title, str(e))
+            return
+        refresh_tree(fetch_data=not is_treeview_cleared)
+        clear_form()
+        has_unsaved_changes = False
 
 def save_data():
     global has_unsaved_changes
@@ -194,7 +75,7 @@ def save_data():
     if not product_display:
         messagebox.showerror("Missing Data", "Please select a product.")
         return
-    product_id = product_map.get(product_display)
+    product_id = products.get_id(product_display)
     if not product_id:
         messagebox.showerror("Invalid Product", "Selected product is invalid.")
         return
@@ -231,15 +112,21 @@ def save_data():
     
     # Save or update batch
     batch_id = batch_id_var.get()
-    if save_restock(batch_id, product_id, quantity, buying_price, purchase_date, unit_name):
-        if is_treeview_cleared:
-            # Append only the new batch to Treeview
-            formatted_price = locale.format_string("%.2f", buying_price, grouping=True)
-            tree.insert("", "end", values=(product_display, quantity, formatted_price, purchase_date, unit_name))
+    try:
+        batch_id = save_restock(batch_id, product_id, quantity, buying_price, purchase_date, unit_name)
+    except ServiceError as e:
+        messagebox.showerror(e.title, str(e))
+        return
+    if is_treeview_cleared:
+        values = (product_display, quantity, locale.format_string("%.2f", buying_price, grouping=True), purchase_date, unit_name)
+        if tree.exists(batch_id):
+            tree.item(batch_id, values=values)  # Update existing Treeview row for edit
         else:
-            refresh_tree(fetch_data=True)
-        clear_form()
-        has_unsaved_changes = False
+            tree.insert("", "end", iid=batch_id, values=values)  # Append only the new batch
+    else:
+        refresh_tree(fetch_data=True)
+    clear_form()
+    has_unsaved_changes = False
 
 def clear_form():
     batch_id_var.set("")
@@ -249,9 +136,7 @@ def clear_form():
     purchase_date_var.set(datetime.today().strftime("%Y-%m-%d"))  # Set to current date
     unit_var.set("")
     search_var.set("")  # Clear search field
-    product_combo['values'] = [p[0] for p in products]  # Reset Combobox to full product list
-    global product_map
-    product_map = {p[0]: p[1] for p in products}  # Reset product map
+    update_combobox()  # Reset Combobox to the first products
     unit_combo['values'] = get_units()  # Reset to all units
     global has_unsaved_changes
     has_unsaved_changes = False
@@ -259,24 +144,40 @@ def clear_form():
 def clear_treeview():
     """Clear Treeview without affecting database."""
     global is_treeview_cleared
-    for row in tree.get_children():
-        tree.delete(row)
+    refresh_task.cancel()  # Drop any refresh still loading
+    tree.delete(*tree.get_children())
     is_treeview_cleared = True
 
+def load_tree_rows():
+    """Fetch and format Treeview rows; runs on a background thread."""
+    rows = []
+    for row in get_batches():
+        # Format buying_price with commas for display
+        formatted_price = locale.format_string("%.2f", row[3], grouping=True)
+        rows.append((row[0], (row[1], row[2], formatted_price, row[4], row[5])))
+    return rows
+
+def fill_tree(rows):
+    """Replace the Treeview contents with (batch_id, values) rows in one batch, keyed by batch_id."""
+    tree.delete(*tree.get_children())
+    for batch_id, values in rows:
+        tree.insert("", "end", iid=batch_id, values=values)
+
 def refresh_tree(fetch_data=True):
-    """Refresh Treeview, optionally fetching data from database."""
+    """Refresh Treeview, optionally fetching data from database in the background."""
     global is_treeview_cleared
-    for row in tree.get_children():
-        tree.delete(row)
     if fetch_data and not is_treeview_cleared:
-        for row in get_batches():
-            # Format buying_price with commas for display
-            formatted_price = locale.format_string("%.2f", row[3], grouping=True)
-            tree.insert("", "end", values=(row[1], row[2], formatted_price, row[4], row[5]))
+        refresh_task.submit(load_tree_rows, fill_tree)
         is_treeview_cleared = False
+    else:
+        refresh_task.cancel()
+        tree.delete(*tree.get_children())
 
 # --- UI Setup ---
+ensure_schema()
 root = tk.Tk()
+search_task = BackgroundTask(root)  # Product search, debounced while typing
+refresh_task = BackgroundTask(root)  # Treeview reloads
 root.title("Restocking Module")
 root.geometry("800x600")
 
@@ -311,29 +212,44 @@ tk.Label(form, text="Product", font=custom_font).grid(row=1, column=0, sticky="e
 product_combo = ttk.Combobox(product_frame, textvariable=product_var, font=custom_font, width=50, state="readonly")
 product_combo.grid(row=1, column=0, padx=5, pady=2)
 
-# Initialize products and product map
+# Initialize products
 products = get_products()
-product_map = {p[0]: p[1] for p in products}
-product_combo['values'] = [p[0] for p in products]
-
-def update_combobox(event=None):
-    """Filter Combobox based on search input."""
-    search_text = search_var.get().strip().lower()
-    filtered_products = [(p[0], p[1]) for p in products if search_text in p[0].lower()]
-    product_combo['values'] = [p[0] for p in filtered_products]
-    # Update product_map with filtered products
-    global product_map
-    product_map = {p[0]: p[1] for p in filtered_products}
-    if filtered_products and not product_var.get() in [p[0] for p in filtered_products]:
+search_index = ProductSearchIndex(products)  # Kept in step with the catalog as products change
+product_combo['values'] = [display for display, _ in search_index.search("")]
+last_search_text = ""  # Text of the newest search, so keys that do not edit it start no new one
+
+def update_combobox(event=None, open_dropdown=False):
+    """Filter Combobox based on search input, searching in the background.
+
+    Key presses are debounced; other callers search straight away.
+    """
+    global last_search_text
+    search_text = search_var.get()
+    if event is not None and search_text == last_search_text:
+        return  # Arrow keys, Return and the like leave the results as they are
+    last_search_text = search_text
+    # Pick up products changed in other windows here on the Tk thread, which also reads the catalog
+    search_task.run_exclusive(get_products)
+
+    def search():
+        return [display for display, _ in search_index.search(search_text)]
+
+    delay_ms = SEARCH_DEBOUNCE_MS if event is not None else 0
+    search_task.submit(search, lambda filtered_products: show_products(filtered_products, open_dropdown), delay_ms)
+
+def show_products(filtered_products, open_dropdown=False):
+    """Apply search results to the Combobox, optionally opening its dropdown."""
+    product_combo['values'] = filtered_products
+    if filtered_products and not product_var.get() in filtered_products:
         product_combo.set("")
-
-def open_combobox_dropdown(event=None):
-    """Open Combobox dropdown after filtering."""
-    update_combobox()  # Ensure filter is applied
-    if product_combo['values']:  # Only open if there are filtered products
+    if open_dropdown and filtered_products:  # Only open if there are filtered products
         product_combo.focus()  # Set focus to Combobox
         product_combo.event_generate("<Button-1>", x=0, y=0)  # Simulate click to open dropdown
 
+def open_combobox_dropdown(event=None):
+    """Open Combobox dropdown once the filter is applied."""
+    update_combobox(open_dropdown=True)
+
 search_entry.bind("<KeyRelease>", update_combobox)
 search_entry.bind("<Return>", open_combobox_dropdown)
 
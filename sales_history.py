@@ -1,35 +1,19 @@
 import tkinter as tk
 from tkinter import ttk, font, messagebox
-import sqlite3
 from data_cache import get_products
+from database_setup import ensure_schema
+from background_worker import BackgroundTask
+from paged_treeview import PagedTreeview
+from inventory_service import get_sales_history
 import locale
 
 # Set locale for currency formatting
 locale.setlocale(locale.LC_ALL, '')
 
-DB_NAME = "database.db"
-
-# --- Helper Functions ---
-def get_sales_history():
-    """Fetch sales history for Treeview."""
-    conn = sqlite3.connect(DB_NAME, timeout=10)
-    conn.execute("PRAGMA foreign_keys = ON;")
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT s.sale_id, p.product_name, b.brand_name, d.description_text,
-               s.quantity_sold, s.selling_price, s.sale_date, u.unit_name
-        FROM sales s
-        JOIN products p ON s.product_id = p.product_id
-        JOIN brands b ON p.brand_id = b.brand_id
-        JOIN descriptions d ON p.description_id = d.description_id
-        JOIN units_of_measurement u ON s.unit_id = u.unit_id
-    """)
-    rows = cursor.fetchall()
-    conn.close()
-    return [(f"{row[1]} - {row[2]} - {row[3]}", row[4], row[5], row[6], row[7]) for row in rows]
-
 # --- UI Setup ---
+ensure_schema()
 root = tk.Tk()
+refresh_task = BackgroundTask(root)  # Treeview reloads
 root.title("Sales History View")
 root.geometry("800x600")
 
@@ -77,19 +61,34 @@ refresh_btn_frame.pack(pady=5)
 tk.Button(refresh_btn_frame, text="Refresh", font=custom_font, command=lambda: refresh_tree(), bg="#28a745", fg="white", width=15).pack()
 
 # --- Populate Treeview ---
-def refresh_tree():
-    """Refresh Treeview with sales history data."""
-    for row in tree.get_children():
-        tree.delete(row)
-    sales = get_sales_history()
-    if not sales:
-        no_records_label.grid()  # Show "No records" message
-    else:
+def load_page(before_id=None, after_id=None):
+    """Fetch and format one page as (rows of (sale_id, values), last sale_id read, whether the page was full).
+
+    Runs on a background thread.
+    """
+    page_rows, last_key, full = get_sales_history(before_id, after_id)
+    rows = []
+    for row in page_rows:
+        # Format selling_price with commas for display
+        formatted_price = locale.format_string("%.2f", row[3], grouping=True)
+        rows.append((row[0], (row[1], row[2], formatted_price, row[4], row[5])))
+    return rows, last_key, full
+
+def show_no_records(row_count):
+    """Show the "No records" message when the first page is empty."""
+    if row_count:
         no_records_label.grid_remove()  # Hide message
-        for row in sales:
-            # Format selling_price with commas for display
-            formatted_price = locale.format_string("%.2f", row[2], grouping=True)
-            tree.insert("", "end", values=(row[0], row[1], formatted_price, row[3], row[4]))
+    else:
+        no_records_label.grid()  # Show "No records" message
+
+paged_tree = PagedTreeview(tree, scrollbar, refresh_task,
+                           fetch_older=lambda sale_id: load_page(before_id=sale_id),
+                           fetch_newer=lambda sale_id: load_page(after_id=sale_id),
+                           on_reload=show_no_records)
+
+def refresh_tree():
+    """Refresh Treeview with the newest sales history data; older pages load as the user scrolls."""
+    paged_tree.reload()
 
 refresh_tree()
 
@@ -1,30 +1,26 @@
 import tkinter as tk
 from tkinter import ttk, font, messagebox
-import sqlite3
 from datetime import datetime
 from data_cache import get_products
+from product_search import ProductSearchIndex
+from background_worker import BackgroundTask, SEARCH_DEBOUNCE_MS
+from database_pool import get_reader
+from dimension_cache import get_names
+from inventory_service import ServiceError, save_sale, save_basket, delete_sale
+from database_setup import ensure_schema
 import locale
 
 # Set locale for currency formatting
 locale.setlocale(locale.LC_ALL, '')
 
-DB_NAME = "database.db"
-
 # --- Helper Functions ---
 def get_units():
     """Fetch units for Combobox."""
-    conn = sqlite3.connect(DB_NAME, timeout=10)
-    cursor = conn.cursor()
-    cursor.execute("SELECT unit_name FROM units_of_measurement")
-    rows = cursor.fetchall()
-    conn.close()
-    return [row[0] for row in rows]
+    return get_names("units_of_measurement")
 
 def get_sales():
     """Fetch sales for Treeview."""
-    conn = sqlite3.connect(DB_NAME, timeout=10)
-    conn.execute("PRAGMA foreign_keys = ON;")
-    cursor = conn.cursor()
+    cursor = get_reader().cursor()
     cursor.execute("""
         SELECT s.sale_id, p.product_name, b.brand_name, d.description_text,
                s.quantity_sold, s.selling_price, s.sale_date, u.unit_name
@@ -35,235 +31,23 @@ def get_sales():
         JOIN units_of_measurement u ON s.unit_id = u.unit_id
     """)
     rows = cursor.fetchall()
-    conn.close()
     return [(row[0], f"{row[1]} - {row[2]} - {row[3]}", row[4], row[5], row[6], row[7]) for row in rows]
 
-def save_sale(sale_id, product_id, quantity_sold, selling_price, sale_date, unit_name):
-    """Save or update sale data in sales and sale_batches, update inventory."""
-    conn = sqlite3.connect(DB_NAME, timeout=10)
-    conn.execute("PRAGMA foreign_keys = ON;")
-    cursor = conn.cursor()
-    try:
-        conn.execute("BEGIN TRANSACTION")
-        # Get unit_id
-        cursor.execute("SELECT unit_id FROM units_of_measurement WHERE unit_name = ?", (unit_name,))
-        unit_id = cursor.fetchone()
-        if not unit_id:
-            messagebox.showerror("Invalid Unit", "Selected unit is not valid.")
-            conn.rollback()
-            return False
-        
-        # Check inventory stock
-        cursor.execute("SELECT quantity FROM inventory WHERE product_id = ?", (product_id,))
-        inventory = cursor.fetchone()
-        inventory_quantity = inventory[0] if inventory else 0
-        
-        # Validate sale_id for edits
-        is_edit = False
-        if sale_id:
-            try:
-                sale_id = int(sale_id)  # Ensure sale_id is an integer
-                is_edit = True
-            except ValueError:
-                messagebox.showerror("Invalid Sale ID", "Sale ID is invalid.")
-                conn.rollback()
-                return False
-        
-        if is_edit:  # Update existing sale
-            # Get old sale data from sales
-            cursor.execute("SELECT quantity_sold FROM sales WHERE sale_id = ?", (sale_id,))
-            old_sale = cursor.fetchone()
-            if not old_sale:
-                messagebox.showerror("Invalid Sale", "Sale record not found.")
-                conn.rollback()
-                return False
-            old_quantity_sold = old_sale[0]
-            
-            # Get batch_id and unit_id from sale_batches
-            cursor.execute("SELECT batch_id, unit_id FROM sale_batches WHERE sale_id = ?", (sale_id,))
-            sale_batch = cursor.fetchone()
-            if not sale_batch:
-                messagebox.showerror("Invalid Sale Batch", "Sale batch record not found.")
-                conn.rollback()
-                return False
-            old_batch_id, old_unit_id = sale_batch
-            
-            if old_unit_id == unit_id[0]:
-                # Same unit, use original batch
-                batch_id = old_batch_id
-                cursor.execute("SELECT quantity, buying_price FROM inventory_batches WHERE batch_id = ?", (batch_id,))
-                batch = cursor.fetchone()
-                if not batch:
-                    messagebox.showerror("No Batch", "Original batch no longer exists.")
-                    conn.rollback()
-                    return False
-                batch_quantity, batch_buying_price = batch
-            else:
-                # Unit changed, get oldest batch for new unit
-                cursor.execute("""
-                    SELECT batch_id, buying_price, quantity
-                    FROM inventory_batches
-                    WHERE product_id = ? AND unit_id = ?
-                    ORDER BY purchase_date ASC
-                    LIMIT 1
-                """, (product_id, unit_id[0]))
-                batch = cursor.fetchone()
-                if not batch:
-                    messagebox.showerror("No Batch", "No inventory batch available for this product and unit.")
-                    conn.rollback()
-                    return False
-                batch_id, batch_buying_price, batch_quantity = batch
-            
-            # Check inventory for edit
-            if inventory_quantity + old_quantity_sold < quantity_sold:
-                messagebox.showerror("Insufficient Stock", "Not enough inventory to fulfill this sale.")
-                conn.rollback()
-                return False
-            if batch_quantity < quantity_sold:
-                messagebox.showerror("Insufficient Batch Stock", "Not enough stock in the selected batch.")
-                conn.rollback()
-                return False
-            
-            # Update sales
-            cursor.execute("""
-                UPDATE sales
-                SET product_id = ?, selling_price = ?, quantity_sold = ?, sale_date = ?, unit_id = ?
-                WHERE sale_id = ?
-            """, (product_id, selling_price, quantity_sold, sale_date, unit_id[0], sale_id))
-            
-            # Update sale_batches
-            cursor.execute("""
-                UPDATE sale_batches
-                SET quantity_used = ?, buying_price = ?, unit_id = ?, batch_id = ?
-                WHERE sale_id = ?
-            """, (quantity_sold, batch_buying_price, unit_id[0], batch_id, sale_id))
-            
-            # Adjust inventory
-            new_quantity = inventory_quantity + old_quantity_sold - quantity_sold
-            if new_quantity > 0:
-                cursor.execute("UPDATE inventory SET quantity = ? WHERE product_id = ?", (new_quantity, product_id))
-            else:
-                cursor.execute("DELETE FROM inventory WHERE product_id = ?", (product_id,))
-        else:  # Insert new sale
-            if inventory_quantity < quantity_sold:
-                messagebox.showerror("Insufficient Stock", "Not enough inventory to fulfill this sale.")
-                conn.rollback()
-                return False
-            
-            # Get oldest batch (FIFO)
-            cursor.execute("""
-                SELECT batch_id, buying_price, quantity
-                FROM inventory_batches
-                WHERE product_id = ? AND unit_id = ?
-                ORDER BY purchase_date ASC
-                LIMIT 1
-            """, (product_id, unit_id[0]))
-            batch = cursor.fetchone()
-            if not batch:
-                messagebox.showerror("No Batch", "No inventory batch available for this product.")
-                conn.rollback()
-                return False
-            batch_id, batch_buying_price, batch_quantity = batch
-            
-            if batch_quantity < quantity_sold:
-                messagebox.showerror("Insufficient Batch Stock", "Not enough stock in the oldest batch.")
-                conn.rollback()
-                return False
-            
-            cursor.execute("""
-                INSERT INTO sales (product_id, selling_price, quantity_sold, sale_date, unit_id)
-                VALUES (?, ?, ?, ?, ?)
-            """, (product_id, selling_price, quantity_sold, sale_date, unit_id[0]))
-            sale_id = cursor.lastrowid
-            
-            # Insert into sale_batches
-            cursor.execute("""
-                INSERT INTO sale_batches (sale_id, batch_id, quantity_used, buying_price, unit_id)
-                VALUES (?, ?, ?, ?, ?)
-            """, (sale_id, batch_id, quantity_sold, batch_buying_price, unit_id[0]))
-            
-            # Update inventory
-            new_quantity = inventory_quantity - quantity_sold
-            if new_quantity > 0:
-                cursor.execute("UPDATE inventory SET quantity = ? WHERE product_id = ?", (new_quantity, product_id))
-            else:
-                cursor.execute("DELETE FROM inventory WHERE product_id = ?", (product_id,))
-        
-        conn.commit()
-        return True
-    except sqlite3.OperationalError as e:
-        conn.rollback()
-        messagebox.showerror("Database Error", f"Error saving sale: {e}")
-        return False
-    except sqlite3.Error as e:
-        conn.rollback()
-        messagebox.showerror("Database Error", f"Error saving sale: {e}")
-        return False
-    finally:
-        conn.close()
-
-def delete_sale(sale_id, product_id, quantity_sold):
-    """Delete a sale and update inventory quantity."""
-    conn = sqlite3.connect(DB_NAME, timeout=10)
-    conn.execute("PRAGMA foreign_keys = ON;")
-    cursor = conn.cursor()
-    try:
-        conn.execute("BEGIN TRANSACTION")
-        # Explicitly delete from sale_batches first
-        cursor.execute("DELETE FROM sale_batches WHERE sale_id = ?", (sale_id,))
-        # Delete from sales
-        cursor.execute("DELETE FROM sales WHERE sale_id = ?", (sale_id,))
-        # Update inventory
-        cursor.execute("SELECT quantity FROM inventory WHERE product_id = ?", (product_id,))
-        existing = cursor.fetchone()
-        if existing:
-            new_quantity = existing[0] + quantity_sold
-            cursor.execute("UPDATE inventory SET quantity = ? WHERE product_id = ?", (new_quantity, product_id))
-        else:
-            cursor.execute("INSERT INTO inventory (product_id, quantity) VALUES (?, ?)", (product_id, quantity_sold))
-        conn.commit()
-        return True
-    except sqlite3.OperationalError as e:
-        conn.rollback()
-        messagebox.showerror("Database Error", f"Error deleting sale: {e}")
-        return False
-    except sqlite3.Error as e:
-        conn.rollback()
-        messagebox.showerror("Database Error", f"Error deleting sale: {e}")
-        return False
-    finally:
-        conn.close()
-
 def edit_selected():
     global has_unsaved_changes
     selected = tree.selection()
     if not selected:
         messagebox.showwarning("No Selection", "Please select a sale to edit.")
         return
+    # Treeview iids are sale_ids, so the form needs no lookup
     values = tree.item(selected[0])['values']
-    # Fetch sale_id
-    conn = sqlite3.connect(DB_NAME, timeout=10)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT s.sale_id
-        FROM sales s
-        JOIN products p ON s.product_id = p.product_id
-        JOIN brands b ON p.brand_id = b.brand_id
-        JOIN descriptions d ON p.description_id = d.description_id
-        JOIN units_of_measurement u ON s.unit_id = u.unit_id
-        WHERE p.product_name || ' - ' || b.brand_name || ' - ' || d.description_text = ?
-        AND s.quantity_sold = ? AND s.selling_price = ? AND s.sale_date = ? AND u.unit_name = ?
-    """, (values[0], values[1], float(values[2].replace(',', '')), values[3], values[4]))
-    sale_id = cursor.fetchone()
-    conn.close()
-    if sale_id:
-        sale_id_var.set(str(sale_id[0]))  # Ensure sale_id is a string for StringVar
-        product_var.set(values[0])
-        quantity_var.set(str(values[1]))
-        selling_price_var.set(locale.format_string("%.2f", float(values[2].replace(',', '')), grouping=True))
-        sale_date_var.set(values[3])
-        unit_var.set(values[4])
-        has_unsaved_changes = False
+    sale_id_var.set(selected[0])
+    product_var.set(values[0])
+    quantity_var.set(str(values[1]))
+    selling_price_var.set(locale.format_string("%.2f", float(values[2].replace(',', '')), grouping=True))
+    sale_date_var.set(values[3])
+    unit_var.set(values[4])
+    has_unsaved_changes = False
 
 def delete_selected():
     global has_unsaved_changes
@@ -272,41 +56,27 @@ def delete_selected():
     if not selected:
         messagebox.showwarning("No Selection", "Please select a sale to delete.")
         return
-    values = tree.item(selected[0])['values']
-    conn = sqlite3.connect(DB_NAME, timeout=10)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT s.sale_id, s.product_id, s.quantity_sold
-        FROM sales s
-        JOIN products p ON s.product_id = p.product_id
-        JOIN brands b ON p.brand_id = b.brand_id
-        JOIN descriptions d ON p.description_id = d.description_id
-        JOIN units_of_measurement u ON s.unit_id = u.unit_id
-        WHERE p.product_name || ' - ' || b.brand_name || ' - ' || d.description_text = ?
-        AND s.quantity_sold = ? AND s.selling_price = ? AND s.sale_date = ? AND u.unit_name = ?
-    """, (values[0], values[1], float(values[2].replace(',', '')), values[3], values[4]))
-    result = cursor.fetchone()
-    conn.close()
-    if result:
-        sale_id, product_id, quantity_sold = result
-        if messagebox.askyesno("Confirm Deletion", "Are you sure you want to delete this sale?"):
-            if delete_sale(sale_id, product_id, quantity_sold):
-                refresh_tree(fetch_data=not is_treeview_cleared)
-                clear_form()
-                has_unsaved_changes = False
+    sale_id = int(selected[0])  # Treeview iids are sale_ids
+    if messagebox.askyesno("Confirm Deletion", "Are you sure you want to delete this sale?"):
+        try:
+            delete_sale(sale_id)
+        except ServiceError as e:
+            messagebox.showerror(e.title, str(e))
+            return
+        refresh_tree(fetch_data=not is_treeview_cleared)
+        clear_form()
+        has_unsaved_changes = False
 
-def save_data():
-    global has_unsaved_changes
-    global is_treeview_cleared
-    # Validate inputs
+def read_form():
+    """Validate the form and return (product_display, product_id, quantity, selling_price, sale_date, unit_name), or None."""
     product_display = product_var.get().strip()
     if not product_display:
         messagebox.showerror("Missing Data", "Please select a product.")
-        return
-    product_id = product_map.get(product_display)
+        return None
+    product_id = products.get_id(product_display)
     if not product_id:
         messagebox.showerror("Invalid Product", "Selected product is invalid.")
-        return
+        return None
     
     quantity = quantity_var.get().strip()
     try:
@@ -315,7 +85,7 @@ def save_data():
             raise ValueError
     except ValueError:
         messagebox.showerror("Invalid Quantity", "Quantity sold must be a positive integer.")
-        return
+        return None
     
     selling_price = selling_price_var.get().strip().replace(',', '')
     try:
@@ -324,19 +94,29 @@ def save_data():
             raise ValueError
     except ValueError:
         messagebox.showerror("Invalid Price", "Selling price must be a non-negative number.")
-        return
+        return None
     
     sale_date = sale_date_var.get().strip()
     try:
         datetime.strptime(sale_date, "%Y-%m-%d")
     except ValueError:
         messagebox.showerror("Invalid Date", "Sale date must be in YYYY-MM-DD format (e.g., 2025-07-19).")
-        return
+        return None
     
     unit_name = unit_var.get().strip()
     if not unit_name:
         messagebox.showerror("Missing Data", "Please select a unit of measurement.")
+        return None
+    return product_display, product_id, quantity, selling_price, sale_date, unit_name
+
+def save_data():
+    global has_unsaved_changes
+    global is_treeview_cleared
+    # Validate inputs
+    form_values = read_form()
+    if form_values is None:
         return
+    product_display, product_id, quantity, selling_price, sale_date, unit_name = form_values
     
     # Validate sale_id
     sale_id = sale_id_var.get().strip()
@@ -349,21 +129,74 @@ def save_data():
         sale_id = None  # New sale
     
     # Save or update sale
-    if save_sale(sale_id, product_id, quantity, selling_price, sale_date, unit_name):
-        if is_treeview_cleared and sale_id:
-            # Update existing Treeview row for edit
-            selected = tree.selection()
-            if selected:
-                tree.item(selected[0], values=(product_display, quantity, locale.format_string("%.2f", selling_price, grouping=True), sale_date, unit_name))
+    try:
+        sale_id = save_sale(sale_id, product_id, quantity, selling_price, sale_date, unit_name)
+    except ServiceError as e:
+        messagebox.showerror(e.title, str(e))
+        return
+    if is_treeview_cleared:
+        values = (product_display, quantity, locale.format_string("%.2f", selling_price, grouping=True), sale_date, unit_name)
+        if tree.exists(sale_id):
+            tree.item(sale_id, values=values)  # Update existing Treeview row for edit
         else:
-            # Append new sale or refresh full Treeview
-            if is_treeview_cleared:
-                formatted_price = locale.format_string("%.2f", selling_price, grouping=True)
-                tree.insert("", "end", values=(product_display, quantity, formatted_price, sale_date, unit_name))
-            else:
-                refresh_tree(fetch_data=True)
-        clear_form()
-        has_unsaved_changes = False
+            tree.insert("", "end", iid=sale_id, values=values)  # Append new sale
+    else:
+        refresh_tree(fetch_data=True)
+    clear_form()
+    has_unsaved_changes = False
+
+def add_to_basket():
+    """Queue the form as a basket line, to be saved with the rest of the basket."""
+    global has_unsaved_changes
+    if sale_id_var.get():
+        messagebox.showwarning("Editing Sale", "Save or clear the sale being edited before adding to the basket.")
+        return
+    form_values = read_form()
+    if form_values is None:
+        return
+    product_display, product_id, quantity, selling_price, sale_date, unit_name = form_values
+    iid = basket_tree.insert("", "end", values=(product_display, quantity, locale.format_string("%.2f", selling_price, grouping=True),
+                                                sale_date, unit_name))
+    basket_lines[iid] = (product_id, quantity, selling_price, sale_date, unit_name)
+    update_basket_total()
+    clear_form()
+    has_unsaved_changes = False
+
+def remove_from_basket():
+    """Drop the selected lines from the basket."""
+    selected = basket_tree.selection()
+    if not selected:
+        messagebox.showwarning("No Selection", "Please select a basket line to remove.")
+        return
+    for iid in selected:
+        del basket_lines[iid]
+    basket_tree.delete(*selected)
+    update_basket_total()
+
+def update_basket_total():
+    total = sum(quantity * selling_price for _, quantity, selling_price, _, _ in basket_lines.values())
+    basket_total_var.set(f"Basket: {len(basket_lines)} items, total {locale.format_string('%.2f', total, grouping=True)}")
+
+def save_basket_data():
+    """Save every basket line as one transaction."""
+    global is_treeview_cleared
+    if not basket_lines:
+        messagebox.showwarning("Empty Basket", "Add at least one sale to the basket first.")
+        return
+    iids = basket_tree.get_children()
+    try:
+        sale_ids = save_basket([basket_lines[iid] for iid in iids])
+    except ServiceError as e:
+        messagebox.showerror(e.title, str(e))
+        return
+    if is_treeview_cleared:
+        for iid, sale_id in zip(iids, sale_ids):
+            tree.insert("", "end", iid=sale_id, values=basket_tree.item(iid)['values'])
+    else:
+        refresh_tree(fetch_data=True)
+    basket_tree.delete(*iids)
+    basket_lines.clear()
+    update_basket_total()
 
 def clear_form():
     sale_id_var.set("")
@@ -373,35 +206,49 @@ def clear_form():
     sale_date_var.set(datetime.today().strftime("%Y-%m-%d"))  # Set to current date
     unit_var.set("")
     search_var.set("")  # Clear search field
-    product_combo['values'] = [p[0] for p in products]  # Reset Combobox to full product list
-    global product_map
-    product_map = {p[0]: p[1] for p in products}  # Reset product map
+    update_combobox()  # Reset Combobox to the first products
     global has_unsaved_changes
     has_unsaved_changes = False
 
 def clear_treeview():
     """Clear Treeview without affecting database."""
     global is_treeview_cleared
-    for row in tree.get_children():
-        tree.delete(row)
+    refresh_task.cancel()  # Drop any refresh still loading
+    tree.delete(*tree.get_children())
     is_treeview_cleared = True
 
+def load_tree_rows():
+    """Fetch and format Treeview rows; runs on a background thread."""
+    rows = []
+    for row in get_sales():
+        # Format selling_price with commas for display
+        formatted_price = locale.format_string("%.2f", row[3], grouping=True)
+        rows.append((row[0], (row[1], row[2], formatted_price, row[4], row[5])))
+    return rows
+
+def fill_tree(rows):
+    """Replace the Treeview contents with (sale_id, values) rows in one batch, keyed by sale_id."""
+    tree.delete(*tree.get_children())
+    for sale_id, values in rows:
+        tree.insert("", "end", iid=sale_id, values=values)
+
 def refresh_tree(fetch_data=True):
-    """Refresh Treeview, optionally fetching data from database."""
+    """Refresh Treeview, optionally fetching data from database in the background."""
     global is_treeview_cleared
-    for row in tree.get_children():
-        tree.delete(row)
     if fetch_data and not is_treeview_cleared:
-        for row in get_sales():
-            # Format selling_price with commas for display
-            formatted_price = locale.format_string("%.2f", row[3], grouping=True)
-            tree.insert("", "end", values=(row[1], row[2], formatted_price, row[4], row[5]))
+        refresh_task.submit(load_tree_rows, fill_tree)
         is_treeview_cleared = False
+    else:
+        refresh_task.cancel()
+        tree.delete(*tree.get_children())
 
 # --- UI Setup ---
+ensure_schema()
 root = tk.Tk()
+search_task = BackgroundTask(root)  # Product search, debounced while typing
+refresh_task = BackgroundTask(root)  # Treeview reloads
 root.title("Sales Recording Module")
-root.geometry("800x600")
+root.geometry("800x750")
 
 # Define custom font (consistent with restocking_module.py)
 custom_font = font.Font(family="TkDefaultFont", size=13)
@@ -434,29 +281,44 @@ tk.Label(form, text="Product", font=custom_font).grid(row=1, column=0, sticky="e
 product_combo = ttk.Combobox(product_frame, textvariable=product_var, font=custom_font, width=50, state="readonly")
 product_combo.grid(row=1, column=0, padx=5, pady=2)
 
-# Initialize products and product map
+# Initialize products
 products = get_products()
-product_map = {p[0]: p[1] for p in products}
-product_combo['values'] = [p[0] for p in products]
-
-def update_combobox(event=None):
-    """Filter Combobox based on search input."""
-    search_text = search_var.get().strip().lower()
-    filtered_products = [(p[0], p[1]) for p in products if search_text in p[0].lower()]
-    product_combo['values'] = [p[0] for p in filtered_products]
-    # Update product_map with filtered products
-    global product_map
-    product_map = {p[0]: p[1] for p in filtered_products}
-    if filtered_products and not product_var.get() in [p[0] for p in filtered_products]:
+search_index = ProductSearchIndex(products)  # Kept in step with the catalog as products change
+product_combo['values'] = [display for display, _ in search_index.search("")]
+last_search_text = ""  # Text of the newest search, so keys that do not edit it start no new one
+
+def update_combobox(event=None, open_dropdown=False):
+    """Filter Combobox based on search input, searching in the background.
+
+    Key presses are debounced; other callers search straight away.
+    """
+    global last_search_text
+    search_text = search_var.get()
+    if event is not None and search_text == last_search_text:
+        return  # Arrow keys, Return and the like leave the results as they are
+    last_search_text = search_text
+    # Pick up products changed in other windows here on the Tk thread, which also reads the catalog
+    search_task.run_exclusive(get_products)
+
+    def search():
+        return [display for display, _ in search_index.search(search_text)]
+
+    delay_ms = SEARCH_DEBOUNCE_MS if event is not None else 0
+    search_task.submit(search, lambda filtered_products: show_products(filtered_products, open_dropdown), delay_ms)
+
+def show_products(filtered_products, open_dropdown=False):
+    """Apply search results to the Combobox, optionally opening its dropdown."""
+    product_combo['values'] = filtered_products
+    if filtered_products and not product_var.get() in filtered_products:
         product_combo.set("")
-
-def open_combobox_dropdown(event=None):
-    """Open Combobox dropdown after filtering."""
-    update_combobox()  # Ensure filter is applied
-    if product_combo['values']:  # Only open if there are filtered products
+    if open_dropdown and filtered_products:  # Only open if there are filtered products
         product_combo.focus()  # Set focus to Combobox
         product_combo.event_generate("<Button-1>", x=0, y=0)  # Simulate click to open dropdown
 
+def open_combobox_dropdown(event=None):
+    """Open Combobox dropdown once the filter is applied."""
+    update_combobox(open_dropdown=True)
+
 search_entry.bind("<KeyRelease>", update_combobox)
 search_entry.bind("<Return>", open_combobox_dropdown)
 
@@ -481,7 +343,8 @@ unit_combo['values'] = get_units()
 # --- Save Button Frame ---
 save_btn_frame = tk.Frame(root)
 save_btn_frame.pack(pady=5)
-tk.Button(save_btn_frame, text="Save Sale", font=custom_font, command=save_data, bg="#28a745", fg="white", width=15).pack()
+tk.Button(save_btn_frame, text="Save Sale", font=custom_font, command=save_data, bg="#28a745", fg="white", width=15).pack(side=tk.LEFT, padx=5)
+tk.Button(save_btn_frame, text="Add to Basket", font=custom_font, command=add_to_basket, width=15).pack(side=tk.LEFT, padx=5)
 
 # --- Treeview for Preview ---
 tree_frame = tk.Frame(root)
@@ -493,6 +356,27 @@ style.theme_use('clam')
 style.configure("Treeview", font=custom_font)
 style.configure("Treeview.Heading", font=(custom_font.cget("family"), custom_font.cget("size"), "bold"))
 
+# --- Basket: line items saved together in one transaction ---
+basket_frame = tk.Frame(root)
+basket_frame.pack(fill="x", padx=10, before=tree_frame)  # Between the form and the saved sales
+basket_lines = {}  # Basket Treeview iid -> (product_id, quantity, selling_price, sale_date, unit_name)
+basket_total_var = tk.StringVar()
+
+basket_tree = ttk.Treeview(basket_frame, columns=columns, show="headings", style="Treeview", height=4)
+for column, heading, width, anchor in (("product", "Product", 350, "w"), ("quantity_sold", "Quantity Sold", 80, "center"),
+                                       ("selling_price", "Selling Price", 120, "center"), ("sale_date", "Sale Date", 120, "center"),
+                                       ("unit", "Unit of Measurement", 80, "center")):
+    basket_tree.heading(column, text=heading)
+    basket_tree.column(column, width=width, anchor=anchor)
+basket_tree.pack(fill="x")
+
+basket_btn_frame = tk.Frame(basket_frame)
+basket_btn_frame.pack(pady=5)
+tk.Label(basket_btn_frame, textvariable=basket_total_var, font=custom_font).pack(side=tk.LEFT, padx=5)
+tk.Button(basket_btn_frame, text="Remove from Basket", font=custom_font, command=remove_from_basket, width=18).pack(side=tk.LEFT, padx=5)
+tk.Button(basket_btn_frame, text="Save Basket", font=custom_font, command=save_basket_data, bg="#28a745", fg="white", width=15).pack(side=tk.LEFT, padx=5)
+update_basket_total()
+
 tree = ttk.Treeview(tree_frame, columns=columns, show="headings", style="Treeview")
 tree.heading("product", text="Product")
 tree.heading("quantity_sold", text="Quantity Sold")
@@ -540,6 +424,9 @@ unit_var.trace_add("write", mark_changes)
 # --- Prevent Exit Without Saving ---
 def on_closing():
     global has_unsaved_changes
+    if basket_lines and messagebox.askyesno("Unsaved Basket", "The basket has not been saved. Do you want to save it before exiting?"):
+        save_basket_data()
+        return
     if has_unsaved_changes:
         if messagebox.askyesno("Unsaved Changes", "You have unsaved changes. Do you want to save before exiting?"):
             save_data()
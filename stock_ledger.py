@@ -0,0 +1,222 @@
+import sys
+from datetime import date, timedelta
+import database_pool
+
+# Every change to stock on hand is appended to stock_movements and never updated or deleted:
+# purchases and sales at their own dates, and edits and deletes as reversing rows dated like the
+# record they correct, so summing the ledger up to a date gives the stock at the end of that date
+# as the records now stand. recorded_at says when each row was actually written.
+#
+# inventory is a projection of the ledger kept by a trigger: one row per product whose movements
+# do not sum to zero. stock_checkpoint_levels holds every product's stock at the end of each
+# month in stock_checkpoints, so an as-of query reads one checkpoint and at most a month of
+# movements. A movement dated on or before a checkpoint (a backdated purchase, or a correction
+# to an old sale) adds itself to the levels of every checkpoint from its date on.
+
+# Reasons recorded with each movement; source_id is the batch_id or sale_id it came from
+PURCHASE = "purchase"
+PURCHASE_REVERSAL = "purchase reversal"
+SALE = "sale"
+SALE_REVERSAL = "sale reversal"
+ADJUSTMENT = "adjustment"  # Difference between inventory and the history when the ledger was started
+
+INVENTORY_QUERY = """
+    SELECT product_id, SUM(quantity) FROM stock_movements
+    WHERE product_id IS NOT NULL
+    GROUP BY product_id
+    HAVING SUM(quantity) <> 0
+"""
+# Stock at the end of :as_of, from the checkpoint at :checkpoint ('' for none) and the movements after it
+AS_OF_QUERY = """
+    SELECT product_id, SUM(quantity) FROM (
+        SELECT product_id, quantity FROM stock_checkpoint_levels WHERE checkpoint_date = :checkpoint
+        UNION ALL
+        SELECT product_id, quantity FROM stock_movements
+        WHERE movement_date > :checkpoint AND movement_date <= :as_of
+    )
+    WHERE {product_filter}
+    GROUP BY product_id
+    HAVING SUM(quantity) <> 0
+"""
+
+# Triggers projecting the ledger into inventory and the checkpoint levels
+LEDGER_TRIGGERS = {
+    "trg_stock_movements_inventory": """
+        CREATE TRIGGER IF NOT EXISTS trg_stock_movements_inventory AFTER INSERT ON stock_movements
+        WHEN NEW.product_id IS NOT NULL
+        BEGIN
+            INSERT INTO inventory (product_id, quantity) VALUES (NEW.product_id, NEW.quantity)
+            ON CONFLICT(product_id) DO UPDATE SET quantity = quantity + excluded.quantity;
+            DELETE FROM inventory WHERE product_id = NEW.product_id AND quantity = 0;
+        END
+    """,
+    "trg_stock_movements_checkpoints": """
+        CREATE TRIGGER IF NOT EXISTS trg_stock_movements_checkpoints AFTER INSERT ON stock_movements
+        WHEN NEW.product_id IS NOT NULL AND NEW.movement_date <= (SELECT MAX(checkpoint_date) FROM stock_checkpoints)
+        BEGIN
+            INSERT INTO stock_checkpoint_levels (checkpoint_date, product_id, quantity)
+            SELECT checkpoint_date, NEW.product_id, NEW.quantity FROM stock_checkpoints
+            WHERE checkpoint_date >= NEW.movement_date
+            ON CONFLICT(checkpoint_date, product_id) DO UPDATE SET quantity = quantity + excluded.quantity;
+        END
+    """,
+}
+# Kept even while the projection triggers are dropped for a bulk load
+APPEND_ONLY_TRIGGERS = {
+    "trg_stock_movements_no_update": """
+        CREATE TRIGGER IF NOT EXISTS trg_stock_movements_no_update BEFORE UPDATE ON stock_movements
+        BEGIN
+            SELECT RAISE(ABORT, 'stock_movements is append-only; record a reversing movement instead');
+        END
+    """,
+    "trg_stock_movements_no_delete": """
+        CREATE TRIGGER IF NOT EXISTS trg_stock_movements_no_delete BEFORE DELETE ON stock_movements
+        BEGIN
+            SELECT RAISE(ABORT, 'stock_movements is append-only; record a reversing movement instead');
+        END
+    """,
+}
+
+def create_ledger_triggers(cursor):
+    """Create the triggers that keep inventory and the checkpoint levels in step with stock_movements."""
+    for sql in LEDGER_TRIGGERS.values():
+        cursor.execute(sql)
+
+def drop_ledger_triggers(cursor):
+    """Drop the projection triggers, e.g. before a bulk load followed by rebuild_inventory() and rebuild_checkpoints()."""
+    for name in LEDGER_TRIGGERS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+def create_append_only_triggers(cursor):
+    for sql in APPEND_ONLY_TRIGGERS.values():
+        cursor.execute(sql)
+
+def record_movements(cursor, movements):
+    """Append (product_id, quantity, movement_date, reason, source_id) rows; quantity is negative for stock going out.
+
+    Runs in the caller's write transaction. Adds any month-end checkpoint that has fallen due.
+    """
+    cursor.executemany("""
+        INSERT INTO stock_movements (product_id, quantity, movement_date, reason, source_id)
+        VALUES (?, ?, ?, ?, ?)
+    """, movements)
+    add_due_checkpoints(cursor)
+
+def rebuild_inventory(cursor):
+    """Recompute inventory from stock_movements."""
+    cursor.execute("DELETE FROM inventory")
+    cursor.execute(f"INSERT INTO inventory (product_id, quantity) {INVENTORY_QUERY}")
+
+def month_end(day):
+    """Return the last day of day's month."""
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+
+def _add_checkpoint(cursor, checkpoint_date):
+    """Record the stock at the end of checkpoint_date, which must be later than every existing checkpoint."""
+    cursor.execute("SELECT COALESCE(MAX(checkpoint_date), '') FROM stock_checkpoints")
+    previous = cursor.fetchone()[0]
+    cursor.execute("INSERT INTO stock_checkpoints (checkpoint_date) VALUES (?)", (checkpoint_date,))
+    cursor.execute("""
+        INSERT INTO stock_checkpoint_levels (checkpoint_date, product_id, quantity)
+        SELECT :as_of, product_id, SUM(quantity) FROM (
+            SELECT product_id, quantity FROM stock_checkpoint_levels WHERE checkpoint_date = :checkpoint
+            UNION ALL
+            SELECT product_id, quantity FROM stock_movements
+            WHERE movement_date > :checkpoint AND movement_date <= :as_of
+        )
+        WHERE product_id IS NOT NULL
+        GROUP BY product_id
+        HAVING SUM(quantity) <> 0
+    """, {"checkpoint": previous, "as_of": checkpoint_date})
+
+def add_due_checkpoints(cursor, today=None):
+    """Add a checkpoint for every month that has ended since the last one (or since the first movement)."""
+    today = today or date.today()
+    cursor.execute("SELECT MAX(checkpoint_date) FROM stock_checkpoints")
+    last = cursor.fetchone()[0]
+    if last is None:
+        cursor.execute("SELECT MIN(movement_date) FROM stock_movements")
+        first = cursor.fetchone()[0]
+        if first is None:
+            return
+        due = month_end(date.fromisoformat(first[:10]))
+    else:
+        due = month_end(date.fromisoformat(last) + timedelta(days=1))
+    while due < today.replace(day=1):
+        _add_checkpoint(cursor, due.isoformat())
+        due = month_end(due + timedelta(days=1))
+
+def rebuild_checkpoints(cursor):
+    """Recompute the levels of every checkpoint from stock_movements, then add any that are due."""
+    cursor.execute("SELECT checkpoint_date FROM stock_checkpoints ORDER BY checkpoint_date")
+    checkpoint_dates = [row[0] for row in cursor.fetchall()]
+    cursor.execute("DELETE FROM stock_checkpoint_levels")
+    cursor.execute("DELETE FROM stock_checkpoints")
+    for checkpoint_date in checkpoint_dates:
+        _add_checkpoint(cursor, checkpoint_date)
+    add_due_checkpoints(cursor)
+
+def stock_as_of(cursor, as_of_date, product_id=None):
+    """Return {product_id: quantity} at the end of as_of_date (YYYY-MM-DD), for one product or all."""
+    cursor.execute("SELECT COALESCE(MAX(checkpoint_date), '') FROM stock_checkpoints WHERE checkpoint_date <= ?",
+                   (as_of_date,))
+    checkpoint = cursor.fetchone()[0]
+    product_filter = "product_id IS NOT NULL" if product_id is None else "product_id = :product_id"
+    cursor.execute(AS_OF_QUERY.format(product_filter=product_filter),
+                   {"checkpoint": checkpoint, "as_of": as_of_date, "product_id": product_id})
+    return dict(cursor.fetchall())
+
+def get_stock_as_of(as_of_date, product_id=None):
+    """Return {product_id: quantity} on hand at the end of as_of_date (YYYY-MM-DD)."""
+    return stock_as_of(database_pool.get_reader().cursor(), as_of_date, product_id)
+
+def find_ledger_mismatches(cursor):
+    """Return (table, key, stored quantity, quantity from the ledger) for every inventory row or checkpoint level that is off."""
+    mismatches = []
+    stored = dict(cursor.execute("SELECT product_id, quantity FROM inventory WHERE product_id IS NOT NULL").fetchall())
+    computed = dict(cursor.execute(INVENTORY_QUERY).fetchall())
+    for product_id in sorted(set(stored) | set(computed)):
+        if stored.get(product_id, 0) != computed.get(product_id, 0):
+            mismatches.append(("inventory", product_id, stored.get(product_id, 0), computed.get(product_id, 0)))
+    cursor.execute("SELECT checkpoint_date FROM stock_checkpoints ORDER BY checkpoint_date")
+    for checkpoint_date in [row[0] for row in cursor.fetchall()]:
+        cursor.execute("SELECT product_id, quantity FROM stock_checkpoint_levels WHERE checkpoint_date = ?",
+                       (checkpoint_date,))
+        stored = {product_id: quantity for product_id, quantity in cursor.fetchall() if quantity}
+        cursor.execute("""
+            SELECT product_id, SUM(quantity) FROM stock_movements
+            WHERE product_id IS NOT NULL AND movement_date <= ?
+            GROUP BY product_id HAVING SUM(quantity) <> 0
+        """, (checkpoint_date,))
+        computed = dict(cursor.fetchall())
+        for product_id in sorted(set(stored) | set(computed)):
+            if stored.get(product_id, 0) != computed.get(product_id, 0):
+                mismatches.append(("stock_checkpoint_levels", (checkpoint_date, product_id),
+                                   stored.get(product_id, 0), computed.get(product_id, 0)))
+    return mismatches
+
+if __name__ == "__main__":
+    from database_setup import ensure_schema
+    ensure_schema()
+    if "--rebuild" in sys.argv:
+        conn = database_pool.acquire_writer()
+        try:
+            database_pool.begin_write(conn)
+            rebuild_inventory(conn.cursor())
+            rebuild_checkpoints(conn.cursor())
+            conn.commit()
+            print("Rebuilt inventory and stock checkpoints from stock_movements.")
+        finally:
+            database_pool.release_writer(conn)
+    if "--as-of" in sys.argv:
+        as_of_date = sys.argv[sys.argv.index("--as-of") + 1]
+        stock = get_stock_as_of(as_of_date)
+        print(f"Stock at end of {as_of_date}: {sum(stock.values())} units across {len(stock)} products")
+    if "--verify" in sys.argv or "--rebuild" in sys.argv:
+        mismatches = find_ledger_mismatches(database_pool.get_reader().cursor())
+        for table, key, stored_quantity, ledger_quantity in mismatches:
+            print(f"{table} {key}: stored {stored_quantity}, ledger gives {ledger_quantity}")
+        if mismatches:
+            print(f"{len(mismatches)} mismatches; run with --rebuild to recompute them from stock_movements.")
+            sys.exit(1)
+        print("inventory and stock checkpoints match stock_movements.")
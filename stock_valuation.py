@@ -0,0 +1,237 @@
+import sys
+import database_pool
+
+TOLERANCE = 0.005  # Largest difference between a stored value and the recomputed one that counts as a match
+
+# Stock is valued at what is left of each batch (its quantity less what sales drew from it) times its
+# buying price. product_stock_value holds that per product; stock_value_changes holds the net change
+# per day (purchases at their purchase date, sales at their sale date), so summing it up to a date
+# gives the valuation as of that date. stock_value_total keeps the sum of product_stock_value in its
+# one row, so the current valuation is a single-row read.
+PRODUCT_VALUE_QUERY = """
+    SELECT ib.product_id, SUM((ib.quantity - COALESCE(used.quantity_used, 0)) * ib.buying_price)
+    FROM inventory_batches ib
+    LEFT JOIN (
+        SELECT batch_id, SUM(quantity_used) AS quantity_used FROM sale_batches GROUP BY batch_id
+    ) used ON used.batch_id = ib.batch_id
+    WHERE ib.product_id IS NOT NULL
+    GROUP BY ib.product_id
+"""
+VALUE_CHANGES_QUERY = """
+    SELECT day, SUM(value_change)
+    FROM (
+        SELECT purchase_date AS day, quantity * buying_price AS value_change
+        FROM inventory_batches
+        UNION ALL
+        SELECT s.sale_date, -sb.quantity_used * ib.buying_price
+        FROM sale_batches sb
+        JOIN sales s ON s.sale_id = sb.sale_id
+        JOIN inventory_batches ib ON ib.batch_id = sb.batch_id
+    )
+    WHERE day IS NOT NULL
+    GROUP BY day
+"""
+
+# Upserts shared by the triggers below: {product}/{day} and {value} are SQL expressions
+_ADD_TO_PRODUCT = """
+    INSERT INTO product_stock_value (product_id, stock_value) SELECT {product}, {value} WHERE {product} IS NOT NULL
+    ON CONFLICT(product_id) DO UPDATE SET stock_value = stock_value + excluded.stock_value;
+"""
+_ADD_TO_DAY = """
+    INSERT INTO stock_value_changes (change_date, value_change) SELECT {day}, {value} WHERE {day} IS NOT NULL
+    ON CONFLICT(change_date) DO UPDATE SET value_change = value_change + excluded.value_change;
+"""
+# The stock value a sale_batches row took out, dated by its sale; {row} is OLD or NEW
+_SALE_OUTFLOW = """
+    INSERT INTO stock_value_changes (change_date, value_change)
+    SELECT s.sale_date, {sign} {row}.quantity_used * ib.buying_price
+    FROM sales s, inventory_batches ib
+    WHERE s.sale_id = {row}.sale_id AND ib.batch_id = {row}.batch_id AND s.sale_date IS NOT NULL
+    ON CONFLICT(change_date) DO UPDATE SET value_change = value_change + excluded.value_change;
+"""
+_SALE_PRODUCT = """
+    INSERT INTO product_stock_value (product_id, stock_value)
+    SELECT ib.product_id, {sign} {row}.quantity_used * ib.buying_price
+    FROM inventory_batches ib
+    WHERE ib.batch_id = {row}.batch_id AND ib.product_id IS NOT NULL
+    ON CONFLICT(product_id) DO UPDATE SET stock_value = stock_value + excluded.stock_value;
+"""
+# Each sale date's units drawn from the OLD batch, valued at {price}
+_BATCH_OUTFLOWS = """
+    INSERT INTO stock_value_changes (change_date, value_change)
+    SELECT s.sale_date, SUM(sb.quantity_used) * {price}
+    FROM sale_batches sb
+    JOIN sales s ON s.sale_id = sb.sale_id
+    WHERE sb.batch_id = OLD.batch_id AND s.sale_date IS NOT NULL
+    GROUP BY s.sale_date
+    ON CONFLICT(change_date) DO UPDATE SET value_change = value_change + excluded.value_change;
+"""
+_USED = "(SELECT COALESCE(SUM(quantity_used), 0) FROM sale_batches WHERE batch_id = OLD.batch_id)"
+# Stock value a sale's batches took out, for moving or reversing it as a whole
+_SALE_TOTAL = """(SELECT COALESCE(SUM(sb.quantity_used * ib.buying_price), 0)
+                  FROM sale_batches sb JOIN inventory_batches ib ON ib.batch_id = sb.batch_id
+                  WHERE sb.sale_id = OLD.sale_id)"""
+
+# Cascaded sale_batches deletes run after the parent row is gone and so change nothing here; the
+# BEFORE DELETE triggers on inventory_batches and sales account for them instead.
+VALUATION_TRIGGERS = {
+    "trg_batches_insert_value": f"""
+        CREATE TRIGGER IF NOT EXISTS trg_batches_insert_value AFTER INSERT ON inventory_batches
+        BEGIN
+            {_ADD_TO_PRODUCT.format(product="NEW.product_id", value="NEW.quantity * NEW.buying_price")}
+            {_ADD_TO_DAY.format(day="NEW.purchase_date", value="NEW.quantity * NEW.buying_price")}
+        END
+    """,
+    "trg_batches_update_value": f"""
+        CREATE TRIGGER IF NOT EXISTS trg_batches_update_value
+        AFTER UPDATE OF product_id, quantity, buying_price, purchase_date ON inventory_batches
+        BEGIN
+            {_ADD_TO_PRODUCT.format(product="OLD.product_id", value=f"-(OLD.quantity - {_USED}) * OLD.buying_price")}
+            {_ADD_TO_PRODUCT.format(product="NEW.product_id", value=f"(NEW.quantity - {_USED}) * NEW.buying_price")}
+            {_ADD_TO_DAY.format(day="OLD.purchase_date", value="-OLD.quantity * OLD.buying_price")}
+            {_ADD_TO_DAY.format(day="NEW.purchase_date", value="NEW.quantity * NEW.buying_price")}
+            {_BATCH_OUTFLOWS.format(price="(OLD.buying_price - NEW.buying_price)")}
+        END
+    """,
+    "trg_batches_delete_value": f"""
+        CREATE TRIGGER IF NOT EXISTS trg_batches_delete_value BEFORE DELETE ON inventory_batches
+        BEGIN
+            {_ADD_TO_PRODUCT.format(product="OLD.product_id", value=f"-(OLD.quantity - {_USED}) * OLD.buying_price")}
+            {_ADD_TO_DAY.format(day="OLD.purchase_date", value="-OLD.quantity * OLD.buying_price")}
+            {_BATCH_OUTFLOWS.format(price="OLD.buying_price")}
+        END
+    """,
+    "trg_sale_batches_insert_value": f"""
+        CREATE TRIGGER IF NOT EXISTS trg_sale_batches_insert_value AFTER INSERT ON sale_batches
+        BEGIN
+            {_SALE_PRODUCT.format(sign="-", row="NEW")}
+            {_SALE_OUTFLOW.format(sign="-", row="NEW")}
+        END
+    """,
+    "trg_sale_batches_update_value": f"""
+        CREATE TRIGGER IF NOT EXISTS trg_sale_batches_update_value
+        AFTER UPDATE OF sale_id, batch_id, quantity_used ON sale_batches
+        BEGIN
+            {_SALE_PRODUCT.format(sign="", row="OLD")}
+            {_SALE_OUTFLOW.format(sign="", row="OLD")}
+            {_SALE_PRODUCT.format(sign="-", row="NEW")}
+            {_SALE_OUTFLOW.format(sign="-", row="NEW")}
+        END
+    """,
+    "trg_sale_batches_delete_value": f"""
+        CREATE TRIGGER IF NOT EXISTS trg_sale_batches_delete_value AFTER DELETE ON sale_batches
+        BEGIN
+            {_SALE_PRODUCT.format(sign="", row="OLD")}
+            {_SALE_OUTFLOW.format(sign="", row="OLD")}
+        END
+    """,
+    "trg_sales_move_value": f"""
+        CREATE TRIGGER IF NOT EXISTS trg_sales_move_value AFTER UPDATE OF sale_date ON sales
+        WHEN OLD.sale_date IS NOT NEW.sale_date
+        BEGIN
+            {_ADD_TO_DAY.format(day="OLD.sale_date", value=_SALE_TOTAL)}
+            {_ADD_TO_DAY.format(day="NEW.sale_date", value=f"-{_SALE_TOTAL}")}
+        END
+    """,
+    "trg_sales_delete_value": f"""
+        CREATE TRIGGER IF NOT EXISTS trg_sales_delete_value BEFORE DELETE ON sales
+        BEGIN
+            {_ADD_TO_DAY.format(day="OLD.sale_date", value=_SALE_TOTAL)}
+        END
+    """,
+    "trg_product_value_insert_total": """
+        CREATE TRIGGER IF NOT EXISTS trg_product_value_insert_total AFTER INSERT ON product_stock_value
+        BEGIN
+            UPDATE stock_value_total SET stock_value = stock_value + NEW.stock_value WHERE total_id = 1;
+        END
+    """,
+    "trg_product_value_update_total": """
+        CREATE TRIGGER IF NOT EXISTS trg_product_value_update_total AFTER UPDATE OF stock_value ON product_stock_value
+        BEGIN
+            UPDATE stock_value_total SET stock_value = stock_value + NEW.stock_value - OLD.stock_value WHERE total_id = 1;
+        END
+    """,
+    "trg_product_value_delete_total": """
+        CREATE TRIGGER IF NOT EXISTS trg_product_value_delete_total AFTER DELETE ON product_stock_value
+        BEGIN
+            UPDATE stock_value_total SET stock_value = stock_value - OLD.stock_value WHERE total_id = 1;
+        END
+    """,
+}
+
+def create_valuation_triggers(cursor):
+    """Create the triggers that maintain product_stock_value, stock_value_total and stock_value_changes."""
+    for sql in VALUATION_TRIGGERS.values():
+        cursor.execute(sql)
+
+def drop_valuation_triggers(cursor):
+    """Drop the valuation triggers, e.g. before a bulk load followed by rebuild_stock_valuation()."""
+    for name in VALUATION_TRIGGERS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+def rebuild_stock_valuation(cursor):
+    """Recompute product_stock_value, stock_value_total and stock_value_changes from batches and sales."""
+    cursor.execute("DELETE FROM product_stock_value")
+    cursor.execute(f"INSERT INTO product_stock_value (product_id, stock_value) {PRODUCT_VALUE_QUERY}")
+    cursor.execute("""
+        INSERT OR REPLACE INTO stock_value_total (total_id, stock_value)
+        SELECT 1, COALESCE(SUM(stock_value), 0) FROM product_stock_value
+    """)
+    cursor.execute("DELETE FROM stock_value_changes")
+    cursor.execute(f"INSERT INTO stock_value_changes (change_date, value_change) {VALUE_CHANGES_QUERY}")
+
+def find_valuation_mismatches(cursor):
+    """Return (table, key, stored value, recomputed value) for every row that is off."""
+    mismatches = []
+    for table, stored_query, computed_query in (
+            ("product_stock_value", "SELECT product_id, stock_value FROM product_stock_value", PRODUCT_VALUE_QUERY),
+            ("stock_value_total", "SELECT total_id, stock_value FROM stock_value_total",
+             "SELECT 1, COALESCE(SUM(stock_value), 0) FROM product_stock_value"),
+            ("stock_value_changes", "SELECT change_date, value_change FROM stock_value_changes", VALUE_CHANGES_QUERY)):
+        stored = dict(cursor.execute(stored_query).fetchall())
+        computed = dict(cursor.execute(computed_query).fetchall())
+        for key in sorted(set(stored) | set(computed), key=str):
+            stored_value, computed_value = stored.get(key) or 0.0, computed.get(key) or 0.0
+            if abs(stored_value - computed_value) > TOLERANCE:
+                mismatches.append((table, key, stored_value, computed_value))
+    return mismatches
+
+def get_stock_value():
+    """Return the current value of all stock on hand."""
+    cursor = database_pool.get_reader().cursor()
+    cursor.execute("SELECT stock_value FROM stock_value_total WHERE total_id = 1")
+    total = cursor.fetchone()
+    return total[0] if total else 0.0
+
+def get_stock_value_as_of(as_of_date):
+    """Return the value of stock on hand at the end of as_of_date (YYYY-MM-DD)."""
+    cursor = database_pool.get_reader().cursor()
+    cursor.execute("SELECT COALESCE(SUM(value_change), 0) FROM stock_value_changes WHERE change_date <= ?",
+                   (as_of_date,))
+    return cursor.fetchone()[0]
+
+if __name__ == "__main__":
+    from database_setup import ensure_schema
+    ensure_schema()
+    if "--rebuild" in sys.argv:
+        conn = database_pool.acquire_writer()
+        try:
+            database_pool.begin_write(conn)
+            rebuild_stock_valuation(conn.cursor())
+            conn.commit()
+            print("Rebuilt stock valuation from inventory_batches and sale_batches.")
+        finally:
+            database_pool.release_writer(conn)
+    if "--as-of" in sys.argv:
+        as_of_date = sys.argv[sys.argv.index("--as-of") + 1]
+        print(f"Stock valuation at end of {as_of_date}: {get_stock_value_as_of(as_of_date):.2f}")
+    else:
+        print(f"Current stock valuation: {get_stock_value():.2f}")
+    if "--verify" in sys.argv or "--rebuild" in sys.argv:
+        mismatches = find_valuation_mismatches(database_pool.get_reader().cursor())
+        for table, key, stored_value, computed_value in mismatches:
+            print(f"{table} {key}: stored {stored_value:.2f}, recomputed {computed_value:.2f}")
+        if mismatches:
+            print(f"{len(mismatches)} mismatches; run with --rebuild to recompute the valuation.")
+            sys.exit(1)
+        print("Stock valuation matches inventory_batches and sale_batches.")